@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+"""Compare building a table of messages through as_dict() against parsing straight into columns.
+
+    python benchmarks/bench_columnar.py --messages 100000 --profile heavy-sd
+"""
+
+from __future__ import print_function
+
+import argparse
+import gc
+import sys
+import time
+import tracemalloc
+
+from corpus import PROFILES, profile
+
+from syslog_rfc5424_parser import SyslogMessage
+from syslog_rfc5424_parser.columnar import parse_columns
+
+
+def dicts(lines):
+    return [m.as_dict() for m in SyslogMessage.parse_many(lines).messages]
+
+
+def dicts_to_pandas(lines):
+    import pandas
+    return pandas.DataFrame(dicts(lines))
+
+
+def columns_to_pandas(lines):
+    return parse_columns(lines).to_pandas()
+
+
+def run(label, lines, fn):
+    gc.collect()
+    start = time.perf_counter()
+    fn(lines)
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    tracemalloc.start()
+    result = fn(lines)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    print('{0:<24} {1:>10,.0f} msg/s  peak {2:>8,.0f} B/msg'.format(label, len(lines) / elapsed, peak / len(lines)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('-n', '--messages', type=int, default=50000)
+    parser.add_argument('-p', '--profile', choices=sorted(PROFILES), default='typical')
+    args = parser.parse_args()
+
+    lines = profile(args.profile, args.messages)
+    run('parse_many + as_dict', lines, dicts)
+    run('parse_columns', lines, parse_columns)
+    try:
+        import pandas  # noqa: F401
+    except ImportError:
+        print('(pandas is not installed; skipping DataFrame construction)')
+        return
+    run('as_dict -> DataFrame', lines, dicts_to_pandas)
+    run('columns -> DataFrame', lines, columns_to_pandas)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
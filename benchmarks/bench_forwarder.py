@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+"""Compare relaying messages to a loopback TCP listener with a socket.send per message against a Forwarder.
+
+    python benchmarks/bench_forwarder.py --messages 200000 --batch-size 1000 --connections 2
+"""
+
+from __future__ import print_function
+
+import argparse
+import asyncio
+import socket
+import sys
+import threading
+import time
+
+from corpus import PROFILES, profile
+
+from syslog_rfc5424_parser import SyslogMessage
+from syslog_rfc5424_parser.forwarder import Forwarder
+
+
+class DiscardListener(object):
+    """A TCP listener which reads and counts everything sent to it, on a thread"""
+
+    def __init__(self):
+        self.sock = socket.socket()
+        self.sock.bind(('127.0.0.1', 0))
+        self.sock.listen(16)
+        self.port = self.sock.getsockname()[1]
+        self.received = 0
+        self._lock = threading.Lock()
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def _accept(self):
+        while True:
+            conn, _ = self.sock.accept()
+            threading.Thread(target=self._read, args=(conn,), daemon=True).start()
+
+    def _read(self, conn):
+        with conn:
+            while True:
+                data = conn.recv(1 << 20)
+                if not data:
+                    return
+                with self._lock:
+                    self.received += len(data)
+
+    def wait_for(self, total):
+        while self.received < total:
+            time.sleep(0.001)
+
+
+def per_message(listener, messages):
+    with socket.create_connection(('127.0.0.1', listener.port)) as sock:
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        for message in messages:
+            data = message.to_bytes()
+            sock.sendall(b'%d %s' % (len(data), data))
+
+
+def forwarder(batch_size, connections):
+    def forward(listener, messages):
+        async def go():
+            forwarder = Forwarder('127.0.0.1', listener.port, connections=connections, batch_size=batch_size)
+            await forwarder.start()
+            await forwarder.send(messages)
+            forwarder.close()
+            await forwarder.wait_closed()
+        asyncio.run(go())
+    return forward
+
+
+def run(label, listener, messages, total, fn, baseline=None):
+    start_bytes = listener.received
+    start = time.perf_counter()
+    fn(listener, messages)
+    listener.wait_for(start_bytes + total)
+    elapsed = time.perf_counter() - start
+    print('{0:<36} {1:>12,.0f} msg/s{2}'.format(
+        label, len(messages) / elapsed, '' if baseline is None else '  {0:>6.2f}x'.format(baseline / elapsed)))
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('-n', '--messages', type=int, default=100000)
+    parser.add_argument('--profile', default='typical', choices=sorted(PROFILES))
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--connections', type=int, default=1)
+    args = parser.parse_args()
+
+    messages = [SyslogMessage.parse(line) for line in profile(args.profile, args.messages)]
+    total = 0
+    for message in messages:
+        size = len(message.to_bytes())
+        total += len(str(size)) + 1 + size
+    listener = DiscardListener()
+    baseline = run('socket.sendall per message', listener, messages, total, per_message)
+    run('Forwarder ({0} x {1})'.format(args.connections, args.batch_size), listener, messages, total,
+        forwarder(args.batch_size, args.connections), baseline)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+"""Measure how ParsePipeline throughput scales with the number of worker processes.
+
+    python benchmarks/bench_pipeline.py --messages 200000 --max-workers 8
+"""
+
+from __future__ import print_function
+
+import argparse
+import os
+import sys
+import time
+
+from corpus import PROFILES, profile
+
+from syslog_rfc5424_parser import SyslogMessage
+from syslog_rfc5424_parser.pipeline import ParsePipeline
+
+
+def run(label, lines, fn):
+    start = time.perf_counter()
+    parsed = fn(lines)
+    elapsed = time.perf_counter() - start
+    assert parsed == len(lines), parsed
+    print('{0:<28} {1:>12,.0f} msg/s {2:>10.2f} s'.format(label, len(lines) / elapsed, elapsed))
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('-n', '--messages', type=int, default=100000)
+    parser.add_argument('-p', '--profile', choices=sorted(PROFILES), default='typical')
+    parser.add_argument('-w', '--max-workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('-c', '--chunksize', type=int, default=2000)
+    parser.add_argument('--unordered', action='store_true')
+    parser.add_argument('--compact', action='store_true', help='Leave results as compact records')
+    args = parser.parse_args()
+
+    lines = profile(args.profile, args.messages)
+    baseline = run('in-process parse_many', lines, lambda ls: len(SyslogMessage.parse_many(ls).messages))
+    workers = 1
+    while True:
+        with ParsePipeline(max_workers=workers, chunksize=args.chunksize, ordered=not args.unordered,
+                           compact=args.compact) as pipeline:
+            elapsed = run(
+                'pipeline, {0} worker(s)'.format(workers), lines,
+                lambda ls: sum(len(r.messages) for r in pipeline.parse(ls))
+            )
+        print('{0:<28} {1:>12.2f}x'.format('', baseline / elapsed))
+        if workers >= args.max_workers:
+            break
+        workers = min(workers * 2, args.max_workers)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
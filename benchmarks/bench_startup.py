@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+"""Measure process startup costs: importing the package, parsing a first message, and a first message which needs
+the Lark grammar, with its compiled-grammar cache empty (cold) and populated (warm).
+
+Each step runs in a fresh interpreter; times are the median over --runs, less that of an interpreter which does
+nothing.
+
+    python benchmarks/bench_startup.py --runs 20
+"""
+
+from __future__ import print_function
+
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+
+# the scanner rejects this (its SD-PARAM value ends in a lone backslash), so it is parsed by the grammar
+GRAMMAR_MESSAGE = '<1>1 - - - - - [a b="\\"]'
+
+STEPS = [
+    ('import', 'import syslog_rfc5424_parser'),
+    ('first parse', 'import syslog_rfc5424_parser; syslog_rfc5424_parser.SyslogMessage.parse("<1>1 - - - - - -")'),
+    ('grammar, cold cache', 'import syslog_rfc5424_parser; syslog_rfc5424_parser.SyslogMessage.parse({0!r})'.format(
+        GRAMMAR_MESSAGE)),
+    ('grammar, warm cache', 'import syslog_rfc5424_parser; syslog_rfc5424_parser.SyslogMessage.parse({0!r})'.format(
+        GRAMMAR_MESSAGE)),
+]
+
+
+def run(code, runs, env, cache_dir=None):
+    times = []
+    for _ in range(runs):
+        if cache_dir is not None:
+            shutil.rmtree(cache_dir, ignore_errors=True)
+        start = time.perf_counter()
+        subprocess.check_call([sys.executable, '-c', code], env=env)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('-r', '--runs', type=int, default=10)
+    args = parser.parse_args()
+
+    cache_dir = tempfile.mkdtemp()
+    env = dict(os.environ, SYSLOG_RFC5424_PARSER_CACHE_DIR=cache_dir)
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [root, env.get('PYTHONPATH')]))
+    try:
+        baseline = run('pass', args.runs, env)
+        print('{0:<24} {1:>8.1f} ms'.format('interpreter', baseline * 1000))
+        for label, code in STEPS:
+            elapsed = run(code, args.runs, env, cache_dir if label.endswith('cold cache') else None)
+            print('{0:<24} {1:>8.1f} ms'.format(label, (elapsed - baseline) * 1000))
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+"""Compare finding buffered messages through a MessageStore's indexes against scanning every message.
+
+    python benchmarks/bench_store.py --messages 100000 --profile heavy-sd
+"""
+
+from __future__ import print_function
+
+import argparse
+import sys
+import time
+
+from corpus import PROFILES, profile
+
+from syslog_rfc5424_parser import SyslogMessage
+from syslog_rfc5424_parser.store import MessageStore
+
+
+def scan(messages, sd_id, param, value, fields):
+    found = []
+    for message in messages:
+        if any(getattr(message, field) != field_value for field, field_value in fields.items()):
+            continue
+        sd_params = message.sd.get(sd_id)
+        if sd_params is not None and sd_params.get(param) == value:
+            found.append(message)
+    return found
+
+
+def timed(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('-n', '--messages', type=int, default=50000)
+    parser.add_argument('-p', '--profile', choices=sorted(PROFILES), default='typical')
+    parser.add_argument('-r', '--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    messages = SyslogMessage.parse_many(profile(args.profile, args.messages)).messages
+    store = MessageStore()
+    start = time.perf_counter()
+    store.extend(messages)
+    print('{0:<36} {1:>10,.0f} msg/s'.format('MessageStore.extend', len(messages) / (time.perf_counter() - start)))
+
+    with_sd = [m for m in messages if 'meta' in m.sd]
+    if not with_sd:
+        print('(the {0} profile has no structured data to search)'.format(args.profile))
+        return
+    example = with_sd[len(with_sd) // 2]
+    value = example.sd['meta']['p0']
+    for fields in [{}, {'appname': example.appname}]:
+        label = ' '.join(['meta p0={0}'.format(value)] + ['{0}={1}'.format(*item) for item in fields.items()])
+        expected, scan_time = timed(lambda: scan(messages, 'meta', 'p0', value, fields), args.repeat)
+        found, find_time = timed(lambda: store.find('meta', 'p0', value, **fields), args.repeat)
+        assert found == expected
+        print('{0:<36} {1:>6} found  scan {2:>9.3f} ms  find {3:>9.3f} ms  ({4:,.0f}x)'.format(
+            label, len(found), scan_time * 1e3, find_time * 1e3, scan_time / find_time))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
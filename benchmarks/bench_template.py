@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+"""Compare emitting messages through a MessageTemplate against formatting a new SyslogMessage for each.
+
+    python benchmarks/bench_template.py --messages 200000
+"""
+
+from __future__ import print_function
+
+import argparse
+import sys
+import time
+
+from syslog_rfc5424_parser import SyslogMessage
+from syslog_rfc5424_parser.constants import SyslogFacility, SyslogSeverity
+from syslog_rfc5424_parser.template import MessageTemplate
+
+
+HOSTNAME = 'web-17.example.com'
+APPNAME = 'checkout-api'
+PROCID = 31337
+SD_LAYOUT = [('meta', ['sequenceId', 'requestId']), ('http@32473', ['method', 'status'])]
+SEVERITIES = [SyslogSeverity.info, SyslogSeverity.notice, SyslogSeverity.warning, SyslogSeverity.info]
+
+
+def records(count):
+    start = 1453000000.0
+    return [
+        (SEVERITIES[i % len(SEVERITIES)], 'request {0} served in {1} ms'.format(i, i % 97), start + i * 0.001,
+         (i, 'req-{0:08x}'.format(i), 'GET', 200 if i % 10 else 503))
+        for i in range(count)
+    ]
+
+
+def _sd(sd_values):
+    sequence_id, request_id, method, status = sd_values
+    return {'meta': {'sequenceId': sequence_id, 'requestId': request_id},
+            'http@32473': {'method': method, 'status': status}}
+
+
+def str_message(records):
+    return [str(SyslogMessage(severity, SyslogFacility.local0, 1, timestamp, HOSTNAME, APPNAME, PROCID, None,
+                              _sd(sd_values), msg)).encode('utf-8')
+            for severity, msg, timestamp, sd_values in records]
+
+
+def to_bytes(records):
+    return [SyslogMessage(severity, SyslogFacility.local0, 1, timestamp, HOSTNAME, APPNAME, PROCID, None,
+                          _sd(sd_values), msg).to_bytes()
+            for severity, msg, timestamp, sd_values in records]
+
+
+TEMPLATE = MessageTemplate(SyslogFacility.local0, HOSTNAME, APPNAME, PROCID, sd_layout=SD_LAYOUT)
+
+
+def template_render(records):
+    render = TEMPLATE.render
+    return [render(severity, msg, timestamp, sd_values) for severity, msg, timestamp, sd_values in records]
+
+
+def template_buffer(records):
+    out = bytearray()
+    render = TEMPLATE.render
+    for severity, msg, timestamp, sd_values in records:
+        render(severity, msg, timestamp, sd_values, out)
+    return out
+
+
+def run(label, records, fn, baseline=None):
+    best = None
+    for _ in range(3):
+        start = time.perf_counter()
+        fn(records)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    print('{0:<36} {1:>12,.0f} msg/s{2}'.format(
+        label, len(records) / best, '' if baseline is None else '  {0:>6.2f}x'.format(baseline / best)))
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('-n', '--messages', type=int, default=100000)
+    args = parser.parse_args()
+
+    items = records(args.messages)
+    assert template_render(items[:100]) == str_message(items[:100])
+    baseline = run('str(SyslogMessage(...))', items, str_message)
+    run('SyslogMessage(...).to_bytes()', items, to_bytes, baseline)
+    run('MessageTemplate.render', items, template_render, baseline)
+    run('MessageTemplate.render into a buffer', items, template_buffer, baseline)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
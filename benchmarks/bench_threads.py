@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+"""Measure how parse_concurrent throughput scales with the number of threads.
+
+Threads only parse in parallel on a free-threaded build of CPython; under the GIL, expect no speedup. Pass
+--interpreter (repeatably) to run the same measurement under other Pythons, such as python3.13t, and compare.
+
+    python benchmarks/bench_threads.py --messages 100000 --max-workers 8
+    python benchmarks/bench_threads.py --interpreter python3.13 --interpreter python3.13t
+"""
+
+from __future__ import print_function
+
+import argparse
+import concurrent.futures
+import os
+import subprocess
+import sys
+import sysconfig
+import time
+
+from corpus import PROFILES, profile
+
+from syslog_rfc5424_parser import SyslogMessage
+from syslog_rfc5424_parser.pipeline import parse_concurrent
+
+
+def describe_interpreter():
+    gil = getattr(sys, '_is_gil_enabled', lambda: True)()
+    free_threaded = bool(sysconfig.get_config_var('Py_GIL_DISABLED'))
+    return '{0} {1}{2}, GIL {3}'.format(
+        sys.implementation.name, sys.version.split()[0], ' (free-threaded build)' if free_threaded else '',
+        'enabled' if gil else 'disabled')
+
+
+def run(label, lines, fn):
+    start = time.perf_counter()
+    parsed = fn(lines)
+    elapsed = time.perf_counter() - start
+    assert parsed == len(lines), parsed
+    print('{0:<28} {1:>12,.0f} msg/s {2:>10.2f} s'.format(label, len(lines) / elapsed, elapsed))
+    return elapsed
+
+
+def measure(args):
+    print(describe_interpreter())
+    lines = profile(args.profile, args.messages)
+    baseline = run('parse_many, 1 thread', lines, lambda ls: len(SyslogMessage.parse_many(ls).messages))
+    workers = 1
+    while True:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            elapsed = run(
+                'parse_concurrent, {0} thread(s)'.format(workers), lines,
+                lambda ls: len(parse_concurrent(ls, chunksize=args.chunksize, executor=executor).messages)
+            )
+        print('{0:<28} {1:>12.2f}x'.format('', baseline / elapsed))
+        if workers >= args.max_workers:
+            break
+        workers = min(workers * 2, args.max_workers)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('-n', '--messages', type=int, default=100000)
+    parser.add_argument('-p', '--profile', choices=sorted(PROFILES), default='typical')
+    parser.add_argument('-w', '--max-workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('-c', '--chunksize', type=int, default=2000)
+    parser.add_argument('-i', '--interpreter', action='append', default=[],
+                        help='Run under this Python instead (may be repeated)')
+    args = parser.parse_args()
+
+    if not args.interpreter:
+        return measure(args)
+    argv = ['-n', str(args.messages), '-p', args.profile, '-w', str(args.max_workers), '-c', str(args.chunksize)]
+    status = 0
+    for interpreter in args.interpreter:
+        status = subprocess.call([interpreter, os.path.abspath(__file__)] + argv) or status
+        print()
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,79 @@
+"""Synthetic, reproducible corpora of RFC5424 messages for the benchmarks."""
+
+import random
+
+
+TIMESTAMP_FORMS = ('nil', 'zulu', 'offset', 'fractional')
+
+# named corpus shapes, covering the axes which matter to the parser
+PROFILES = {
+    'minimal': dict(sd_elements=0, sd_params=0, msg_length=0, nil_density=1.0, timestamps=('nil',)),
+    'typical': dict(sd_elements=1, sd_params=2, msg_length=120, nil_density=0.2, timestamps=TIMESTAMP_FORMS),
+    'heavy-sd': dict(sd_elements=4, sd_params=6, msg_length=60, nil_density=0.1, timestamps=('fractional',)),
+    'long-msg': dict(sd_elements=1, sd_params=1, msg_length=4000, nil_density=0.2, timestamps=('zulu',)),
+}
+
+_WORDS = ('GET', 'POST', '/health', 'HTTP/1.1', '200', '404', 'ok', 'upstream', 'timeout', 'user=alice',
+          'request_id=9f2c', 'latency_ms=13', '"quoted"', 'path=/var/log', '127.0.0.1:40150')
+
+
+def _timestamp(rng, form):
+    if form == 'nil':
+        return '-'
+    base = '20{0:02d}-{1:02d}-{2:02d}T{3:02d}:{4:02d}:{5:02d}'.format(
+        rng.randint(10, 29), rng.randint(1, 12), rng.randint(1, 28), rng.randint(0, 23), rng.randint(0, 59),
+        rng.randint(0, 59)
+    )
+    if form == 'zulu':
+        return base + 'Z'
+    if form == 'offset':
+        return base + rng.choice(('+00:00', '-08:00', '+05:30'))
+    return base + '.{0:06d}'.format(rng.randint(0, 999999)) + rng.choice(('Z', '-07:00'))
+
+
+def _field(rng, nil_density, value):
+    return '-' if rng.random() < nil_density else value
+
+
+def _body(rng, length):
+    words = []
+    size = 0
+    while size < length:
+        word = rng.choice(_WORDS)
+        words.append(word)
+        size += len(word) + 1
+    return ' '.join(words)[:length]
+
+
+def generate(count, sd_elements=1, sd_params=2, msg_length=120, nil_density=0.2, timestamps=TIMESTAMP_FORMS,
+             hosts=50, apps=20, seed=0):
+    """Return a list of count messages (as str) with the given shape; the same arguments give the same corpus"""
+    rng = random.Random(seed)
+    messages = []
+    for i in range(count):
+        pri = rng.randint(0, 191)
+        timestamp = _timestamp(rng, rng.choice(timestamps))
+        hostname = _field(rng, nil_density, 'host{0}.example.com'.format(rng.randrange(hosts)))
+        appname = _field(rng, nil_density, 'app{0}'.format(rng.randrange(apps)))
+        procid = _field(rng, nil_density, str(rng.randint(1, 65535)))
+        msgid = _field(rng, nil_density, rng.choice(('ID47', 'REQ', 'AUDIT')))
+        if sd_elements:
+            sd = ''.join(
+                '[{0}{1}]'.format(
+                    'meta' if e == 0 else 'sd{0}@32473'.format(e),
+                    ''.join(' p{0}="{1}"'.format(p, rng.choice(_WORDS).replace('"', '\\"')) for p in range(sd_params))
+                )
+                for e in range(sd_elements)
+            )
+        else:
+            sd = '-'
+        message = '<{0}>1 {1} {2} {3} {4} {5} {6}'.format(pri, timestamp, hostname, appname, procid, msgid, sd)
+        if msg_length:
+            message += ' ' + _body(rng, msg_length)
+        messages.append(message)
+    return messages
+
+
+def profile(name, count, seed=0):
+    """Return the corpus for one of the named PROFILES"""
+    return generate(count, seed=seed, **PROFILES[name])
@@ -0,0 +1,208 @@
+#!/usr/bin/env python
+"""Benchmark the hot paths of SyslogMessage over synthetic corpora.
+
+For each corpus profile and benchmark, reports throughput (messages and MB per second, best of --repeat passes),
+per-message latency percentiles (from timing every message of one pass individually) and the peak memory allocated
+while running one pass with all of its results kept alive (from tracemalloc).
+
+    python benchmarks/run.py                                 # everything
+    python benchmarks/run.py -p typical -b parse -b as_dict  # a subset
+    python benchmarks/run.py -o before.json                  # save results ...
+    python benchmarks/run.py --compare before.json           # ... and compare a later run against them
+"""
+
+from __future__ import print_function
+
+import argparse
+import functools
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from corpus import PROFILES, profile
+
+from syslog_rfc5424_parser import SyslogMessage
+from syslog_rfc5424_parser.cache import InternCache
+from syslog_rfc5424_parser.constants import SyslogSeverity
+from syslog_rfc5424_parser.filters import MessageFilter
+from syslog_rfc5424_parser.metrics import ParseMetrics
+from syslog_rfc5424_parser.recovery import recover
+from syslog_rfc5424_parser.sampling import RateLimiter, Sampler
+from syslog_rfc5424_parser.timestamps import DATETIME, EPOCH
+from syslog_rfc5424_parser.message import CompactSyslogMessage, LazySyslogMessage
+
+
+PERCENTILES = (50, 90, 99, 99.9)
+
+
+def _setup_text(lines):
+    return lines
+
+
+def _setup_bytes(lines):
+    return [line.encode('utf-8') for line in lines]
+
+
+def _setup_parsed(lines):
+    return [SyslogMessage.parse(line) for line in lines]
+
+
+def _json_dumps(message):
+    return json.dumps(message.as_dict())
+
+
+# name -> (setup(lines) -> inputs, operation(input) -> result)
+BENCHMARKS = {
+    'parse': (_setup_text, SyslogMessage.parse),
+    'parse_bytes': (_setup_bytes, SyslogMessage.parse),
+    'parse_interned': (_setup_text, functools.partial(SyslogMessage.parse, intern=InternCache())),
+    'parse_epoch': (_setup_text, functools.partial(SyslogMessage.parse, timestamp_format=EPOCH)),
+    'parse_datetime': (_setup_text, functools.partial(SyslogMessage.parse, timestamp_format=DATETIME)),
+    'parse_lazy': (_setup_text, LazySyslogMessage.parse),
+    'parse_compact': (_setup_text, CompactSyslogMessage.parse),
+    'parse_compact_interned': (_setup_text, functools.partial(CompactSyslogMessage.parse, intern=InternCache())),
+    'parse_regex': (_setup_text, functools.partial(SyslogMessage.parse, engine='regex')),
+    'parse_lark': (_setup_text, functools.partial(SyslogMessage.parse, engine='lark')),
+    'parse_metrics': (_setup_text, functools.partial(ParseMetrics().parse, SyslogMessage)),
+    'recover': (_setup_text, recover),
+    'parse_filtered': (_setup_text, MessageFilter(severity=lambda severity: severity <= SyslogSeverity.notice).parse),
+    'parse_filtered_appname': (_setup_text, MessageFilter(appname={'app0', 'app1'}).parse),
+    'parse_sampled': (_setup_text, MessageFilter(limiters=[Sampler(0.1, seed=0)]).parse),
+    'parse_rate_limited': (_setup_text, MessageFilter(limiters=[RateLimiter(100, key=('hostname', 'appname'))]).parse),
+    'str': (_setup_parsed, str),
+    'to_bytes': (_setup_parsed, SyslogMessage.to_bytes),
+    'as_dict': (_setup_parsed, SyslogMessage.as_dict),
+    'json_dumps': (_setup_parsed, _json_dumps),
+    'to_json': (_setup_parsed, SyslogMessage.to_json),
+    'to_msgpack': (_setup_parsed, SyslogMessage.to_msgpack),
+}
+
+
+def _size(value):
+    if isinstance(value, (str, bytes)):
+        return len(value)
+    return len(str(value))
+
+
+def measure(inputs, operation, repeat):
+    nbytes = sum(_size(i) for i in inputs)
+    best = None
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        for i in inputs:
+            operation(i)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    timer = time.perf_counter
+    latencies = []
+    append = latencies.append
+    for i in inputs:
+        start = timer()
+        operation(i)
+        append(timer() - start)
+    latencies.sort()
+
+    gc.collect()
+    tracemalloc.start()
+    results = [operation(i) for i in inputs]
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del results
+
+    return {
+        'messages_per_second': len(inputs) / best,
+        'mb_per_second': nbytes / best / 1e6,
+        'latency_us': dict(
+            ('p{0:g}'.format(p), latencies[min(len(latencies) - 1, int(len(latencies) * p / 100))] * 1e6)
+            for p in PERCENTILES
+        ),
+        'peak_memory_bytes': peak,
+        'peak_memory_bytes_per_message': peak / len(inputs),
+    }
+
+
+def metadata():
+    try:
+        revision = subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.DEVNULL
+        ).decode('ascii').strip()
+    except (OSError, subprocess.CalledProcessError):
+        revision = None
+    return {
+        'revision': revision,
+        'python': sys.version.split()[0],
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+    }
+
+
+def _format_row(key, result, baseline=None):
+    def change(path, higher_is_better):
+        if baseline is None:
+            return ''
+        old = baseline
+        new = result
+        for k in path:
+            old = old[k]
+            new = new[k]
+        if not old:
+            return ''
+        delta = (new - old) / old * 100
+        better = delta > 0 if higher_is_better else delta < 0
+        return ' ({0:+.1f}%{1})'.format(delta, '' if abs(delta) < 5 else (' better' if better else ' WORSE'))
+
+    latency = result['latency_us']
+    return '{0:<24} {1:>10,.0f} msg/s{2}  {3:>7.1f} MB/s  p50 {4:.1f}us{5}  p99 {6:.1f}us{7}  {8:,.0f} B/msg{9}'.format(
+        key, result['messages_per_second'], change(('messages_per_second',), True), result['mb_per_second'],
+        latency['p50'], change(('latency_us', 'p50'), False), latency['p99'], change(('latency_us', 'p99'), False),
+        result['peak_memory_bytes_per_message'], change(('peak_memory_bytes_per_message',), False)
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('-n', '--messages', type=int, default=20000, help='Messages per corpus (default: %(default)s)')
+    parser.add_argument('-r', '--repeat', type=int, default=5, help='Timed passes per benchmark (default: %(default)s)')
+    parser.add_argument('-p', '--profile', action='append', choices=sorted(PROFILES),
+                        help='Corpus profile to run (may be repeated; default: all)')
+    parser.add_argument('-b', '--benchmark', action='append', choices=sorted(BENCHMARKS),
+                        help='Benchmark to run (may be repeated; default: all)')
+    parser.add_argument('--seed', type=int, default=0, help='Corpus random seed (default: %(default)s)')
+    parser.add_argument('-o', '--output', help='Write results to this JSON file')
+    parser.add_argument('--compare', help='Compare against results previously written with --output')
+    args = parser.parse_args()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print('comparing against {0} ({1})'.format(args.compare, baseline['metadata']))
+
+    results = {'metadata': metadata(), 'messages': args.messages, 'seed': args.seed, 'results': {}}
+    print(results['metadata'])
+    for profile_name in args.profile or sorted(PROFILES):
+        lines = profile(profile_name, args.messages, seed=args.seed)
+        for benchmark_name in args.benchmark or sorted(BENCHMARKS):
+            setup, operation = BENCHMARKS[benchmark_name]
+            key = '{0}/{1}'.format(profile_name, benchmark_name)
+            result = measure(setup(lines), operation, args.repeat)
+            results['results'][key] = result
+            previous = baseline['results'].get(key) if baseline else None
+            print(_format_row(key, result, previous))
+            sys.stdout.flush()
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -3,35 +3,50 @@
 from __future__ import print_function
 
 import argparse
-import socket
-import os
+import asyncio
 import sys
-import json
 
-from syslog_rfc5424_parser import SyslogMessage, ParseError
+from syslog_rfc5424_parser.server import SyslogServer, json_lines_sink
+
+
+def host_port(value):
+    host, _, port = value.rpartition(':')
+    return host.strip('[]') or '0.0.0.0', int(port)
+
+
+async def serve(args):
+    server = SyslogServer(json_lines_sink(sys.stdout), recv_buffer_size=args.recv_buffer_size)
+    if args.bind_path:
+        await server.start_unix_datagram(args.bind_path, batched=args.batched)
+    for address in args.udp:
+        await server.start_udp(*address, batched=args.batched)
+    for address in args.tcp:
+        await server.start_tcp(*address)
+    await server.serve_forever()
 
 
 def main():
     parser = argparse.ArgumentParser()
-    parser.add_argument('-B', '--bind-path', required=True,
+    parser.add_argument('-B', '--bind-path',
                         help='Path at which to bind a Datagram-mode UNIX domain socket')
+    parser.add_argument('-U', '--udp', type=host_port, action='append', default=[], metavar='HOST:PORT',
+                        help='Address at which to listen for UDP datagrams (may be repeated)')
+    parser.add_argument('-T', '--tcp', type=host_port, action='append', default=[], metavar='HOST:PORT',
+                        help='Address at which to listen for RFC6587-framed TCP connections (may be repeated)')
+    parser.add_argument('--recv-buffer-size', type=int, default=None,
+                        help='Kernel receive buffer size (SO_RCVBUF) for every socket')
+    parser.add_argument('--batched', action='store_true',
+                        help='Drain all available datagrams into one buffer per wakeup, rather than one per callback')
     args = parser.parse_args()
-
-    s = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
-    temp_name = args.bind_path + '.' + str(os.getpid())
-    s.bind(temp_name)
-    os.rename(temp_name, args.bind_path)
-
-    while True:
-        message = s.recv(4096)
-        # Technically, messages are only UTF-8 if they have a BOM; otherwise they're binary. However, I'm not
-        # aware of any Syslog servers that handle that. *shrug*
-        message = message.decode('utf-8')
-        try:
-            message = SyslogMessage.parse(message)
-            print(json.dumps(message.as_dict()))
-        except ParseError as e:
-            print(e, file=sys.stderr)
+    if not (args.bind_path or args.udp or args.tcp):
+        parser.error('at least one of --bind-path, --udp or --tcp is required')
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        loop.run_until_complete(serve(args))
+    except KeyboardInterrupt:
+        pass
 
 
 if __name__ == '__main__':
@@ -0,0 +1,83 @@
+"""Convert files of RFC5424 syslog messages to JSON lines.
+
+    python -m syslog_rfc5424_parser [--framing auto|octet-counting|non-transparent] [FILE ...] > out.jsonl
+"""
+
+from __future__ import print_function
+
+import argparse
+import contextlib
+import io
+import mmap
+import sys
+
+from .export import dump_jsonl
+from .framing import FRAMINGS, AUTO, DEFAULT_MAX_MESSAGE_SIZE
+from .stream import iter_batches, DEFAULT_BLOCK_SIZE
+
+
+@contextlib.contextmanager
+def open_input(path):
+    if path == '-':
+        yield sys.stdin.buffer
+        return
+    with open(path, 'rb') as f:
+        try:
+            m = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError):
+            # empty files (and pipes, etc.) can't be mapped
+            yield f
+            return
+        with contextlib.closing(m):
+            yield m
+
+
+@contextlib.contextmanager
+def open_output(path):
+    if path != '-':
+        with open(path, 'w', encoding='utf-8') as f:
+            yield f
+        return
+    output = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+    try:
+        yield output
+    finally:
+        output.flush()
+        output.detach()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m syslog_rfc5424_parser', description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('files', nargs='*', default=['-'], metavar='FILE',
+                        help='Files to read (default: standard input)')
+    parser.add_argument('-f', '--framing', choices=FRAMINGS, default=AUTO,
+                        help='RFC6587 framing of the input (default: %(default)s, detected per message)')
+    parser.add_argument('-o', '--output', default='-', help='File to write JSON lines to (default: standard output)')
+    parser.add_argument('-b', '--block-size', type=int, default=DEFAULT_BLOCK_SIZE,
+                        help='Bytes to read at a time (default: %(default)s)')
+    parser.add_argument('--max-message-size', type=int, default=DEFAULT_MAX_MESSAGE_SIZE,
+                        help='Longest message accepted (default: %(default)s)')
+    parser.add_argument('-q', '--quiet', action='store_true', help="Don't report unparseable messages")
+    args = parser.parse_args(argv)
+
+    with open_output(args.output) as output:
+        for path in args.files:
+            def framing_error(error, offset, path=path):
+                # skip the bad frame and carry on with the rest of the file
+                if not args.quiet:
+                    print('{0}: byte {1}: {2}'.format(path, offset, error.args[0]), file=sys.stderr)
+
+            with open_input(path) as fileobj:
+                for result in iter_batches(fileobj, framing=args.framing, block_size=args.block_size,
+                                           max_message_size=args.max_message_size, on_framing_error=framing_error):
+                    dump_jsonl(result.messages, output)
+                    if not args.quiet:
+                        for error in result.errors:
+                            print('{0}: message {1}: {2}'.format(path, error.index, error.description),
+                                  file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,63 @@
+import collections
+
+
+CacheInfo = collections.namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+
+
+class InternCache(object):
+    """A bounded cache for sharing equal strings between parsed messages.
+
+    HOSTNAME, APP-NAME, MSGID, SD-IDs and PARAM-NAMEs usually come from a small set of values, so a long-lived
+    collector can keep one instance of each rather than a fresh copy per message. Pass an InternCache as the intern
+    argument of SyslogMessage.parse, parse_many, etc. (which also accept a plain dict, for unbounded interning);
+    beyond maxsize entries, the least recently used are evicted. Strings are looked up after the scanner has
+    created them, so this only reduces the memory held by messages which are kept, at some cost to parsing speed.
+
+    Hits and misses are counted (see cache_info() and hit_rate) so that maxsize can be tuned. The cache may be
+    shared between threads; concurrent use can at worst miscount or evict an entry early."""
+
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = collections.OrderedDict()
+
+    def setdefault(self, key, default):
+        """Return the cached string equal to key, caching (and returning) default if there is none"""
+        data = self._data
+        try:
+            value = data[key]
+        except KeyError:
+            self.misses += 1
+            data[key] = default
+            if len(data) > self.maxsize:
+                data.popitem(last=False)
+            return default
+        self.hits += 1
+        try:
+            data.move_to_end(key)
+        except KeyError:  # pragma: no cover
+            # evicted by another thread in the meantime
+            pass
+        return value
+
+    @property
+    def hit_rate(self):
+        """The fraction of lookups which found a cached string (0.0 before any lookups)"""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def cache_info(self):
+        """Return a CacheInfo(hits, misses, maxsize, currsize), as with functools.lru_cache"""
+        return CacheInfo(self.hits, self.misses, self.maxsize, len(self._data))
+
+    def clear(self):
+        """Empty the cache and reset its counters"""
+        self._data.clear()
+        self.hits = self.misses = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def __repr__(self):
+        return '{0}(maxsize={1!r})'.format(self.__class__.__name__, self.maxsize)
@@ -0,0 +1,365 @@
+import itertools
+from array import array
+
+from . import parser
+from .constants import SyslogFacility, SyslogSeverity
+from .message import UTF8_BOM
+from .timestamps import get_parser, EPOCH_NS
+
+
+# Parse batches straight into column buffers, without constructing a SyslogMessage (or any other object) per
+# message. Integer columns are array.array, which numpy.frombuffer and pyarrow wrap without copying; strings from a
+# small set of values are dictionary-encoded, and free text is stored as Arrow-style offset and data buffers.
+
+NULL_TIMESTAMP = -(1 << 63)
+_MAX_PROCID = (1 << 63) - 1
+
+_COLUMNS = ('facility', 'severity', 'version', 'timestamp', 'hostname', 'appname', 'procid', 'procid_text', 'msgid',
+            'msg')
+
+
+class DictionaryColumn(object):
+    """Dictionary-encoded strings: codes (an array of int32) indexes into values (a list of distinct strings), and
+    a code of -1 means null."""
+
+    __slots__ = ['codes', 'values']
+
+    def __init__(self, codes, values):
+        self.codes = codes
+        self.values = values
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __getitem__(self, index):
+        code = self.codes[index]
+        return None if code < 0 else self.values[code]
+
+    def to_list(self):
+        values = self.values
+        return [None if code < 0 else values[code] for code in self.codes]
+
+    def to_pandas(self):
+        """Return a pandas.Categorical sharing the codes buffer"""
+        import numpy
+        import pandas
+        return pandas.Categorical.from_codes(numpy.frombuffer(self.codes, dtype=numpy.int32), self.values)
+
+    def to_arrow(self):
+        """Return a pyarrow.DictionaryArray"""
+        import numpy
+        import pyarrow
+        codes = numpy.frombuffer(self.codes, dtype=numpy.int32)
+        return pyarrow.DictionaryArray.from_arrays(
+            pyarrow.array(codes, mask=codes < 0), pyarrow.array(self.values, type=pyarrow.string())
+        )
+
+
+class StringColumn(object):
+    """Variable-length strings in one UTF-8 buffer, laid out as an Arrow large_string: value i is
+    data[offsets[i]:offsets[i + 1]], and is null if valid is given and valid[i] is 0."""
+
+    __slots__ = ['offsets', 'data', 'valid']
+
+    def __init__(self, offsets, data, valid=None):
+        self.offsets = offsets
+        self.data = data
+        self.valid = valid
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        if self.valid is not None and not self.valid[index]:
+            return None
+        return self.data[self.offsets[index]:self.offsets[index + 1]].decode('utf-8')
+
+    def to_list(self):
+        return [self[i] for i in range(len(self))]
+
+    def to_arrow(self):
+        """Return a pyarrow large_string array sharing the offset and data buffers"""
+        import numpy
+        import pyarrow
+        validity = None
+        if self.valid is not None:
+            validity = pyarrow.py_buffer(numpy.packbits(numpy.frombuffer(self.valid, dtype=numpy.uint8),
+                                                        bitorder='little'))
+        return pyarrow.Array.from_buffers(
+            pyarrow.large_string(), len(self),
+            [validity, pyarrow.py_buffer(self.offsets), pyarrow.py_buffer(self.data)]
+        )
+
+
+class _DictionaryBuilder(object):
+    # codes are appended directly by parse_columns: index.setdefault(value, len(index)) assigns each new value the
+    # next code, and the values are then the keys of index, in order
+    def __init__(self):
+        self.codes = array('i')
+        self.index = {}
+
+    def build(self):
+        return DictionaryColumn(self.codes, list(self.index))
+
+
+class _StringBuilder(object):
+    def __init__(self):
+        # UTF-8 bytes for every value, with b'' for a null (whose position is also recorded in nulls)
+        self.chunks = []
+        self.nulls = []
+
+    def build(self):
+        offsets = array('q', [0])
+        offsets.extend(itertools.accumulate(map(len, self.chunks)))
+        valid = None
+        if self.nulls:
+            valid = array('B', [1]) * len(self.chunks)
+            for i in self.nulls:
+                valid[i] = 0
+        return StringColumn(offsets, b''.join(self.chunks), valid)
+
+
+def _encode_msg(message):
+    if message is None:
+        return None
+    if isinstance(message, str):
+        return message.encode('utf-8', 'replace')
+    if message.startswith(UTF8_BOM):
+        message = message[len(UTF8_BOM):]
+    try:
+        message.decode('utf-8')
+    except UnicodeDecodeError:
+        # MSG-ANY; columns hold valid UTF-8 only
+        message = message.decode('utf-8', 'replace').encode('utf-8')
+    return message
+
+
+class ColumnarBatch(object):
+    """A batch of parsed messages stored by column.
+
+    Per message i:
+
+    - facility (int8; -1 if unknown), severity (uint8) and version (uint16) are arrays of integers
+    - timestamp is an array of int64 nanoseconds since the epoch, holding NULL_TIMESTAMP (which numpy and pandas
+      read as NaT) for NILVALUE
+    - hostname, appname and msgid are DictionaryColumns, null for NILVALUE
+    - procid is an array of int64, holding -1 for a NILVALUE or non-numeric PROCID; non-numeric PROCIDs (and any
+      too large for an int64) are in the procid_text DictionaryColumn, which is null for every other message
+    - msg is a StringColumn, with MSG-ANY octets which aren't valid UTF-8 replaced by U+FFFD
+
+    STRUCTURED-DATA is flattened into one row per SD-PARAM: the rows of message i are sd_offsets[i] up to
+    sd_offsets[i + 1] in the sd_id and sd_name DictionaryColumns and the sd_value StringColumn. An SD-ELEMENT without
+    parameters is a single row with a null sd_name and sd_value.
+
+    errors is a list of parser.BatchError for the lines which could not be parsed, as from parse_batch."""
+
+    def __init__(self, facility, severity, version, timestamp, hostname, appname, procid, procid_text, msgid, msg,
+                 sd_offsets, sd_id, sd_name, sd_value, errors):
+        self.facility = facility
+        self.severity = severity
+        self.version = version
+        self.timestamp = timestamp
+        self.hostname = hostname
+        self.appname = appname
+        self.procid = procid
+        self.procid_text = procid_text
+        self.msgid = msgid
+        self.msg = msg
+        self.sd_offsets = sd_offsets
+        self.sd_id = sd_id
+        self.sd_name = sd_name
+        self.sd_value = sd_value
+        self.errors = errors
+
+    def __len__(self):
+        return len(self.facility)
+
+    def row(self, index):
+        """Return message index as a dict, laid out like SyslogMessage.as_dict() but with the timestamp in
+        nanoseconds since the epoch"""
+        sd = {}
+        for i in range(self.sd_offsets[index], self.sd_offsets[index + 1]):
+            params = sd.setdefault(self.sd_id[i], {})
+            name = self.sd_name[i]
+            if name is not None:
+                params[name] = self.sd_value[i]
+        timestamp = self.timestamp[index]
+        procid = self.procid[index]
+        if procid < 0:
+            procid = self.procid_text[index]
+            if procid is not None and procid.isdigit():
+                procid = int(procid)
+        return {
+            'facility': SyslogFacility(self.facility[index]).name,
+            'severity': SyslogSeverity(self.severity[index]).name,
+            'version': self.version[index],
+            'timestamp': None if timestamp == NULL_TIMESTAMP else timestamp,
+            'hostname': self.hostname[index] or '-',
+            'appname': self.appname[index] or '-',
+            'procid': procid,
+            'msgid': self.msgid[index],
+            'sd': sd,
+            'msg': self.msg[index],
+        }
+
+    def to_numpy(self):
+        """Return a dict of the integer columns (and the codes of dictionary-encoded columns) as numpy arrays, without
+        copying"""
+        import numpy
+        return {
+            'facility': numpy.frombuffer(self.facility, dtype=numpy.int8),
+            'severity': numpy.frombuffer(self.severity, dtype=numpy.uint8),
+            'version': numpy.frombuffer(self.version, dtype=numpy.uint16),
+            'timestamp': numpy.frombuffer(self.timestamp, dtype=numpy.int64).view('datetime64[ns]'),
+            'hostname': numpy.frombuffer(self.hostname.codes, dtype=numpy.int32),
+            'appname': numpy.frombuffer(self.appname.codes, dtype=numpy.int32),
+            'procid': numpy.frombuffer(self.procid, dtype=numpy.int64),
+            'procid_text': numpy.frombuffer(self.procid_text.codes, dtype=numpy.int32),
+            'msgid': numpy.frombuffer(self.msgid.codes, dtype=numpy.int32),
+            'sd_offsets': numpy.frombuffer(self.sd_offsets, dtype=numpy.int64),
+        }
+
+    def to_pandas(self):
+        """Return a pandas.DataFrame of the message columns (see sd_to_pandas for the structured data), with
+        dictionary-encoded columns as Categoricals and timestamps in UTC"""
+        import pandas
+        arrays = self.to_numpy()
+        return pandas.DataFrame({
+            'facility': arrays['facility'],
+            'severity': arrays['severity'],
+            'version': arrays['version'],
+            'timestamp': pandas.to_datetime(arrays['timestamp'], utc=True),
+            'hostname': self.hostname.to_pandas(),
+            'appname': self.appname.to_pandas(),
+            'procid': arrays['procid'],
+            'procid_text': self.procid_text.to_pandas(),
+            'msgid': self.msgid.to_pandas(),
+            'msg': self.msg.to_list(),
+        }, columns=_COLUMNS)
+
+    def sd_to_pandas(self):
+        """Return a pandas.DataFrame with a row per SD-PARAM: the index of its message, and its sd_id, sd_name and
+        sd_value"""
+        import numpy
+        import pandas
+        offsets = numpy.frombuffer(self.sd_offsets, dtype=numpy.int64)
+        return pandas.DataFrame({
+            'message': numpy.repeat(numpy.arange(len(self)), numpy.diff(offsets)),
+            'sd_id': self.sd_id.to_pandas(),
+            'sd_name': self.sd_name.to_pandas(),
+            'sd_value': self.sd_value.to_list(),
+        }, columns=['message', 'sd_id', 'sd_name', 'sd_value'])
+
+    def to_arrow(self):
+        """Return a pyarrow.Table, with dictionary-encoded columns as DictionaryArrays and the structured data as a
+        list<struct<id, name, value>> column named sd"""
+        import pyarrow
+        arrays = self.to_numpy()
+        timestamp = arrays['timestamp'].view('int64')
+        sd = pyarrow.LargeListArray.from_arrays(
+            pyarrow.array(arrays['sd_offsets']),
+            pyarrow.StructArray.from_arrays(
+                [self.sd_id.to_arrow(), self.sd_name.to_arrow(), self.sd_value.to_arrow()],
+                names=['id', 'name', 'value']
+            )
+        )
+        return pyarrow.table({
+            'facility': arrays['facility'],
+            'severity': arrays['severity'],
+            'version': arrays['version'],
+            'timestamp': pyarrow.array(timestamp, type=pyarrow.timestamp('ns', tz='UTC'),
+                                       mask=timestamp == NULL_TIMESTAMP),
+            'hostname': self.hostname.to_arrow(),
+            'appname': self.appname.to_arrow(),
+            'procid': arrays['procid'],
+            'procid_text': self.procid_text.to_arrow(),
+            'msgid': self.msgid.to_arrow(),
+            'sd': sd,
+            'msg': self.msg.to_arrow(),
+        })
+
+
+def parse_columns(lines):
+    """Parse many messages (str, or bytes-like; see parser.parse_batch) into a ColumnarBatch.
+
+    Lines which can't be parsed, or whose timestamp isn't a real date and time, are reported in the errors of the
+    batch rather than raising."""
+    convert_timestamp = get_parser(EPOCH_NS)
+    facility = array('b')
+    severity = array('B')
+    version = array('H')
+    timestamp = array('q')
+    procid = array('q')
+    sd_offsets = array('q', [0])
+    hostname = _DictionaryBuilder()
+    appname = _DictionaryBuilder()
+    procid_text = _DictionaryBuilder()
+    msgid = _DictionaryBuilder()
+    sd_id = _DictionaryBuilder()
+    sd_name = _DictionaryBuilder()
+    msg = _StringBuilder()
+    sd_value = _StringBuilder()
+    errors = []
+    # the loop below runs for every message and SD-PARAM, so look everything up once
+    hostname_append, hostname_index = hostname.codes.append, hostname.index
+    appname_append, appname_index = appname.codes.append, appname.index
+    msgid_append, msgid_index = msgid.codes.append, msgid.index
+    sd_id_append, sd_id_index = sd_id.codes.append, sd_id.index
+    sd_name_append, sd_name_index = sd_name.codes.append, sd_name.index
+    sd_value_append = sd_value.chunks.append
+    sd_rows = 0
+    for index, (groups, error) in enumerate(parser.iter_batch(lines)):
+        if error is not None:
+            errors.append(error)
+            continue
+        header = groups.header
+        try:
+            ns = convert_timestamp(header.timestamp)
+        except ValueError:
+            errors.append(parser.BatchError(index, 'Invalid timestamp'))
+            continue
+        timestamp.append(NULL_TIMESTAMP if ns is None else ns)
+        pri = header.pri
+        facility.append(pri >> 3 if pri < 192 else -1)
+        severity.append(pri & 7)
+        version.append(header.version)
+        value = header.hostname
+        hostname_append(-1 if value == '-' else hostname_index.setdefault(value, len(hostname_index)))
+        value = header.appname
+        appname_append(-1 if value == '-' else appname_index.setdefault(value, len(appname_index)))
+        value = header.msgid
+        msgid_append(-1 if value == '-' else msgid_index.setdefault(value, len(msgid_index)))
+        value = header.procid
+        if value.__class__ is int and value <= _MAX_PROCID:
+            procid.append(value)
+            procid_text.codes.append(-1)
+        else:
+            # NILVALUE, non-numeric, or too large for the procid column
+            procid.append(-1)
+            procid_text.codes.append(
+                -1 if value == '-' else procid_text.index.setdefault(str(value), len(procid_text.index))
+            )
+        for element in groups.structured_data:
+            code = sd_id_index.setdefault(element.sd_id, len(sd_id_index))
+            if element.sd_params:
+                for name, value in element.sd_params:
+                    sd_id_append(code)
+                    sd_name_append(sd_name_index.setdefault(name, len(sd_name_index)))
+                    sd_value_append(value.encode('utf-8', 'replace'))
+                sd_rows += len(element.sd_params)
+            else:
+                sd_id_append(code)
+                sd_name_append(-1)
+                sd_value.nulls.append(len(sd_value.chunks))
+                sd_value_append(b'')
+                sd_rows += 1
+        sd_offsets.append(sd_rows)
+        value = _encode_msg(groups.message)
+        if value is None:
+            msg.nulls.append(len(msg.chunks))
+            value = b''
+        msg.chunks.append(value)
+    return ColumnarBatch(
+        facility, severity, version, timestamp, hostname.build(), appname.build(), procid, procid_text.build(),
+        msgid.build(), msg.build(), sd_offsets, sd_id.build(), sd_name.build(), sd_value.build(), errors
+    )
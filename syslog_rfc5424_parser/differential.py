@@ -0,0 +1,123 @@
+"""Feed the same inputs to two parse engines and report where they disagree, and how long each took.
+
+    python -m syslog_rfc5424_parser.differential --inputs 20000 --first regex --second lark
+"""
+
+from __future__ import print_function
+
+import argparse
+import collections
+import random
+import sys
+import time
+
+from . import parser
+
+
+# characters which are significant somewhere in the grammar, plus a few which never are
+_ALPHABET = ' -<>[]="\\:.TZ+0123456789az\xe9\t\n'
+
+SEEDS = [
+    '<1>1 - - - - - -',
+    '<78>1 2016-01-15T00:04:01+00:00 host1 CROND 10391 - [meta sequenceId="29"] some_message',
+    '<29>1 2016-01-15T01:00:43Z some-host-name SEKRETPROGRAM prg - [origin x-service="svc"][meta a="1" b="2"] ',
+    '<134>1 2003-10-11T22:14:15.003-07:00 mymachine.example.com evntslog - ID47 [exampleSDID@32473 iut="3" '
+    'eventSource="Application" eventID="1011"][examplePriority@32473 class="high"] \ufeffAn application event',
+    '<1>1 - - - - - [a b="x\\]y \\q \\\\"] msg',
+]
+
+Report = collections.namedtuple('Report', ['inputs', 'agreed', 'different', 'only_first', 'only_second', 'timings'])
+
+
+def mutate(line, rng, edits=1):
+    """Return line with edits random single-character replacements, insertions, deletions, or truncations"""
+    for _ in range(edits):
+        position = rng.randrange(len(line) + 1)
+        action = rng.randrange(4)
+        if action == 0 and position < len(line):
+            line = line[:position] + rng.choice(_ALPHABET) + line[position + 1:]
+        elif action == 1:
+            line = line[:position] + rng.choice(_ALPHABET) + line[position:]
+        elif action == 2:
+            line = line[:position] + line[position + 1:]
+        else:
+            line = line[:position]
+    return line
+
+
+def fuzz(seeds, count, seed=0, max_edits=3):
+    """Return the seeds followed by mutations of them, count lines in all, reproducibly for a given seed"""
+    rng = random.Random(seed)
+    lines = list(seeds)
+    while len(lines) < count:
+        lines.append(mutate(rng.choice(seeds), rng, rng.randint(1, max_edits)))
+    return lines[:count]
+
+
+def _run(engine, inputs):
+    parse = engine.parse
+    errors = engine.errors
+    results = []
+    append = results.append
+    start = time.perf_counter()
+    for line in inputs:
+        try:
+            append(parse(line))
+        except errors:
+            append(None)
+    return results, time.perf_counter() - start
+
+
+def compare(inputs, first='regex', second='lark'):
+    """Parse every input (a str) with both engines, returning a Report.
+
+    different lists (input, first result, second result) for the inputs which both engines accepted but parsed
+    differently; only_first and only_second list the inputs which only that engine accepted; and timings maps
+    each engine's name to the seconds it spent on all of the inputs."""
+    inputs = list(inputs)
+    first, second = parser.get_engine(first), parser.get_engine(second)
+    first_results, first_time = _run(first, inputs)
+    second_results, second_time = _run(second, inputs)
+    agreed = 0
+    different = []
+    only_first = []
+    only_second = []
+    for line, first_result, second_result in zip(inputs, first_results, second_results):
+        if first_result == second_result:
+            agreed += 1
+        elif second_result is None:
+            only_first.append(line)
+        elif first_result is None:
+            only_second.append(line)
+        else:
+            different.append((line, first_result, second_result))
+    return Report(len(inputs), agreed, different, only_first, only_second,
+                  {first.name: first_time, second.name: second_time})
+
+
+def main(argv=None):
+    argument_parser = argparse.ArgumentParser(description=__doc__,
+                                              formatter_class=argparse.RawDescriptionHelpFormatter)
+    argument_parser.add_argument('-n', '--inputs', type=int, default=10000)
+    argument_parser.add_argument('-s', '--seed', type=int, default=0)
+    argument_parser.add_argument('--first', default='regex')
+    argument_parser.add_argument('--second', default='lark')
+    args = argument_parser.parse_args(argv)
+
+    report = compare(fuzz(SEEDS, args.inputs, args.seed), args.first, args.second)
+    print('{0} inputs, {1} agreed, {2} parsed differently, {3} accepted only by {4}, {5} accepted only by {6}'.format(
+        report.inputs, report.agreed, len(report.different), len(report.only_first), args.first,
+        len(report.only_second), args.second))
+    for name, elapsed in sorted(report.timings.items()):
+        print('{0:<8} {1:>10,.0f} inputs/s'.format(name, report.inputs / elapsed))
+    print('{0} is {1:.1f}x as fast as {2}'.format(
+        args.first, report.timings[args.second] / report.timings[args.first], args.second))
+    for line, first_result, second_result in report.different[:10]:
+        print('\n{0!r}\n  {1}: {2}\n  {3}: {4}'.format(line, args.first, first_result, args.second, second_result))
+    for line in report.only_first[:10]:
+        print('accepted only by {0}: {1!r}'.format(args.first, line))
+    return 1 if report.different or report.only_first else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,365 @@
+import datetime
+import io
+import json
+import struct
+from json.encoder import encode_basestring_ascii as _quote
+
+from .constants import SyslogFacility, SyslogSeverity
+from .serializer import format_timestamp
+
+
+# Encode messages as JSON objects or MessagePack maps with the same keys and values as as_dict(), without building
+# the dict first (unless orjson or msgpack is installed, which are faster still at encoding one). Each message's
+# first three members only depend on its severity and facility, so they are precomputed for every combination.
+
+# orjson and msgpack are only imported on first use, so as not to slow down importing the package; until then,
+# these are _NOT_IMPORTED, and afterwards the module, or None if it isn't installed
+_NOT_IMPORTED = object()
+orjson = _NOT_IMPORTED
+msgpack = _NOT_IMPORTED
+
+
+def _get_orjson():
+    global orjson
+    if orjson is _NOT_IMPORTED:
+        try:
+            import orjson as module
+        except ImportError:  # pragma: no cover
+            module = None
+        orjson = module
+    return orjson
+
+
+def _get_msgpack():
+    global msgpack
+    if msgpack is _NOT_IMPORTED:
+        try:
+            import msgpack as module
+        except ImportError:  # pragma: no cover
+            module = None
+        msgpack = module
+    return msgpack
+
+
+FIELDS = ('severity', 'facility', 'version', 'timestamp', 'hostname', 'appname', 'procid', 'msgid', 'sd', 'msg')
+
+
+def _names(enum):
+    # indexed by member value; SyslogFacility.unknown (-1) is the last entry
+    names = [None] * (max(enum) + 1 + (min(enum) < 0))
+    for member in enum:
+        names[member] = member.name
+    return names
+
+
+_SEVERITY_NAMES = _names(SyslogSeverity)
+_FACILITY_NAMES = _names(SyslogFacility)
+
+# JSON
+
+_JSON_HEADS = [
+    ['{{"severity":{0},"facility":{1},"version":'.format(_quote(severity), _quote(facility))
+     for facility in _FACILITY_NAMES]
+    for severity in _SEVERITY_NAMES
+]
+
+
+def _json_value(value):
+    cls = value.__class__
+    if cls is int:
+        return str(value)
+    if value is None:
+        return 'null'
+    if isinstance(value, str):
+        return _quote(value)
+    if cls is float and value - value == 0:
+        return repr(value)
+    if isinstance(value, datetime.datetime):
+        return _quote(format_timestamp(value))
+    return json.dumps(value)
+
+
+# '"name":' for SD-IDs and PARAM-NAMEs, which come from a small set of values
+_json_names = {}
+
+
+def _json_name(name):
+    quoted = _json_names.get(name)
+    if quoted is None:
+        if len(_json_names) >= 4096:
+            _json_names.clear()
+        quoted = _json_names[name] = _quote(name) + ':'
+    return quoted
+
+
+def _json_sd(sd):
+    if not sd:
+        return '{}'
+    names = _json_names
+    return '{' + ','.join([
+        (names.get(sd_id) or _json_name(sd_id)) + '{' + ','.join([
+            (names.get(name) or _json_name(name)) + (_quote(value) if value.__class__ is str else _json_value(value))
+            for name, value in sd_params.items()
+        ]) + '}'
+        for sd_id, sd_params in sd.items()
+    ]) + '}'
+
+
+def _to_json(message):
+    hostname = message.hostname
+    appname = message.appname
+    msg = message.msg
+    return ''.join([
+        _JSON_HEADS[message.severity][message.facility],
+        _json_value(message.version),
+        ',"timestamp":',
+        _json_value(message.timestamp),
+        ',"hostname":',
+        _quote(hostname) if hostname.__class__ is str else _json_value(hostname),
+        ',"appname":',
+        _quote(appname) if appname.__class__ is str else _json_value(appname),
+        ',"procid":',
+        _json_value(message.procid),
+        ',"msgid":',
+        _json_value(message.msgid),
+        ',"sd":',
+        _json_sd(message.sd),
+        ',"msg":',
+        _quote(msg) if msg.__class__ is str else _json_value(msg),
+        '}',
+    ])
+
+
+def _plain_dict(message):
+    sd = message.sd
+    timestamp = message.timestamp
+    return {
+        'severity': _SEVERITY_NAMES[message.severity],
+        'facility': _FACILITY_NAMES[message.facility],
+        'version': message.version,
+        'timestamp': format_timestamp(timestamp) if isinstance(timestamp, datetime.datetime) else timestamp,
+        'hostname': message.hostname,
+        'appname': message.appname,
+        'procid': message.procid,
+        'msgid': message.msgid,
+        'sd': sd if sd.__class__ is dict else dict((sd_id, dict(sd_params)) for sd_id, sd_params in sd.items()),
+        'msg': message.msg,
+    }
+
+
+def to_json(message):
+    """Return message as a JSON object (a str) with the same contents as json.dumps(message.as_dict()), except
+    that datetime timestamps (which json.dumps can't encode) are written as RFC5424 timestamp strings.
+
+    orjson is used if it is installed, except for messages it can't encode (such as an undecodable MSG from
+    a BytesSyslogMessage, or a PROCID too large for a 64-bit integer), which fall back to the built-in encoder."""
+    orjson = _get_orjson()
+    if orjson is not None:
+        try:
+            return orjson.dumps(_plain_dict(message)).decode('utf-8')
+        except orjson.JSONEncodeError:
+            pass
+    return _to_json(message)
+
+
+def dump_jsonl(messages, fileobj):
+    """Write messages to fileobj as JSON lines (see to_json), returning the number written.
+
+    fileobj may be opened in text or binary mode; everything is written with a single call to its write()."""
+    binary = not isinstance(fileobj, io.TextIOBase)
+    orjson = _get_orjson()
+    if orjson is not None:
+        dumps = orjson.dumps
+        encode_error = orjson.JSONEncodeError
+        option = orjson.OPT_APPEND_NEWLINE
+        lines = []
+        append = lines.append
+        for message in messages:
+            try:
+                append(dumps(_plain_dict(message), option=option))
+            except encode_error:
+                append(_to_json(message).encode('utf-8') + b'\n')
+        data = b''.join(lines)
+        fileobj.write(data if binary else data.decode('utf-8'))
+        return len(lines)
+    lines = [_to_json(message) + '\n' for message in messages]
+    data = ''.join(lines)
+    fileobj.write(data.encode('utf-8') if binary else data)
+    return len(lines)
+
+
+# MessagePack
+
+_U8 = struct.Struct('>BB')
+_U16 = struct.Struct('>BH')
+_U32 = struct.Struct('>BI')
+_U64 = struct.Struct('>BQ')
+_I8 = struct.Struct('>Bb')
+_I16 = struct.Struct('>Bh')
+_I32 = struct.Struct('>Bi')
+_I64 = struct.Struct('>Bq')
+_DOUBLE = struct.Struct('>Bd')
+
+
+def _pack_raw(data, fixed, types, out):
+    # fixed: the fixstr type byte (or None, for bin); types: the 8-, 16- and 32-bit length type bytes
+    n = len(data)
+    if fixed is not None and n < 32:
+        out.append(fixed | n)
+    elif n < 0x100:
+        out += _U8.pack(types[0], n)
+    elif n < 0x10000:
+        out += _U16.pack(types[1], n)
+    else:
+        out += _U32.pack(types[2], n)
+    out += data
+
+
+def _pack_str(value, out):
+    try:
+        data = value.encode('utf-8')
+    except UnicodeEncodeError:
+        # a MSG-ANY which wasn't UTF-8 (see decode_msg) goes out as its original octets
+        _pack_raw(value.encode('utf-8', 'surrogateescape'), None, (0xc4, 0xc5, 0xc6), out)
+        return
+    if len(data) < 32:
+        out.append(0xa0 | len(data))
+        out += data
+    else:
+        _pack_raw(data, 0xa0, (0xd9, 0xda, 0xdb), out)
+
+
+# packed SD-IDs and PARAM-NAMEs, which come from a small set of values
+_packed_names = {}
+
+
+def _packed_name(name):
+    packed = _packed_names.get(name)
+    if packed is None:
+        if len(_packed_names) >= 4096:
+            _packed_names.clear()
+        packed = _packed_names[name] = _packed(name)
+    return packed
+
+
+def _pack_sd(sd, out):
+    _pack_map_header(len(sd), out)
+    for sd_id, sd_params in sd.items():
+        out += _packed_names.get(sd_id) or _packed_name(sd_id)
+        _pack_map_header(len(sd_params), out)
+        for name, value in sd_params.items():
+            out += _packed_names.get(name) or _packed_name(name)
+            _pack(value, out)
+
+
+def _pack_int(value, out):
+    if 0 <= value < 0x80:
+        out.append(value)
+    elif -32 <= value < 0:
+        out.append(value & 0xff)
+    elif 0 <= value < 0x100:
+        out += _U8.pack(0xcc, value)
+    elif 0 <= value < 0x10000:
+        out += _U16.pack(0xcd, value)
+    elif 0 <= value < 0x100000000:
+        out += _U32.pack(0xce, value)
+    elif 0 <= value < 0x10000000000000000:
+        out += _U64.pack(0xcf, value)
+    elif -0x80 <= value < 0:
+        out += _I8.pack(0xd0, value)
+    elif -0x8000 <= value < 0:
+        out += _I16.pack(0xd1, value)
+    elif -0x80000000 <= value < 0:
+        out += _I32.pack(0xd2, value)
+    elif -0x8000000000000000 <= value < 0:
+        out += _I64.pack(0xd3, value)
+    else:
+        # out of MessagePack's range (a long all-digit PROCID, say)
+        _pack_str(str(value), out)
+
+
+def _pack_map_header(n, out):
+    if n < 16:
+        out.append(0x80 | n)
+    elif n < 0x10000:
+        out += _U16.pack(0xde, n)
+    else:
+        out += _U32.pack(0xdf, n)
+
+
+def _pack(value, out):
+    if value.__class__ is str:
+        _pack_str(value, out)
+    elif value is None:
+        out.append(0xc0)
+    elif value is True or value is False:
+        out.append(0xc3 if value else 0xc2)
+    elif isinstance(value, int):
+        _pack_int(value, out)
+    elif isinstance(value, float):
+        out += _DOUBLE.pack(0xcb, value)
+    elif isinstance(value, (bytes, bytearray, memoryview)):
+        _pack_raw(bytes(value), None, (0xc4, 0xc5, 0xc6), out)
+    elif isinstance(value, datetime.datetime):
+        _pack_str(format_timestamp(value), out)
+    elif isinstance(value, str):
+        _pack_str(value, out)
+    else:
+        _pack_map_header(len(value), out)
+        for k, v in value.items():
+            _pack(k, out)
+            _pack(v, out)
+
+
+def _packed(value):
+    out = bytearray()
+    _pack(value, out)
+    return bytes(out)
+
+
+_MSGPACK_KEYS = dict((field, _packed(field)) for field in FIELDS)
+_MSGPACK_HEADS = [
+    [bytes(bytearray([0x80 | len(FIELDS)])) + _MSGPACK_KEYS['severity'] + _packed(severity) +
+     _MSGPACK_KEYS['facility'] + _packed(facility) + _MSGPACK_KEYS['version']
+     for facility in _FACILITY_NAMES]
+    for severity in _SEVERITY_NAMES
+]
+
+
+def to_msgpack(message, out=None):
+    """Return message as a MessagePack map (bytes) with the same contents as as_dict().
+
+    Strings which can't be encoded as UTF-8 (an undecodable MSG from a BytesSyslogMessage) are written as bin
+    holding their original octets, and integers outside the 64-bit range as strings. If out (a bytearray) is
+    given, the map is appended to it instead, and out is returned. The msgpack package is used if it is
+    installed, except for such messages."""
+    msgpack = _get_msgpack()
+    if msgpack is not None:
+        try:
+            packed = msgpack.packb(_plain_dict(message), use_bin_type=True)
+        except (UnicodeEncodeError, OverflowError):
+            pass
+        else:
+            if out is None:
+                return packed
+            out += packed
+            return out
+    buf = bytearray() if out is None else out
+    buf += _MSGPACK_HEADS[message.severity][message.facility]
+    _pack(message.version, buf)
+    keys = _MSGPACK_KEYS
+    buf += keys['timestamp']
+    _pack(message.timestamp, buf)
+    buf += keys['hostname']
+    _pack(message.hostname, buf)
+    buf += keys['appname']
+    _pack(message.appname, buf)
+    buf += keys['procid']
+    _pack(message.procid, buf)
+    buf += keys['msgid']
+    _pack(message.msgid, buf)
+    buf += keys['sd']
+    _pack_sd(message.sd, buf)
+    buf += keys['msg']
+    _pack(message.msg, buf)
+    return bytes(buf) if out is None else out
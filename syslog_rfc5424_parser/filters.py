@@ -0,0 +1,178 @@
+from . import parser
+from . import scanner
+from . import timestamps
+from .message import _PRIORITIES, LazySyslogMessage, ParseError, SyslogMessage
+
+
+# Predicates on severity and facility are checked as soon as the <PRI> has been read, and those on hostname,
+# appname and msgid as soon as the HEADER has been scanned, so that rejected messages never have their
+# STRUCTURED-DATA or MSG parsed, nor a SyslogMessage constructed. Rate limiters and samplers (see sampling) are
+# consulted at the same point, after the predicates.
+
+PRI_FIELDS = ('severity', 'facility')
+HEADER_FIELDS = ('hostname', 'appname', 'msgid')
+
+
+def _predicate(accept):
+    if callable(accept):
+        return accept
+    # a collection of accepted values
+    return frozenset(accept).__contains__
+
+
+def _scan_pri(message):
+    """Return the PRI of a message (a str or bytes-like object) as an int, or None if it doesn't start with one"""
+    head = message[:5]
+    if not isinstance(head, str):
+        head = bytes(head).decode('latin-1')
+    if head[:1] != '<':
+        return None
+    end = head.find('>', 1)
+    pri = head[1:end]
+    if end < 0 or not scanner._is_number(pri):
+        return None
+    return int(pri)
+
+
+class MessageFilter(object):
+    """Parse only the messages whose header fields are accepted, skipping the rest of the work for the others.
+
+    Each of severity, facility, hostname, appname and msgid may be a callable, which is passed the value the
+    parsed message would have (a SyslogSeverity or SyslogFacility; hostname and appname as strings, which are '-'
+    if nil; msgid as a string, or None) and returns whether to keep it, or a collection of the values to keep.
+    A message is kept if every predicate accepts it.
+
+    limiters is a sequence of sampling.RateLimiter and sampling.Sampler objects, which are consulted in order
+    for each message which the predicates accept, once its HEADER has been scanned; a message is kept if they all
+    allow it. Tokens are only taken from rate limiters' buckets for messages which every limiter allows, and a
+    message refused by one limiter isn't offered to those after it.
+
+    rejected maps each of those field names (and 'limiters', if there are any) to the number of messages its
+    predicate rejected (a message counts against the first to reject it, in the order above), and accepted counts
+    the messages kept. Rejected messages are not checked any further, so a malformed message may be rejected
+    rather than raise ParseError."""
+
+    def __init__(self, severity=None, facility=None, hostname=None, appname=None, msgid=None,
+                 message_class=SyslogMessage, limiters=()):
+        predicates = {'severity': severity, 'facility': facility, 'hostname': hostname, 'appname': appname,
+                      'msgid': msgid}
+        # (field name, index into the values checked at that stage, predicate)
+        self._pri_checks = tuple(
+            (name, index, _predicate(predicates[name]))
+            for index, name in enumerate(PRI_FIELDS) if predicates[name] is not None
+        )
+        self._header_checks = tuple(
+            (name, index, _predicate(predicates[name]))
+            for index, name in enumerate(HEADER_FIELDS) if predicates[name] is not None
+        )
+        self.limiters = tuple(limiters)
+        self._check_header = bool(self._header_checks or self.limiters)
+        self.message_class = message_class
+        self.rejected = dict((name, 0) for name, _, _ in self._pri_checks + self._header_checks)
+        if self.limiters:
+            self.rejected['limiters'] = 0
+        self.accepted = 0
+
+    def _reject(self, checks, values):
+        """Return whether any of checks rejects values, counting the rejection against it"""
+        for name, index, predicate in checks:
+            if not predicate(values[index]):
+                self.rejected[name] += 1
+                return True
+        return False
+
+    def _reject_header(self, header):
+        msgid = header.msgid
+        if msgid == '-':
+            msgid = None
+        if self._reject(self._header_checks, (header.hostname, header.appname, msgid)):
+            return True
+        if self.limiters:
+            # in the order of sampling.KEY_FIELDS
+            values = (header.hostname, header.appname, msgid, _PRIORITIES[int(header.pri)][0])
+            keys = [limiter.get_key(values) for limiter in self.limiters]
+            for limiter, key in zip(self.limiters, keys):
+                if not limiter.check(key):
+                    self.rejected['limiters'] += 1
+                    return True
+            # every limiter allows the message, so only now take their tokens
+            for limiter, key in zip(self.limiters, keys):
+                limiter.take(key)
+        return False
+
+    def _parse(self, message_string, intern, convert_timestamp):
+        if self._pri_checks:
+            pri = _scan_pri(message_string)
+            # a message without a valid PRI is left to the parser to reject
+            if pri is not None and self._reject(self._pri_checks, _PRIORITIES[pri]):
+                return None
+        if isinstance(message_string, str):
+            buffer = message_string
+            scan_header = scanner.scan_header
+        else:
+            buffer = message_string if isinstance(message_string, bytes) else bytes(message_string)
+            scan_header = scanner.scan_header_bytes
+        try:
+            header, offset = scan_header(buffer)
+        except scanner.ScanError:
+            header = None
+        if header is None:
+            # leave the unusual cases to the grammar, as LazySyslogMessage does
+            groups = LazySyslogMessage._parse_with_grammar(buffer)
+            if self._check_header and self._reject_header(groups.header):
+                return None
+        else:
+            if self._check_header and self._reject_header(header):
+                return None
+            try:
+                if isinstance(buffer, str):
+                    structured_data, pos = scanner.scan_structured_data(buffer, offset)
+                    msg = scanner.scan_message(buffer, pos)
+                else:
+                    structured_data, pos = scanner.scan_structured_data_bytes(buffer, offset)
+                    msg = scanner.scan_message_bytes(buffer, pos)
+                groups = parser.ParsedMessage(header=header, structured_data=structured_data, message=msg)
+            except scanner.ScanError:
+                groups = LazySyslogMessage._parse_with_grammar(buffer)
+        cls = self.message_class
+        if isinstance(groups.message, bytes):
+            cls = cls._bytes_class
+        try:
+            message = cls._from_parsed(groups, intern, convert_timestamp)
+        except ValueError:
+            raise ParseError('Invalid timestamp', message_string)
+        self.accepted += 1
+        return message
+
+    def parse(self, message_string, intern=None, timestamp_format=None):
+        """Parse a message (a string or a bytes-like object) as message_class.parse would, or return None if it
+        is rejected. See SyslogMessage.parse for the other arguments."""
+        return self._parse(
+            message_string, None if intern is None else intern.setdefault, timestamps.get_parser(timestamp_format)
+        )
+
+    def parse_many(self, message_strings, intern=None, timestamp_format=None):
+        """Parse the accepted messages of an iterable of strings (or bytes) without raising ParseError.
+
+        Returns a BatchResult of (messages, errors) as SyslogMessage.parse_many does, with the rejected messages
+        left out of both; error indexes still count them."""
+        parse = self._parse
+        intern = {}.setdefault if intern is None else intern.setdefault
+        convert_timestamp = timestamps.get_parser(timestamp_format)
+        messages = []
+        errors = []
+        for index, message_string in enumerate(message_strings):
+            try:
+                message = parse(message_string, intern, convert_timestamp)
+            except ParseError as e:
+                errors.append(parser.BatchError(index, e.description))
+                continue
+            if message is not None:
+                messages.append(message)
+        return parser.BatchResult(messages, errors)
+
+    def reset(self):
+        """Zero the rejected and accepted counts"""
+        for name in self.rejected:
+            self.rejected[name] = 0
+        self.accepted = 0
@@ -0,0 +1,285 @@
+import asyncio
+import collections
+import logging
+import random
+import socket
+import ssl as _ssl
+
+from .framing import NON_TRANSPARENT, OCTET_COUNTING
+from .serializer import to_bytes
+
+
+log = logging.getLogger(__name__)
+
+TCP = 'tcp'
+UDP = 'udp'
+
+# what send() does with messages which don't fit in the queue
+BLOCK = 'block'
+DROP_NEWEST = 'drop-newest'
+DROP_OLDEST = 'drop-oldest'
+POLICIES = (BLOCK, DROP_NEWEST, DROP_OLDEST)
+
+
+class ForwarderStats(object):
+    """Counters maintained by a Forwarder"""
+
+    __slots__ = ['queued', 'sent', 'dropped', 'batches', 'connects', 'connect_failures', 'send_errors', 'encode_errors']
+
+    def __init__(self):
+        for k in self.__slots__:
+            setattr(self, k, 0)
+
+    def as_dict(self):
+        return dict((k, getattr(self, k)) for k in self.__slots__)
+
+    def __repr__(self):
+        return '{0}({1})'.format(
+            self.__class__.__name__,
+            ','.join('{0}={1!r}'.format(k, getattr(self, k)) for k in self.__slots__)
+        )
+
+
+def _encode(message):
+    if isinstance(message, (bytes, bytearray, memoryview)):
+        return bytes(message)
+    return to_bytes(message)
+
+
+class _DatagramProtocol(asyncio.DatagramProtocol):
+    def error_received(self, exc):
+        log.warning('error sending datagram: %s', exc)
+
+
+class Forwarder(object):
+    """Relay messages to a downstream collector over TCP (RFC6587), TLS (RFC5425) or UDP (RFC5426).
+
+    send() queues SyslogMessages (or already-encoded messages, as bytes, such as from a MessageTemplate) and
+    returns, and has the signature of a SyslogServer sink. A pool of `connections` connections (or UDP sockets)
+    each takes up to batch_size messages at a time off the shared queue; over TCP, a batch goes out with one
+    writelines() call, framed per framing (OCTET_COUNTING, which RFC5425 requires with TLS, or NON_TRANSPARENT),
+    and over UDP each message is one datagram. With more than one connection, messages may arrive out of order.
+
+    The queue holds at most max_queue messages. When it is full, send() waits for room with the BLOCK policy,
+    discards the messages it was given with DROP_NEWEST, and discards the oldest queued messages with DROP_OLDEST
+    (either way counting them in stats.dropped). A connection which can't be made, or fails, is retried after a
+    delay which starts at min_backoff seconds and doubles (with jitter) up to max_backoff, and a batch which
+    raised an error while being sent is put back at the front of the queue. A message which can't be serialized is
+    logged and dropped (counted in both stats.encode_errors and stats.dropped) without holding up the rest.
+    Delivery is still only best effort: a batch may be delivered twice, and one written to a connection which the
+    collector had already closed can be lost without any error being raised, as can datagrams.
+
+    ssl may be an ssl.SSLContext, or True for the default context (which verifies the server's certificate
+    against the system's trusted CAs). Call start(), then close() and wait_closed() to flush the queue and
+    disconnect; give wait_closed a timeout to bound how long it waits for an unreachable collector."""
+
+    def __init__(self, host, port=514, protocol=TCP, ssl=None, connections=1, batch_size=1000, max_queue=100000,
+                 policy=BLOCK, framing=OCTET_COUNTING, min_backoff=0.1, max_backoff=30.0, loop=None):
+        if protocol not in (TCP, UDP):
+            raise ValueError('Unknown protocol {0!r}'.format(protocol))
+        if policy not in POLICIES:
+            raise ValueError('Unknown policy {0!r}'.format(policy))
+        if framing not in (OCTET_COUNTING, NON_TRANSPARENT):
+            raise ValueError('Unknown framing {0!r}'.format(framing))
+        if ssl is True:
+            ssl = _ssl.create_default_context()
+        if ssl is not None and protocol != TCP:
+            raise ValueError('TLS is only supported over TCP')
+        self.host = host
+        self.port = port
+        self.protocol = protocol
+        self.ssl = ssl
+        self.connections = connections
+        self.batch_size = batch_size
+        self.max_queue = max_queue
+        self.policy = policy
+        self.framing = framing
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.stats = ForwarderStats()
+        self._loop = loop or asyncio.get_event_loop()
+        self._queue = collections.deque()
+        self._ready = asyncio.Event()
+        self._room = asyncio.Event()
+        self._room.set()
+        self._workers = []
+        self._closed = False
+
+    async def start(self):
+        """Start the connection workers; connections are made (and retried) in the background"""
+        if self._workers:
+            return
+        for _ in range(self.connections):
+            self._workers.append(self._loop.create_task(self._work()))
+
+    async def send(self, messages):
+        """Queue messages for forwarding, applying the overflow policy if the queue is full"""
+        if self._closed:
+            raise RuntimeError('Forwarder is closed')
+        queue = self._queue
+        if self.policy == BLOCK:
+            messages = list(messages)
+            while messages:
+                while len(queue) >= self.max_queue:
+                    self._room.clear()
+                    await self._room.wait()
+                room = self.max_queue - len(queue)
+                queue.extend(messages[:room])
+                self.stats.queued += len(messages[:room])
+                del messages[:room]
+                self._ready.set()
+            return
+        for message in messages:
+            if len(queue) >= self.max_queue:
+                self.stats.dropped += 1
+                if self.policy == DROP_NEWEST:
+                    continue
+                queue.popleft()
+            queue.append(message)
+            self.stats.queued += 1
+        self._ready.set()
+
+    def __len__(self):
+        return len(self._queue)
+
+    def _take(self):
+        queue = self._queue
+        batch = [queue.popleft() for _ in range(min(self.batch_size, len(queue)))]
+        if len(queue) < self.max_queue:
+            self._room.set()
+        return batch
+
+    def _requeue(self, batch):
+        # put back in front, in order; over capacity for a moment, rather than losing them
+        self._queue.extendleft(reversed(batch))
+        self._ready.set()
+
+    async def _connect(self):
+        if self.protocol == UDP:
+            family = socket.AF_INET6 if ':' in self.host else socket.AF_INET
+            transport, _ = await self._loop.create_datagram_endpoint(
+                _DatagramProtocol, remote_addr=(self.host, self.port), family=family
+            )
+            return transport, None, None
+        reader, writer = await asyncio.open_connection(self.host, self.port, ssl=self.ssl)
+        return writer.transport, reader, writer
+
+    def _encode_batch(self, batch):
+        encoded = []
+        for message in batch:
+            try:
+                encoded.append(_encode(message))
+            except Exception as e:
+                self.stats.encode_errors += 1
+                self.stats.dropped += 1
+                log.warning('dropping message which could not be encoded: %r', e)
+        return encoded
+
+    def _frame(self, encoded):
+        chunks = []
+        append = chunks.append
+        if self.framing == OCTET_COUNTING:
+            for data in encoded:
+                append(b'%d ' % len(data))
+                append(data)
+        else:
+            for data in encoded:
+                append(data)
+                append(b'\n')
+        return chunks
+
+    async def _work(self):
+        backoff = self.min_backoff
+        transport = reader = writer = None
+        batch = None
+        try:
+            while True:
+                if not self._queue:
+                    if self._closed:
+                        break
+                    self._ready.clear()
+                    await self._ready.wait()
+                    continue
+                if transport is not None and (transport.is_closing() or (reader is not None and reader.at_eof())):
+                    # closed by the other end while idle
+                    transport.abort()
+                    transport = reader = writer = None
+                if transport is None:
+                    try:
+                        transport, reader, writer = await self._connect()
+                    except OSError as e:
+                        self.stats.connect_failures += 1
+                        log.warning('could not connect to %s:%s: %s', self.host, self.port, e)
+                        await asyncio.sleep(backoff * random.uniform(0.5, 1.0))
+                        backoff = min(backoff * 2, self.max_backoff)
+                        continue
+                    self.stats.connects += 1
+                    backoff = self.min_backoff
+                # encoded before sending, so that a message which can't be encoded is dropped rather than being taken
+                # for a connection error; what is put back if sending fails is then already encoded
+                batch = self._encode_batch(self._take())
+                if not batch:
+                    continue
+                try:
+                    if writer is None:
+                        for data in batch:
+                            transport.sendto(data)
+                    else:
+                        writer.writelines(self._frame(batch))
+                        await writer.drain()
+                except (OSError, ConnectionError) as e:
+                    self.stats.send_errors += 1
+                    log.warning('lost connection to %s:%s: %s', self.host, self.port, e)
+                    self._requeue(batch)
+                    batch = None
+                    transport.abort()
+                    transport = reader = writer = None
+                    continue
+                self.stats.sent += len(batch)
+                self.stats.batches += 1
+                batch = None
+        except asyncio.CancelledError:
+            # aborted, possibly in the middle of sending a batch
+            if batch is not None:
+                self.stats.dropped += len(batch)
+            if transport is not None:
+                transport.abort()
+            raise
+        if writer is not None:
+            writer.close()
+            # StreamWriter.wait_closed is new in Python 3.7
+            if hasattr(writer, 'wait_closed'):
+                try:
+                    await writer.wait_closed()
+                except (OSError, ConnectionError):
+                    pass
+        elif transport is not None:
+            transport.close()
+
+    def close(self):
+        """Stop accepting messages; those already queued are still sent"""
+        self._closed = True
+        self._ready.set()
+
+    async def wait_closed(self, timeout=None):
+        """Wait for the queue to be sent after close(), and for the connections to be closed.
+
+        If that takes more than timeout seconds (such as while the collector is unreachable), abort(): whatever is
+        still queued is dropped and counted in stats.dropped."""
+        if not self._workers:
+            return
+        _, pending = await asyncio.wait(self._workers, timeout=timeout)
+        if pending:
+            self.abort()
+            await asyncio.wait(pending)
+        for worker in self._workers:
+            if not worker.cancelled() and worker.exception() is not None:
+                raise worker.exception()
+
+    def abort(self):
+        """Stop immediately, dropping anything still queued (counted in stats.dropped)"""
+        self._closed = True
+        self.stats.dropped += len(self._queue)
+        self._queue.clear()
+        for worker in self._workers:
+            worker.cancel()
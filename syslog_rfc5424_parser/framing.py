@@ -0,0 +1,128 @@
+DEFAULT_MAX_MESSAGE_SIZE = 65536
+
+AUTO = 'auto'
+OCTET_COUNTING = 'octet-counting'
+NON_TRANSPARENT = 'non-transparent'
+FRAMINGS = (AUTO, OCTET_COUNTING, NON_TRANSPARENT)
+
+_DIGITS = b'0123456789'
+_LF = b'\n'
+_SP = b' '
+
+
+class FramingError(ValueError):
+    pass
+
+
+class Framer(object):
+    """Incrementally split a byte stream into syslog messages, as framed per RFC6587.
+
+    With the default framing of AUTO, each frame is detected independently: a frame starting with a digit uses
+    octet-counting ("MSG-LEN SP MSG"), and anything else uses non-transparent framing, where the message runs up to
+    the next LF (or CR LF). Either method can instead be required by passing OCTET_COUNTING or NON_TRANSPARENT.
+    Empty LF-terminated frames are skipped.
+
+    feed() returns the messages (as bytes) completed by the data given; flush() returns whatever is left at the end
+    of the stream. FramingError is raised for an invalid octet count, or for a frame longer than
+    max_message_size. If on_error is given, it is instead called with the FramingError and the offset in the
+    stream of the bad frame, which is then skipped up to the next LF, and framing carries on after it."""
+
+    def __init__(self, max_message_size=DEFAULT_MAX_MESSAGE_SIZE, framing=AUTO, on_error=None):
+        if framing not in FRAMINGS:
+            raise ValueError('Unknown framing {0!r}'.format(framing))
+        self.max_message_size = max_message_size
+        self.framing = framing
+        self.on_error = on_error
+        self._buffer = bytearray()
+        # the length of the octet-counted frame currently being read, and the offset at which it starts
+        self._frame_length = None
+        self._frame_start = None
+        # the offset in the stream of the start of the buffer, and whether a bad frame is being skipped
+        self._offset = 0
+        self._skipping = False
+
+    def feed(self, data):
+        buf = self._buffer
+        buf += data
+        messages = []
+        pos = 0
+        size = len(buf)
+        max_message_size = self.max_message_size
+        framing = self.framing
+        while pos < size:
+            if self._skipping:
+                end = buf.find(_LF, pos)
+                if end == -1:
+                    pos = size
+                    break
+                pos = end + 1
+                self._skipping = False
+                continue
+            try:
+                if self._frame_length is not None:
+                    end = self._frame_start + self._frame_length
+                    if end > size:
+                        break
+                    messages.append(bytes(buf[self._frame_start:end]))
+                    pos = end
+                    self._frame_length = self._frame_start = None
+                elif framing == OCTET_COUNTING or (framing == AUTO and buf[pos] in _DIGITS):
+                    space = buf.find(_SP, pos, pos + 11)
+                    if space == -1:
+                        if size - pos > 10:
+                            raise FramingError('Invalid octet count', bytes(buf[pos:pos + 11]))
+                        break
+                    length = buf[pos:space]
+                    if not length.isdigit() or length.startswith(b'0'):
+                        raise FramingError('Invalid octet count', bytes(length))
+                    length = int(length)
+                    if length > max_message_size:
+                        raise FramingError('Frame too large', length)
+                    self._frame_length = length
+                    self._frame_start = pos = space + 1
+                else:
+                    end = buf.find(_LF, pos, pos + max_message_size + 1)
+                    if end == -1:
+                        if size - pos > max_message_size:
+                            raise FramingError('Frame too large', size - pos)
+                        break
+                    stop = end
+                    if stop > pos and buf[stop - 1] == 13:  # CR
+                        stop -= 1
+                    if stop > pos:
+                        messages.append(bytes(buf[pos:stop]))
+                    pos = end + 1
+            except FramingError as e:
+                if self.on_error is None:
+                    raise
+                self.on_error(e, self._offset + pos)
+                self._skipping = True
+        if pos:
+            del buf[:pos]
+            self._offset += pos
+            if self._frame_start is not None:
+                self._frame_start -= pos
+        return messages
+
+    def flush(self):
+        """Return any final message left unterminated at the end of the stream as a list (of zero or one message).
+
+        Raises FramingError (or passes it to on_error) if the stream ended partway through an octet-counted
+        frame."""
+        buf = self._buffer
+        messages = []
+        if self._frame_length is not None:
+            error = FramingError('Truncated frame', bytes(buf))
+            if self.on_error is None:
+                raise error
+            self.on_error(error, self._offset + self._frame_start)
+        elif buf and not self._skipping:
+            # a final line without its LF still drops the CR of a CR LF
+            stop = len(buf) - 1 if buf[-1] == 13 else len(buf)  # CR
+            if stop:
+                messages.append(bytes(buf[:stop]))
+        self._offset += len(buf)
+        del buf[:]
+        self._frame_length = self._frame_start = None
+        self._skipping = False
+        return messages
@@ -0,0 +1,223 @@
+import copyreg
+import hashlib
+import io
+import os
+import pickle
+import stat
+import threading
+
+import lark
+from lark import Lark, Transformer, UnexpectedInput
+from lark.parsers import lalr_analysis
+
+from .parser import GRAMMAR, Header, SDElement, ParsedMessage, unescape_param_value, register_engine
+
+
+# The Lark grammar (see parser.GRAMMAR), which is only imported once a message needs it. Compiling the grammar
+# into LALR tables takes tens of milliseconds, so the compiled parser is built on first use and, if CACHE_DIR is
+# set (by $SYSLOG_RFC5424_PARSER_CACHE_DIR, or by assigning it before the grammar is first needed), pickled there
+# for later processes to load instead. Unpickling runs code, so a cached parser is only loaded from a file owned
+# by the current user which no one else can write to; nothing is cached by default.
+
+CACHE_DIR = os.environ.get('SYSLOG_RFC5424_PARSER_CACHE_DIR') or None
+
+
+class TreeTransformer(Transformer):
+    def NILVALUE(self, inp):
+        return '-'
+
+    def pri(self, inp):
+        return int(inp[0])
+
+    def version(self, inp):
+        return int(inp[0])
+
+    def timestamp(self, inp):
+        if len(inp) == 1:
+            return inp[0]
+        else:
+            datetime = str(inp[0])
+            rest = [str(i.children[0]) for i in inp[1:]]
+            return datetime + ''.join(rest)
+
+    def hostname(self, inp):
+        return str(inp[0])
+
+    def appname(self, inp):
+        return str(inp[0])
+
+    def procid(self, inp):
+        inp = str(inp[0])
+        if inp.isdigit():
+            return int(inp)
+        return inp
+
+    def msgid(self, inp):
+        return str(inp[0])
+
+    def structured_data(self, inp):
+        if len(inp) == 1 and inp[0] == "-":
+            return []
+        output = []
+        for sd_element in inp:
+            sd_id = str(sd_element.children[0])
+            sd_params = []
+            for sd_param in sd_element.children[1:]:
+                param_name = str(sd_param.children[0])
+                param_value = unescape_param_value(str(sd_param.children[1])[1:-1])
+                sd_params.append((param_name, param_value))
+            output.append(SDElement(sd_id=sd_id, sd_params=sd_params))
+        return output
+
+    def msg(self, inp):
+        return str(inp[0])[1:]
+
+    def header(self, inp):
+        return Header(
+            pri=inp[0],
+            version=inp[1],
+            timestamp=inp[2],
+            hostname=inp[3],
+            appname=inp[4],
+            procid=inp[5],
+            msgid=inp[6]
+        )
+
+    def start(self, inp):
+        if len(inp) > 2:
+            message = inp[2]
+        else:
+            message = None
+        return ParsedMessage(
+            header=inp[0],
+            structured_data=inp[1],
+            message=message
+        )
+
+
+def _action(name):
+    return getattr(lalr_analysis, name)
+
+
+class _Pickler(pickle.Pickler):
+    # The LALR parser tells shifts from reductions by the identity of lalr_analysis.Shift, so actions must be
+    # unpickled as those same objects rather than as copies
+    dispatch_table = copyreg.dispatch_table.copy()
+    dispatch_table[lalr_analysis.Action] = lambda action: (_action, (action.name,))
+
+
+def cache_path(cache_dir=None):
+    """Return the path at which the compiled grammar is cached in cache_dir (by default, CACHE_DIR), or None if
+    there is no cache directory; it changes with the grammar and Lark version"""
+    if cache_dir is None:
+        cache_dir = CACHE_DIR
+        if cache_dir is None:
+            return None
+    key = hashlib.sha256('{0}\0{1}'.format(lark.__version__, GRAMMAR).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(cache_dir, 'grammar-{0}.pickle'.format(key))
+
+
+def _is_trusted(f):
+    """Return whether an open file is owned by the current user and not writable by anyone else"""
+    info = os.fstat(f.fileno())
+    getuid = getattr(os, 'getuid', None)
+    if getuid is not None and info.st_uid != getuid():
+        return False
+    return not info.st_mode & (stat.S_IWGRP | stat.S_IWOTH)
+
+
+def _dumps(grammar_parser):
+    buf = io.BytesIO()
+    _Pickler(buf, pickle.HIGHEST_PROTOCOL).dump(grammar_parser)
+    return buf.getvalue()
+
+
+def build(cache_dir=None):
+    """Return a Lark parser for GRAMMAR, loading it from cache_dir (by default, CACHE_DIR) if possible and saving
+    it there otherwise; without a cache directory, the parser is always compiled.
+
+    The cache is only an optimization: if it can't be read or written, or the cached file isn't owned by the
+    current user or is writable by others, the parser is compiled from scratch."""
+    path = cache_path(cache_dir)
+    if path is not None:
+        try:
+            with open(path, 'rb') as f:
+                if _is_trusted(f):
+                    return pickle.load(f)
+        except Exception:
+            pass
+    grammar_parser = Lark(GRAMMAR, parser='lalr', transformer=TreeTransformer())
+    if path is None:
+        return grammar_parser
+    try:
+        data = _dumps(grammar_parser)
+        os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+        # write to a private name and rename, so that concurrent processes never see a partial file
+        temporary_path = '{0}.{1}'.format(path, os.getpid())
+        with os.fdopen(os.open(temporary_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), 'wb') as f:
+            f.write(data)
+        os.replace(temporary_path, path)
+    except Exception:
+        pass
+    return grammar_parser
+
+
+# A Lark parser must not be used by two threads at once: its contextual lexer keeps the LALR parser's current
+# state in an attribute of the (shared) lexer while parsing. So each thread parses with a parser of its own: the
+# first thread to ask gets the shared one, and every other a copy unpickled from a snapshot of it.
+
+_parser = None
+_pickled = None
+_shared_claimed = False
+_lock = threading.Lock()
+_local = threading.local()
+
+
+def get_parser():
+    """Return the shared Lark parser, building (or loading) it the first time.
+
+    It is only safe to use from one thread at a time; parse() and get_thread_parser() give each thread its own."""
+    global _parser
+    if _parser is None:
+        with _lock:
+            if _parser is None:
+                _parser = build()
+    return _parser
+
+
+def _copy_parser(shared):
+    global _pickled
+    with _lock:
+        if _pickled is None:
+            try:
+                _pickled = _dumps(shared)
+            except Exception:
+                _pickled = False
+    if _pickled:
+        return pickle.loads(_pickled)
+    return Lark(GRAMMAR, parser='lalr', transformer=TreeTransformer())
+
+
+def get_thread_parser():
+    """Return the calling thread's Lark parser, creating it the first time (see get_parser)"""
+    global _shared_claimed
+    try:
+        return _local.parser
+    except AttributeError:
+        pass
+    shared = get_parser()
+    with _lock:
+        claimed = _shared_claimed
+        _shared_claimed = True
+    _local.parser = shared if not claimed else _copy_parser(shared)
+    return _local.parser
+
+
+def parse(s):
+    """Parse a message (a str) with the grammar, raising lark.UnexpectedInput if it doesn't match.
+
+    Safe to call from any number of threads at once, each of which uses its own parser."""
+    return (getattr(_local, 'parser', None) or get_thread_parser()).parse(s)
+
+
+register_engine('lark', parse, (UnexpectedInput,))
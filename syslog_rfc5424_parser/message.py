@@ -1,9 +1,41 @@
-import time
-
-import lark
-
+from . import export
 from . import parser
+from . import scanner
+from . import serializer
+from . import timestamps
 from .constants import SyslogSeverity, SyslogFacility
+from .framing import NON_TRANSPARENT
+from .structured_data import StructuredData
+
+
+UTF8_BOM = b'\xef\xbb\xbf'
+
+
+def _facility(code):
+    try:
+        return SyslogFacility(code)
+    except Exception:
+        return SyslogFacility.unknown
+
+
+_SEVERITIES = tuple(SyslogSeverity(code) for code in range(8))
+_FACILITIES = tuple(_facility(code) for code in range(125))
+# (severity, facility) for every PRI the grammar accepts, so that parsing a message needs no enum lookups
+_PRIORITIES = tuple((_SEVERITIES[pri & 7], _FACILITIES[pri >> 3]) for pri in range(1000))
+
+# a metrics.ParseMetrics while metrics are enabled (see metrics.enable)
+_metrics = None
+
+
+def decode_msg(raw):
+    """Decode a raw MSG per RFC5424 section 6.4.
+
+    A MSG starting with a BOM is MSG-UTF8 and has the BOM stripped. Anything else is MSG-ANY, which is decoded as
+    UTF-8 with undecodable octets mapped to lone surrogates, so that raw.encode('utf-8', 'surrogateescape') gets the
+    original octets back."""
+    if raw.startswith(UTF8_BOM):
+        return raw[len(UTF8_BOM):].decode('utf-8', 'surrogateescape')
+    return raw.decode('utf-8', 'surrogateescape')
 
 
 class ParseError(Exception):
@@ -22,6 +54,7 @@ class SyslogMessage(object):
     """Representation of a single RFC5424-format syslog message. """
 
     __slots__ = ['severity', 'facility', 'version', 'timestamp', 'hostname', 'appname', 'procid', 'msgid', 'sd', 'msg']
+    _fields = tuple(__slots__)
 
     def __init__(self, severity, facility, version=1, timestamp='-', hostname='-', appname='-', procid=None,
                  msgid=None, sd='-', msg=None):
@@ -43,53 +76,99 @@ class SyslogMessage(object):
 
     def __str__(self):
         """Return this object represented as appropriate for the wire"""
-        if self.facility == SyslogFacility.unknown:
-            raise ValueError('Cannot dump a SyslogMessage with unknown facility')
-        pri = int(self.facility) * 8 + int(self.severity)
-        if isinstance(self.timestamp, (int, float)):
-            timestamp = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(self.timestamp))
-        else:
-            timestamp = self.timestamp
-        sd = []
-        for sd_id, sd_params in self.sd.items():
-            sd_data = []
-            for k, v in sd_params.items():
-                sd_data.append(' {k}="{v}"'.format(k=k, v=v))
-            sd.append('[{sd_id}{sd_data}]'.format(sd_id=sd_id, sd_data=''.join(sd_data)))
-        if sd:
-            sd = ''.join(sd)
-        else:
-            sd = '-'
-        if self.msg:
-            rest = ' {msg}'.format(msg=self.msg)
-        else:
-            rest = ''
-        return '<{pri}>{version} {timestamp} {hostname} {appname} {procid} {msgid} {sd}{rest}'.format(
-            pri=pri, version=self.version, timestamp=timestamp, hostname=self.hostname,
-            appname=self.appname, procid='-' if self.procid is None else self.procid,
-            msgid='-' if self.msgid is None else self.msgid,
-            sd=sd, rest=rest
-        )
+        return serializer.format_message(self)
+
+    def to_bytes(self, framing=None):
+        """Return this object encoded for the wire, optionally with RFC6587 framing (see serializer.to_bytes)"""
+        return serializer.to_bytes(self, framing)
+
+    @staticmethod
+    def serialize_many(messages, framing=NON_TRANSPARENT, out=None):
+        """Encode and frame many messages into one bytearray (see serializer.serialize_many)"""
+        return serializer.serialize_many(messages, framing, out)
+
+    def to_json(self):
+        """Return as_dict() encoded as a JSON object, without building the dict (see export.to_json)"""
+        return export.to_json(self)
+
+    def to_msgpack(self):
+        """Return as_dict() encoded as a MessagePack map, without building the dict (see export.to_msgpack)"""
+        return export.to_msgpack(self)
 
     @classmethod
-    def parse(cls, message_string):
-        """Construct a syslog message from a string"""
+    def parse(cls, message_string, intern=None, timestamp_format=None, engine=None):
+        """Construct a syslog message from a string (or a bytes-like object; see BytesSyslogMessage).
+
+        If intern is given (a cache.InternCache, or a dict), header and SD name strings equal to ones already in it
+        are replaced by those, so that messages parsed with the same intern share them.
+
+        The timestamp is left as a string unless timestamp_format is one of timestamps.EPOCH, EPOCH_NS or DATETIME
+        (or a timestamps.TimestampParser), in which case it is converted accordingly and a timestamp which isn't
+        a real date and time raises ParseError.
+
+        engine selects the parse engine by name (see parser.set_default_engine); by default the scanner is used,
+        falling back to the grammar for anything it isn't sure about."""
+        if _metrics is not None:
+            return _metrics.parse(cls, message_string, intern, timestamp_format, engine)
+        engine = parser.get_engine(engine)
+        if not isinstance(message_string, str):
+            return BytesSyslogMessage.parse(message_string, intern, timestamp_format, engine)
         try:
-            groups = parser.parse(message_string)
-        except lark.UnexpectedInput:
+            groups = engine.parse(message_string)
+        except engine.errors:
             raise ParseError('Unable to parse message', message_string)
-        header = groups.header
-        pri = int(header.pri)
-        fac = pri >> 3
-        sev = pri & 7
-        severity = SyslogSeverity(sev)
         try:
-            facility = SyslogFacility(fac)
-        except Exception:
-            facility = SyslogFacility.unknown
-        version = header.version
+            return cls._from_parsed(
+                groups, None if intern is None else intern.setdefault, timestamps.get_parser(timestamp_format)
+            )
+        except ValueError:
+            raise ParseError('Invalid timestamp', message_string)
+
+    @classmethod
+    def parse_many(cls, message_strings, intern=None, timestamp_format=None, engine=None):
+        """Construct syslog messages from an iterable of strings (or UTF-8 bytes) without raising ParseError.
+
+        Returns a BatchResult of (messages, errors), where errors is a list of BatchError(index, description) for
+        the inputs which could not be parsed. Repeated header and SD strings are shared between the messages of a
+        batch, or through intern (see parse) if it is given. Messages scanned from bytes are returned as
+        BytesSyslogMessage. Timestamps are converted to timestamp_format (see parse) if it is given, and engine
+        selects the parse engine as for parse."""
+        if _metrics is not None:
+            return _metrics.parse_many(cls, message_strings, intern, timestamp_format, engine)
+        result = parser.parse_batch(message_strings, engine)
+        intern = {}.setdefault if intern is None else intern.setdefault
+        convert_timestamp = timestamps.get_parser(timestamp_format)
+        messages = []
+        append = messages.append
+        invalid = []
+        for position, groups in enumerate(result.messages):
+            try:
+                append((cls._bytes_class if isinstance(groups.message, bytes) else cls)._from_parsed(
+                    groups, intern, convert_timestamp
+                ))
+            except ValueError:
+                invalid.append(parser.BatchError(parser._input_index(position, result.errors), 'Invalid timestamp'))
+        if invalid:
+            return parser.BatchResult(messages, sorted(result.errors + invalid))
+        return parser.BatchResult(messages, result.errors)
+
+    @classmethod
+    def _from_parsed(cls, groups, intern=None, convert_timestamp=None):
+        """Construct a syslog message from a ParsedMessage, optionally sharing strings through intern (a callable
+        with the signature of dict.setdefault) and converting the timestamp with convert_timestamp"""
+        severity, facility, version, timestamp, hostname, appname, procid, msgid = cls._header_values(
+            groups.header, intern, convert_timestamp
+        )
+        sd = cls._sd_dict(groups.structured_data, intern)
+        return cls(severity=severity, facility=facility, version=version, hostname=hostname,
+                   timestamp=timestamp, appname=appname, procid=procid, msgid=msgid, msg=groups.message,
+                   sd=sd)
+
+    @staticmethod
+    def _header_values(header, intern=None, convert_timestamp=None):
+        """Convert a parsed Header to (severity, facility, version, timestamp, hostname, appname, procid, msgid)"""
+        severity, facility = _PRIORITIES[int(header.pri)]
         hostname = header.hostname
-        timestamp = header.timestamp
         appname = header.appname
         procid = header.procid
         if procid == '-':
@@ -97,19 +176,36 @@ class SyslogMessage(object):
         msgid = header.msgid
         if msgid == '-':
             msgid = None
+        if intern is not None:
+            hostname = intern(hostname, hostname)
+            appname = intern(appname, appname)
+            if msgid is not None:
+                msgid = intern(msgid, msgid)
+        timestamp = header.timestamp
+        if convert_timestamp is not None:
+            timestamp = convert_timestamp(timestamp)
+        return severity, facility, header.version, timestamp, hostname, appname, procid, msgid
+
+    @staticmethod
+    def _sd_dict(structured_data, intern=None):
+        """Convert a list of parsed SDElements to a dict of dicts"""
         sd = {}
-        for item in groups.structured_data:
-            sd.setdefault(item.sd_id, {})
-            for param_name, param_value in item.sd_params:
-                sd[item.sd_id][param_name] = param_value
-        return cls(severity=severity, facility=facility, version=version, hostname=hostname,
-                   timestamp=timestamp, appname=appname, procid=procid, msgid=msgid, msg=groups.message,
-                   sd=sd)
+        if intern is None:
+            for item in structured_data:
+                sd.setdefault(item.sd_id, {})
+                for param_name, param_value in item.sd_params:
+                    sd[item.sd_id][param_name] = param_value
+        else:
+            for item in structured_data:
+                params = sd.setdefault(intern(item.sd_id, item.sd_id), {})
+                for param_name, param_value in item.sd_params:
+                    params[intern(param_name, param_name)] = param_value
+        return sd
 
     def __repr__(self):
         return '{0}({1})'.format(
             self.__class__.__name__,
-            ','.join('{0}={1!r}'.format(k, getattr(self, k)) for k in self.__slots__)
+            ','.join('{0}={1!r}'.format(k, getattr(self, k)) for k in self._fields)
         )
 
     def as_dict(self):
@@ -117,5 +213,236 @@ class SyslogMessage(object):
 
         return dict(
             (k, getattr(self, k).name if k in ('severity', 'facility') else getattr(self, k))
-            for k in self.__slots__
+            for k in self._fields
         )
+
+
+_sd_slot = SyslogMessage.sd
+_msg_slot = SyslogMessage.msg
+
+
+def _parse_bytes(message_bytes, engine):
+    """Parse a bytes-like message into a ParsedMessage (whose message may be bytes) with engine, or raise ParseError"""
+    if engine.parse_bytes is not None:
+        try:
+            return engine.parse_bytes(message_bytes)
+        except engine.errors:
+            pass
+    # only the fallback needs the whole datagram decoded
+    try:
+        message_string = bytes(message_bytes).decode('utf-8')
+    except UnicodeDecodeError:
+        raise ParseError('Unable to decode message', message_bytes)
+    try:
+        return engine.parse(message_string)
+    except engine.errors:
+        raise ParseError('Unable to parse message', message_bytes)
+
+
+class BytesSyslogMessage(SyslogMessage):
+    """A SyslogMessage parsed from bytes.
+
+    The header and structured data are decoded eagerly, but the MSG is kept as raw octets (raw_msg) and only decoded
+    (see decode_msg) the first time msg is read, so binary bodies survive parsing. Assigning bytes to msg replaces
+    raw_msg; assigning a string encodes it."""
+
+    __slots__ = ['raw_msg']
+
+    @property
+    def msg(self):
+        try:
+            return _msg_slot.__get__(self, SyslogMessage)
+        except AttributeError:
+            msg = None if self.raw_msg is None else decode_msg(self.raw_msg)
+            _msg_slot.__set__(self, msg)
+            return msg
+
+    @msg.setter
+    def msg(self, value):
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            self.raw_msg = bytes(value)
+            try:
+                _msg_slot.__delete__(self)
+            except AttributeError:
+                pass
+        else:
+            _msg_slot.__set__(self, value)
+            self.raw_msg = None if value is None else value.encode('utf-8', 'surrogateescape')
+
+    @classmethod
+    def parse(cls, message_bytes, intern=None, timestamp_format=None, engine=None):
+        """Construct a syslog message from a bytes, bytearray or memoryview (see SyslogMessage.parse for the other
+        arguments)"""
+        if _metrics is not None:
+            return _metrics.parse(cls, message_bytes, intern, timestamp_format, engine)
+        groups = _parse_bytes(message_bytes, parser.get_engine(engine))
+        try:
+            return cls._from_parsed(
+                groups, None if intern is None else intern.setdefault, timestamps.get_parser(timestamp_format)
+            )
+        except ValueError:
+            raise ParseError('Invalid timestamp', message_bytes)
+
+
+# what parse_many constructs from messages scanned from bytes
+SyslogMessage._bytes_class = BytesSyslogMessage
+
+
+class LazySyslogMessage(SyslogMessage):
+    """A SyslogMessage which only parses its header up front.
+
+    The original buffer (str, or bytes-like) is kept along with the offset of its STRUCTURED-DATA; sd and msg are
+    parsed the first time either of them is read (or when as_dict() or str() are used), after which the buffer is
+    released. This is much cheaper for consumers which only route on header fields such as facility, severity and
+    appname. Mutable buffers (bytearray, memoryview) are copied, since their contents may be reused by the caller.
+
+    Since the structured data isn't checked until it is read, a message with a malformed STRUCTURED-DATA or MSG
+    raises ParseError from that first access rather than from parse()."""
+
+    __slots__ = ['_buffer', '_sd_offset', '_intern']
+
+    @classmethod
+    def parse(cls, message_string, intern=None, timestamp_format=None):
+        """Parse the header of a message (a string or a bytes-like object), deferring the rest.
+
+        See SyslogMessage.parse for the other arguments; intern is also used when the structured data is parsed."""
+        if isinstance(message_string, str):
+            scan_header = scanner.scan_header
+            buffer = message_string
+        else:
+            scan_header = scanner.scan_header_bytes
+            buffer = message_string if isinstance(message_string, bytes) else bytes(message_string)
+        if intern is not None:
+            intern = intern.setdefault
+        convert_timestamp = timestamps.get_parser(timestamp_format)
+        try:
+            header, offset = scan_header(buffer)
+        except scanner.ScanError:
+            # leave the unusual cases to the grammar, which parses everything eagerly
+            header = None
+        try:
+            if header is None:
+                return cls._from_parsed(cls._parse_with_grammar(buffer), intern, convert_timestamp)
+            header_values = cls._header_values(header, intern, convert_timestamp)
+        except ValueError:
+            raise ParseError('Invalid timestamp', message_string)
+        message = cls.__new__(cls)
+        (message.severity, message.facility, message.version, message.timestamp, message.hostname,
+         message.appname, message.procid, message.msgid) = header_values
+        message._buffer = buffer
+        message._sd_offset = offset
+        message._intern = intern
+        return message
+
+    @staticmethod
+    def _parse_with_grammar(buffer):
+        try:
+            message_string = buffer if isinstance(buffer, str) else buffer.decode('utf-8')
+        except UnicodeDecodeError:
+            raise ParseError('Unable to decode message', buffer)
+        engine = parser.get_engine('lark')
+        try:
+            return engine.parse(message_string)
+        except engine.errors:
+            raise ParseError('Unable to parse message', buffer)
+
+    def _materialize(self):
+        buffer = self._buffer
+        try:
+            if isinstance(buffer, str):
+                structured_data, pos = scanner.scan_structured_data(buffer, self._sd_offset)
+                msg = scanner.scan_message(buffer, pos)
+            else:
+                structured_data, pos = scanner.scan_structured_data_bytes(buffer, self._sd_offset)
+                msg = scanner.scan_message_bytes(buffer, pos)
+                if msg is not None:
+                    msg = decode_msg(msg)
+        except scanner.ScanError:
+            groups = self._parse_with_grammar(buffer)
+            structured_data, msg = groups.structured_data, groups.message
+        # either of these may already have been assigned to by the caller
+        try:
+            _sd_slot.__get__(self, SyslogMessage)
+        except AttributeError:
+            _sd_slot.__set__(self, self._sd_dict(structured_data, self._intern))
+        try:
+            _msg_slot.__get__(self, SyslogMessage)
+        except AttributeError:
+            _msg_slot.__set__(self, msg)
+        self._buffer = self._intern = None
+
+    @property
+    def sd(self):
+        try:
+            return _sd_slot.__get__(self, SyslogMessage)
+        except AttributeError:
+            self._materialize()
+            return _sd_slot.__get__(self, SyslogMessage)
+
+    @sd.setter
+    def sd(self, value):
+        _sd_slot.__set__(self, value)
+
+    @property
+    def msg(self):
+        try:
+            return _msg_slot.__get__(self, SyslogMessage)
+        except AttributeError:
+            self._materialize()
+            return _msg_slot.__get__(self, SyslogMessage)
+
+    @msg.setter
+    def msg(self, value):
+        _msg_slot.__set__(self, value)
+
+
+class CompactSyslogMessage(SyslogMessage):
+    """A SyslogMessage which takes less memory to keep around, for buffering large numbers of parsed messages.
+
+    Its sd is an immutable structured_data.StructuredData: a read-only mapping (so msg.sd['id']['name'] works as
+    usual) backed by one tuple of values and a layout shared with other messages whose SD-IDs and PARAM-NAMEs are
+    the same, in place of a dict per SD-ELEMENT. Assigning a dict to sd converts it. as_dict() returns sd as a
+    plain dict of dicts. A MSG parsed from bytes is decoded (see decode_msg) when the message is constructed."""
+
+    __slots__ = []
+
+    @classmethod
+    def parse(cls, message_string, intern=None, timestamp_format=None, engine=None):
+        """Construct a compact syslog message from a string or a bytes-like object (see SyslogMessage.parse)"""
+        if isinstance(message_string, str):
+            return super(CompactSyslogMessage, cls).parse(message_string, intern, timestamp_format, engine)
+        if _metrics is not None:
+            return _metrics.parse(cls, message_string, intern, timestamp_format, engine)
+        groups = _parse_bytes(message_string, parser.get_engine(engine))
+        try:
+            return cls._from_parsed(
+                groups, None if intern is None else intern.setdefault, timestamps.get_parser(timestamp_format)
+            )
+        except ValueError:
+            raise ParseError('Invalid timestamp', message_string)
+
+    @classmethod
+    def _from_parsed(cls, groups, intern=None, convert_timestamp=None):
+        message = cls.__new__(cls)
+        (message.severity, message.facility, message.version, message.timestamp, message.hostname,
+         message.appname, message.procid, message.msgid) = cls._header_values(groups.header, intern, convert_timestamp)
+        _sd_slot.__set__(message, StructuredData.from_parsed(groups.structured_data, intern))
+        msg = groups.message
+        message.msg = decode_msg(msg) if isinstance(msg, bytes) else msg
+        return message
+
+    @property
+    def sd(self):
+        return _sd_slot.__get__(self, SyslogMessage)
+
+    @sd.setter
+    def sd(self, value):
+        _sd_slot.__set__(self, StructuredData.from_dict(value))
+
+    def as_dict(self):
+        rv = super(CompactSyslogMessage, self).as_dict()
+        rv['sd'] = self.sd.to_dict()
+        return rv
+
+
+CompactSyslogMessage._bytes_class = CompactSyslogMessage
@@ -0,0 +1,272 @@
+import time
+
+from . import message as _message
+from . import parser
+from . import scanner
+from . import timestamps
+from .message import ParseError
+
+
+# Optional instrumentation of SyslogMessage.parse and parse_many (and those of BytesSyslogMessage and
+# CompactSyslogMessage). While disabled, which is the default, the parse path only pays for checking that
+# message._metrics is None; enable() swaps in a ParseMetrics, whose parse re-runs the same steps with timers
+# around them.
+
+# where the time goes: the scanner, the Lark grammar (whose LALR parser lexes and runs TreeTransformer as one
+# pass, so the two are timed together), constructing the message, and the whole of any parse which fails
+STAGES = ('scan', 'grammar', 'construct', 'error')
+
+# why messages failed to parse
+FAILURE_CATEGORIES = ('pri', 'timestamp', 'header', 'sd', 'truncated', 'decode')
+
+_ENGINE_STAGES = {'regex': 'scan', 'lark': 'grammar'}
+
+_SCAN_FIELD_CATEGORIES = {'pri': 'pri', 'timestamp': 'timestamp', 'structured_data': 'sd', 'msg': 'sd'}
+
+# the type and help text of each metric family samples() yields, by its name after the prefix
+_FAMILIES = {
+    'messages_total': ('counter', 'Messages parsed.'),
+    'bytes_total': ('counter', 'Bytes of messages parsed.'),
+    'failures_total': ('counter', 'Messages which failed to parse, by reason.'),
+    'stage_seconds_total': ('counter', 'Seconds spent in each stage of parsing.'),
+    'stage_latency_seconds': ('histogram', 'Latency of each stage of parsing, for sampled messages.'),
+}
+_HISTOGRAM_SUFFIXES = ('_bucket', '_sum', '_count')
+
+
+def classify(message_string, error=None):
+    """Return the FAILURE_CATEGORIES entry for a message (a str or bytes-like object) which failed to parse.
+
+    A message which ends before its header does, or inside an SD-PARAM value or SD-ELEMENT, is truncated;
+    otherwise the category is that of the first field the scanner rejects."""
+    if error is not None and error.description == 'Invalid timestamp':
+        return 'timestamp'
+    if not isinstance(message_string, str):
+        try:
+            message_string = bytes(message_string).decode('utf-8')
+        except UnicodeDecodeError:
+            return 'decode'
+    try:
+        scanner.scan(message_string)
+    except scanner.ScanError as e:
+        rest = message_string[e.position:]
+        if e.position >= len(message_string) or (e.field == 'structured_data' and '"' not in rest and ']' not in rest):
+            return 'truncated'
+        return _SCAN_FIELD_CATEGORIES.get(e.field, 'header')
+    # only rejected by another engine
+    return 'header'
+
+
+def _bucket(seconds):
+    # the power of two at or above the latency in microseconds, as with ReceiverStats.per_wakeup
+    microseconds = int(seconds * 1e6)
+    bucket = 1
+    while bucket < microseconds:
+        bucket <<= 1
+    return bucket
+
+
+class ParseMetrics(object):
+    """Counters and timers for parsing, maintained while enabled (see enable()).
+
+    messages and bytes count every message given to parse (bytes counts str messages in UTF-8), and failures those
+    which raised ParseError, by category (see classify()). seconds holds the cumulative time spent in each of
+    STAGES; one in every sample messages also has the latency of each of its stages recorded in histograms, which
+    map stage names to {power of two at or above the latency in microseconds: count}.
+
+    Hooks added with add_hook are called with the ParseMetrics every `every` messages, for pushing to StatsD and
+    the like; samples() and prometheus_text() give the current values in a form suited to Prometheus. Updates aren't
+    locked, so concurrent parsing in several threads can miscount."""
+
+    def __init__(self, sample=16):
+        self.sample = sample
+        self._hooks = []
+        self._timed_engines = {}
+        self.reset()
+
+    def reset(self):
+        """Zero every counter, timer and histogram"""
+        self.messages = 0
+        self.bytes = 0
+        self.failures = dict((category, 0) for category in FAILURE_CATEGORIES)
+        self.seconds = dict((stage, 0.0) for stage in STAGES)
+        self.histograms = dict((stage, {}) for stage in STAGES)
+        self._sampled_seconds = dict((stage, 0.0) for stage in STAGES)
+        self._sampling = False
+
+    def add_hook(self, hook, every=10000):
+        """Call hook(self) after every `every` messages parsed"""
+        self._hooks.append((hook, every))
+
+    def _time(self, stage, elapsed):
+        self.seconds[stage] = self.seconds.get(stage, 0.0) + elapsed
+        if self._sampling:
+            histogram = self.histograms.setdefault(stage, {})
+            bucket = _bucket(elapsed)
+            histogram[bucket] = histogram.get(bucket, 0) + 1
+            self._sampled_seconds[stage] = self._sampled_seconds.get(stage, 0.0) + elapsed
+
+    def _timed_engine(self, engine):
+        """Return engine with its parse and parse_bytes timed as stages"""
+        timed = self._timed_engines.get(engine)
+        if timed is None:
+            if engine.name == 'auto':
+                # the same as scanner.scan_or_parse, timing the scanner and grammar separately
+                def parse(s):
+                    start = time.perf_counter()
+                    try:
+                        return scanner.scan(s)
+                    except scanner.ScanError as e:
+                        error = e
+                    finally:
+                        self._time('scan', time.perf_counter() - start)
+                    grammar = parser.get_engine('lark')
+                    start = time.perf_counter()
+                    try:
+                        return grammar.parse(s)
+                    except grammar.errors:
+                        raise error
+                    finally:
+                        self._time('grammar', time.perf_counter() - start)
+                parse_bytes = self._timer('scan', engine.parse_bytes)
+            else:
+                stage = _ENGINE_STAGES.get(engine.name, engine.name)
+                parse = self._timer(stage, engine.parse)
+                parse_bytes = self._timer(stage, engine.parse_bytes)
+            timed = self._timed_engines[engine] = parser.Engine(engine.name, parse, engine.errors, parse_bytes)
+        return timed
+
+    def _timer(self, stage, fn):
+        if fn is None:
+            return None
+
+        def timed(s):
+            start = time.perf_counter()
+            try:
+                return fn(s)
+            finally:
+                self._time(stage, time.perf_counter() - start)
+        return timed
+
+    def parse(self, cls, message_string, intern=None, timestamp_format=None, engine=None):
+        """Parse as cls.parse(message_string, ...) would, recording metrics"""
+        return self._parse(cls, message_string, None if intern is None else intern.setdefault,
+                           timestamps.get_parser(timestamp_format), self._timed_engine(parser.get_engine(engine)))
+
+    def _parse(self, cls, message_string, intern, convert_timestamp, engine):
+        self.messages += 1
+        is_text = isinstance(message_string, str)
+        self.bytes += len(message_string.encode('utf-8', 'surrogatepass') if is_text else message_string)
+        self._sampling = self.messages % self.sample == 0
+        start = time.perf_counter()
+        try:
+            if is_text:
+                try:
+                    groups = engine.parse(message_string)
+                except engine.errors:
+                    raise ParseError('Unable to parse message', message_string)
+            else:
+                groups = _message._parse_bytes(message_string, engine)
+                cls = cls._bytes_class
+            construct_start = time.perf_counter()
+            try:
+                message = cls._from_parsed(groups, intern, convert_timestamp)
+            except ValueError:
+                raise ParseError('Invalid timestamp', message_string)
+            self._time('construct', time.perf_counter() - construct_start)
+            return message
+        except ParseError as e:
+            self._time('error', time.perf_counter() - start)
+            category = classify(message_string, e)
+            self.failures[category] += 1
+            raise
+        finally:
+            for hook, every in self._hooks:
+                if self.messages % every == 0:
+                    hook(self)
+
+    def parse_many(self, cls, message_strings, intern=None, timestamp_format=None, engine=None):
+        """Parse as cls.parse_many(message_strings, ...) would, recording metrics"""
+        intern = {}.setdefault if intern is None else intern.setdefault
+        convert_timestamp = timestamps.get_parser(timestamp_format)
+        engine = self._timed_engine(parser.get_engine(engine))
+        messages = []
+        errors = []
+        for index, message_string in enumerate(message_strings):
+            try:
+                messages.append(self._parse(cls, message_string, intern, convert_timestamp, engine))
+            except ParseError as e:
+                errors.append(parser.BatchError(index, e.description))
+        return parser.BatchResult(messages, errors)
+
+    def samples(self, prefix='syslog_parse'):
+        """Yield (name, labels, value) for every metric, named and labelled as Prometheus would expect"""
+        yield '{0}_messages_total'.format(prefix), {}, self.messages
+        yield '{0}_bytes_total'.format(prefix), {}, self.bytes
+        for category, count in sorted(self.failures.items()):
+            yield '{0}_failures_total'.format(prefix), {'reason': category}, count
+        for stage, seconds in sorted(self.seconds.items()):
+            yield '{0}_stage_seconds_total'.format(prefix), {'stage': stage}, seconds
+        for stage, histogram in sorted(self.histograms.items()):
+            cumulative = 0
+            for bucket, count in sorted(histogram.items()):
+                cumulative += count
+                yield ('{0}_stage_latency_seconds_bucket'.format(prefix),
+                       {'stage': stage, 'le': repr(bucket / 1e6)}, cumulative)
+            yield '{0}_stage_latency_seconds_bucket'.format(prefix), {'stage': stage, 'le': '+Inf'}, cumulative
+            yield '{0}_stage_latency_seconds_sum'.format(prefix), {'stage': stage}, self._sampled_seconds[stage]
+            yield '{0}_stage_latency_seconds_count'.format(prefix), {'stage': stage}, cumulative
+
+    def prometheus_text(self, prefix='syslog_parse'):
+        """Return samples() in the Prometheus text exposition format, with the HELP and TYPE of each metric family"""
+        lines = []
+        last_family = None
+        for name, labels, value in self.samples(prefix):
+            family = name
+            if name[len(prefix) + 1:] not in _FAMILIES and name.endswith(_HISTOGRAM_SUFFIXES):
+                family = name.rsplit('_', 1)[0]
+            if family != last_family:
+                metric_type, help_text = _FAMILIES[family[len(prefix) + 1:]]
+                lines.append('# HELP {0} {1}\n'.format(family, help_text))
+                lines.append('# TYPE {0} {1}\n'.format(family, metric_type))
+                last_family = family
+            if labels:
+                name = '{0}{{{1}}}'.format(name, ','.join(
+                    '{0}="{1}"'.format(k, v) for k, v in sorted(labels.items())
+                ))
+            lines.append('{0} {1}\n'.format(name, value))
+        return ''.join(lines)
+
+    def as_dict(self):
+        return {
+            'messages': self.messages,
+            'bytes': self.bytes,
+            'failures': dict(self.failures),
+            'seconds': dict(self.seconds),
+            'histograms': dict((stage, dict(histogram)) for stage, histogram in self.histograms.items()),
+        }
+
+    def __repr__(self):
+        return '{0}(messages={1!r},bytes={2!r},failures={3!r},seconds={4!r})'.format(
+            self.__class__.__name__, self.messages, self.bytes, self.failures, self.seconds
+        )
+
+
+def enable(metrics=None):
+    """Start recording metrics for every parse into metrics (by default, a new ParseMetrics), and return it"""
+    if metrics is None:
+        metrics = ParseMetrics()
+    _message._metrics = metrics
+    return metrics
+
+
+def disable():
+    """Stop recording metrics, returning the ParseMetrics which was recording them (or None)"""
+    metrics = _message._metrics
+    _message._metrics = None
+    return metrics
+
+
+def get_metrics():
+    """Return the ParseMetrics currently recording, or None if metrics are disabled"""
+    return _message._metrics
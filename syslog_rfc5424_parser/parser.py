@@ -1,6 +1,5 @@
 import collections
-
-from lark import Lark, Transformer
+import re
 
 
 GRAMMAR = r'''
@@ -18,7 +17,7 @@ GRAMMAR = r'''
                      | sd_element+
     sd_element       : "[" sd_id (" " sd_param)* "]"
     ?sd_id           : sd_name
-    sd_param         : param_name "=" ESCAPED_STRING
+    sd_param         : param_name "=" PARAM_VALUE
     ?param_name      : sd_name
     ?sd_name         : /[^= \]\"]{1,32}/
     appname          : NILVALUE
@@ -31,7 +30,9 @@ GRAMMAR = r'''
                      | /[!-~]{1,255}/
     msg              : / .*/ms
 
-    %import common.ESCAPED_STRING   -> ESCAPED_STRING
+    // a backslash escapes the character after it (RFC5424 section 6.3.3); failing that, a value ending in a lone
+    // backslash (which would otherwise escape its closing quote) is still accepted, with the backslash kept
+    PARAM_VALUE      : /"(?:[^"\\]|\\.)*"|"(?:\\"|[^"])*"/s
 
     _SP: " "
     NILVALUE: "-"
@@ -45,88 +46,131 @@ SDElement = collections.namedtuple('SDElement', ['sd_id', 'sd_params'])
 
 ParsedMessage = collections.namedtuple('ParsedMessage', ['header', 'structured_data', 'message'])
 
-
-class TreeTransformer(Transformer):
-    def NILVALUE(self, inp):
-        return '-'
-
-    def pri(self, inp):
-        return int(inp[0])
-
-    def version(self, inp):
-        return int(inp[0])
-
-    def timestamp(self, inp):
-        if len(inp) == 1:
-            return inp[0]
+BatchResult = collections.namedtuple('BatchResult', ['messages', 'errors'])
+
+BatchError = collections.namedtuple('BatchError', ['index', 'description'])
+
+Engine = collections.namedtuple('Engine', ['name', 'parse', 'errors', 'parse_bytes'])
+
+_PARAM_ESCAPE = re.compile(r'\\([\\"\]])')
+
+
+def unescape_param_value(value):
+    """Undo the escaping of '"', '\\' and ']' in a PARAM-VALUE (RFC5424 section 6.3.3).
+
+    A backslash before any other character is not an escape, and is kept."""
+    if '\\' in value:
+        return _PARAM_ESCAPE.sub(r'\1', value)
+    return value
+
+
+# name -> Engine; 'regex' and 'auto' are registered by the scanner module, and 'lark' by the grammar module, which
+# (along with lark itself) is only imported once it is asked for
+_engines = {}
+_default_engine = 'auto'
+
+
+def register_engine(name, parse, errors, parse_bytes=None):
+    """Make a parse engine selectable by name.
+
+    parse takes a str and returns a ParsedMessage, raising one of the exception classes in errors if the message
+    is malformed. parse_bytes, if given, takes a bytes-like object in the same way; otherwise bytes are decoded as
+    UTF-8 and given to parse (as they also are when parse_bytes raises one of errors)."""
+    engine = Engine(name, parse, tuple(errors), parse_bytes)
+    _engines[name] = engine
+    return engine
+
+
+def get_engine(name=None):
+    """Return the Engine registered as name (or the default engine, if name is None); an Engine is returned
+    as-is"""
+    if isinstance(name, Engine):
+        return name
+    if name is None:
+        name = _default_engine
+    try:
+        return _engines[name]
+    except KeyError:
+        if name != 'lark':
+            raise ValueError('Unknown engine {0!r}'.format(name))
+    from . import grammar  # noqa: F401
+    return _engines[name]
+
+
+def set_default_engine(name):
+    """Select the engine used when none is given, returning the name of the previous default.
+
+    The built-in engines are 'lark' (the grammar above), 'regex' (the hand-written scanner, which rejects some
+    unusual messages that the grammar accepts) and 'auto' (the scanner, falling back to the grammar for anything
+    it rejects; the initial default)."""
+    global _default_engine
+    get_engine(name)
+    previous, _default_engine = _default_engine, name
+    return previous
+
+
+def parse(s, engine=None):
+    """Parse a message (a str) into a ParsedMessage with the given engine (see set_default_engine)"""
+    return get_engine(engine).parse(s)
+
+
+def _input_index(position, errors):
+    """Return the index in a batch's input of its position'th parsed message, given the batch's (ordered) errors"""
+    index = position
+    for error in errors:
+        if error.index > index:
+            break
+        index += 1
+    return index
+
+
+def iter_batch(lines, engine=None):
+    """Parse many messages (str, or bytes-like) one at a time, yielding (ParsedMessage, None) for every line that
+    parsed and (None, BatchError) for every line that didn't; see parse_batch"""
+    engine = get_engine(engine)
+    engine_parse = engine.parse
+    engine_parse_bytes = engine.parse_bytes
+    engine_errors = engine.errors
+    for index, line in enumerate(lines):
+        if not isinstance(line, str):
+            if engine_parse_bytes is not None:
+                try:
+                    yield engine_parse_bytes(line), None
+                    continue
+                except engine_errors:
+                    pass
+            try:
+                line = bytes(line).decode('utf-8')
+            except UnicodeDecodeError:
+                yield None, BatchError(index, 'Unable to decode message')
+                continue
+        try:
+            parsed = engine_parse(line)
+        except engine_errors:
+            yield None, BatchError(index, 'Unable to parse message')
+            continue
+        yield parsed, None
+
+
+def parse_batch(lines, engine=None):
+    """Parse many messages (str, or bytes-like) at once.
+
+    Returns a BatchResult whose messages are the ParsedMessage for every line that parsed, in order, and whose
+    errors are a BatchError(index, description) for every line that didn't. Never raises ParseError. Lines given as
+    bytes which the scanner accepts have their message left as undecoded bytes (see scanner.scan_bytes). engine
+    selects the parse engine (see set_default_engine)."""
+    messages = []
+    errors = []
+    for parsed, error in iter_batch(lines, engine):
+        if error is None:
+            messages.append(parsed)
         else:
-            datetime = str(inp[0])
-            rest = [str(i.children[0]) for i in inp[1:]]
-            return datetime + ''.join(rest)
-
-    def hostname(self, inp):
-        return str(inp[0])
-
-    def appname(self, inp):
-        return str(inp[0])
-
-    def procid(self, inp):
-        inp = str(inp[0])
-        if inp.isdigit():
-            return int(inp)
-        return inp
-
-    def msgid(self, inp):
-        return str(inp[0])
-
-    def structured_data(self, inp):
-        if len(inp) == 1 and inp[0] == "-":
-            return []
-        output = []
-        for sd_element in inp:
-            sd_id = str(sd_element.children[0])
-            sd_params = []
-            for sd_param in sd_element.children[1:]:
-                param_name = str(sd_param.children[0])
-                param_value = str(sd_param.children[1])[1:-1]
-                sd_params.append((param_name, param_value))
-            output.append(SDElement(sd_id=sd_id, sd_params=sd_params))
-        return output
-
-    def msg(self, inp):
-        return str(inp[0])[1:]
-
-    def header(self, inp):
-        return Header(
-            pri=inp[0],
-            version=inp[1],
-            timestamp=inp[2],
-            hostname=inp[3],
-            appname=inp[4],
-            procid=inp[5],
-            msgid=inp[6]
-        )
-
-    def start(self, inp):
-        if len(inp) > 2:
-            message = inp[2]
-        else:
-            message = None
-        return ParsedMessage(
-            header=inp[0],
-            structured_data=inp[1],
-            message=message
-        )
-
-
-_parser = Lark(GRAMMAR, parser='lalr', transformer=TreeTransformer())
-
-
-def parse(s):
-    tree = _parser.parse(s)
-    return tree
+            errors.append(error)
+    return BatchResult(messages, errors)
 
 
 if __name__ == '__main__':
     import sys
-    print(parse(sys.argv[1]))
+    # engines register themselves with the imported module, not this __main__ copy of it
+    from syslog_rfc5424_parser import parser
+    print(parser.parse(sys.argv[1]))
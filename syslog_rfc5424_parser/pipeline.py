@@ -0,0 +1,178 @@
+import collections
+import concurrent.futures
+import itertools
+import marshal
+import os
+
+from . import parser
+from .cache import InternCache
+from .message import SyslogMessage, BytesSyslogMessage
+
+
+# Workers send each chunk back as a single marshal blob of plain tuples, which is far smaller and cheaper to
+# (de)serialize than a pickled list of SyslogMessage objects full of enum members. A record is laid out as
+#
+#     (pri, version, timestamp, hostname, appname, procid, msgid, ((sd_id, ((name, value), ...)), ...), message)
+#
+# with the header fields exactly as in parser.Header (so NILVALUEs are still '-'), and message a str, the
+# undecoded bytes of a message given as bytes, or None.
+
+
+def _parse_chunk(start, lines):
+    result = parser.parse_batch(lines)
+    records = [
+        (
+            m.header.pri, m.header.version, str(m.header.timestamp), m.header.hostname, m.header.appname,
+            m.header.procid, m.header.msgid,
+            tuple((e.sd_id, tuple(e.sd_params)) for e in m.structured_data),
+            m.message
+        )
+        for m in result.messages
+    ]
+    errors = [(start + e.index, e.description) for e in result.errors]
+    failed = set(e.index for e in result.errors)
+    indexes = [start + i for i in range(len(lines)) if i not in failed]
+    return marshal.dumps((records, errors, start, indexes))
+
+
+class ChunkResult(parser.BatchResult):
+    """The BatchResult of (messages, errors) for one chunk of a ParsePipeline's input, which also has the index
+    in the input of the chunk's first line as start, and that of each of its messages as indexes"""
+
+    def __new__(cls, messages, errors, start, indexes):
+        self = super(ChunkResult, cls).__new__(cls, messages, errors)
+        self.start = start
+        self.indexes = indexes
+        return self
+
+
+def message_from_record(record, intern=None):
+    """Construct a SyslogMessage (or BytesSyslogMessage) from a compact pipeline record, sharing strings through
+    intern (a cache.InternCache, or a dict) if it is given"""
+    groups = parser.ParsedMessage(
+        header=parser.Header._make(record[:7]),
+        structured_data=[parser.SDElement(sd_id, list(sd_params)) for sd_id, sd_params in record[7]],
+        message=record[8]
+    )
+    cls = BytesSyslogMessage if isinstance(record[8], bytes) else SyslogMessage
+    return cls._from_parsed(groups, None if intern is None else intern.setdefault)
+
+
+def _chunks(lines, chunksize):
+    lines = iter(lines)
+    for start in itertools.count(0, chunksize):
+        chunk = [line if isinstance(line, (str, bytes)) else bytes(line) for line in itertools.islice(lines, chunksize)]
+        if not chunk:
+            return
+        yield start, chunk
+
+
+class ParsePipeline(object):
+    """Parse lines across a pool of worker processes, sidestepping the GIL.
+
+    Lines (str or bytes-like) are sent to the workers in chunks of chunksize, and each chunk comes back as a
+    ChunkResult whose error indexes refer to positions in the overall input, as do its start and (per message)
+    indexes. Results are yielded in input order if ordered is true, and otherwise as soon as each chunk is done.
+    At most max_in_flight chunks (by default, two per worker) are outstanding at once, so arbitrarily long inputs
+    can be streamed through in bounded memory.
+
+    If compact is true, the messages of each result are left as the compact records produced by the workers
+    (see message_from_record) rather than SyslogMessage objects; this avoids constructing objects in the parent
+    process, which is otherwise the limit on scaling.
+
+    Use as a context manager, or call close() when done, to shut the worker processes down."""
+
+    def __init__(self, max_workers=None, chunksize=1000, ordered=True, compact=False, max_in_flight=None):
+        if max_workers is None:
+            max_workers = os.cpu_count() or 1
+        self.max_workers = max_workers
+        self.chunksize = chunksize
+        self.ordered = ordered
+        self.compact = compact
+        self.max_in_flight = max_in_flight or 2 * max_workers
+        self._executor = concurrent.futures.ProcessPoolExecutor(max_workers=max_workers)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+    def _result(self, future, intern):
+        records, errors, start, indexes = marshal.loads(future.result())
+        errors = [parser.BatchError(index, description) for index, description in errors]
+        if not self.compact:
+            records = [message_from_record(r, intern) for r in records]
+        return ChunkResult(records, errors, start, indexes)
+
+    def parse(self, lines, intern=None):
+        """Parse an iterable of lines, yielding a ChunkResult per chunk.
+
+        Repeated header and SD strings are shared between messages through intern, which defaults to a new
+        cache.InternCache for each call."""
+        if intern is None:
+            intern = InternCache()
+        if self.ordered:
+            pending = collections.deque()
+            for start, chunk in _chunks(lines, self.chunksize):
+                pending.append(self._executor.submit(_parse_chunk, start, chunk))
+                if len(pending) >= self.max_in_flight:
+                    yield self._result(pending.popleft(), intern)
+            while pending:
+                yield self._result(pending.popleft(), intern)
+        else:
+            pending = set()
+            for start, chunk in _chunks(lines, self.chunksize):
+                pending.add(self._executor.submit(_parse_chunk, start, chunk))
+                if len(pending) >= self.max_in_flight:
+                    done, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                    for future in done:
+                        yield self._result(future, intern)
+            for future in concurrent.futures.as_completed(pending):
+                yield self._result(future, intern)
+
+
+def parse_parallel(lines, max_workers=None, chunksize=1000, ordered=True, compact=False):
+    """Parse an iterable of lines across a pool of worker processes, yielding a ChunkResult per chunk.
+
+    See ParsePipeline for the meaning of the arguments."""
+    with ParsePipeline(max_workers=max_workers, chunksize=chunksize, ordered=ordered, compact=compact) as pipeline:
+        for result in pipeline.parse(lines):
+            yield result
+
+
+def _parse_chunk_in_thread(message_class, start, chunk, intern, timestamp_format, engine):
+    result = message_class.parse_many(chunk, intern, timestamp_format, engine)
+    return result.messages, [parser.BatchError(start + e.index, e.description) for e in result.errors]
+
+
+def parse_concurrent(lines, max_workers=None, chunksize=1000, message_class=SyslogMessage, intern=None,
+                     timestamp_format=None, engine=None, executor=None):
+    """Parse an iterable of lines across a pool of threads, returning a single BatchResult for all of them.
+
+    Chunks of chunksize lines are parsed with message_class.parse_many (see it for intern, timestamp_format and
+    engine; an intern given here is shared by every thread) on a concurrent.futures.ThreadPoolExecutor of
+    max_workers threads, or on executor if one is given. Messages come back in input order, and error indexes
+    refer to positions in lines.
+
+    Parsing is thread-safe: the scanner keeps no state, and each thread gets its own grammar parser (see
+    grammar.get_thread_parser). Under the GIL, threads mostly help when lines arrive from blocking I/O; on a
+    free-threaded build of CPython they parse in parallel. Use ParsePipeline to spread parsing over processes."""
+    if executor is None:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers or os.cpu_count() or 1) as executor:
+            return parse_concurrent(lines, max_workers, chunksize, message_class, intern, timestamp_format, engine,
+                                    executor)
+    futures = [
+        executor.submit(_parse_chunk_in_thread, message_class, start, chunk, intern, timestamp_format, engine)
+        for start, chunk in _chunks(lines, chunksize)
+    ]
+    messages = []
+    errors = []
+    for future in futures:
+        chunk_messages, chunk_errors = future.result()
+        messages.extend(chunk_messages)
+        errors.extend(chunk_errors)
+    return parser.BatchResult(messages, errors)
@@ -0,0 +1,124 @@
+import socket
+import struct
+import sys
+
+
+# Not exported by the socket module, but present on Linux since 2.6.33
+SO_RXQ_OVFL = getattr(socket, 'SO_RXQ_OVFL', 40 if sys.platform.startswith('linux') else None)
+
+_DROPS = struct.Struct('=I')
+
+
+class ReceiverStats(object):
+    """Counters maintained by a DatagramReceiver.
+
+    per_wakeup is a histogram of the number of datagrams read per drain(), keyed by the power of two at or above the
+    count. kernel_drops is the number of datagrams the kernel has dropped because the socket's receive queue was
+    full (as reported via SO_RXQ_OVFL); it is only maintained if kernel_drops_supported."""
+
+    __slots__ = ['wakeups', 'datagrams', 'bytes', 'truncated', 'max_per_wakeup', 'per_wakeup', 'kernel_drops',
+                 'kernel_drops_supported']
+
+    def __init__(self):
+        self.wakeups = 0
+        self.datagrams = 0
+        self.bytes = 0
+        self.truncated = 0
+        self.max_per_wakeup = 0
+        self.per_wakeup = {}
+        self.kernel_drops = 0
+        self.kernel_drops_supported = False
+
+    def as_dict(self):
+        return dict((k, getattr(self, k)) for k in self.__slots__)
+
+    def __repr__(self):
+        return '{0}({1})'.format(
+            self.__class__.__name__,
+            ','.join('{0}={1!r}'.format(k, getattr(self, k)) for k in self.__slots__)
+        )
+
+
+class DatagramReceiver(object):
+    """Drain a datagram socket many messages at a time into a single preallocated buffer.
+
+    Each call to drain() reads datagrams from the (non-blocking) socket until it would block, the buffer can't be
+    guaranteed to fit another max_datagram_size datagram, or max_batch datagrams have been read, and returns them as
+    a list of memoryviews into the buffer. Those views are only valid until the next call to drain(), so they must be
+    parsed (for example, with SyslogMessage.parse_many) or copied before then.
+
+    Datagrams larger than max_datagram_size are truncated and counted in stats.truncated. That needs the
+    MSG_TRUNC flag (as on Linux); on platforms without it, truncated datagrams aren't counted."""
+
+    def __init__(self, sock, buffer_size=1 << 22, max_datagram_size=65536, max_batch=None):
+        if buffer_size < max_datagram_size:
+            raise ValueError('buffer_size must be at least max_datagram_size')
+        self.sock = sock
+        self.max_datagram_size = max_datagram_size
+        self.max_batch = max_batch
+        self.stats = ReceiverStats()
+        self._buffer = bytearray(buffer_size)
+        self._view = memoryview(self._buffer)
+        sock.setblocking(False)
+        self._use_recvmsg = hasattr(sock, 'recvmsg_into')
+        self._ancbufsize = 0
+        if self._use_recvmsg and SO_RXQ_OVFL is not None:
+            try:
+                sock.setsockopt(socket.SOL_SOCKET, SO_RXQ_OVFL, 1)
+            except OSError:
+                pass
+            else:
+                self.stats.kernel_drops_supported = True
+                self._ancbufsize = socket.CMSG_SPACE(_DROPS.size)
+
+    def fileno(self):
+        return self.sock.fileno()
+
+    def drain(self):
+        """Read every datagram currently available (up to the limits above) and return them as memoryviews"""
+        view = self._view
+        limit = len(view) - self.max_datagram_size
+        max_batch = self.max_batch
+        max_datagram_size = self.max_datagram_size
+        stats = self.stats
+        datagrams = []
+        offset = 0
+        msg_trunc = getattr(socket, 'MSG_TRUNC', 0)
+        if self._use_recvmsg:
+            recvmsg_into = self.sock.recvmsg_into
+            ancbufsize = self._ancbufsize
+            while offset <= limit and (max_batch is None or len(datagrams) < max_batch):
+                try:
+                    nbytes, ancdata, flags, _ = recvmsg_into([view[offset:offset + max_datagram_size]], ancbufsize)
+                except (BlockingIOError, InterruptedError):
+                    break
+                if flags & msg_trunc:
+                    stats.truncated += 1
+                for level, kind, data in ancdata:
+                    if level == socket.SOL_SOCKET and kind == SO_RXQ_OVFL and len(data) >= _DROPS.size:
+                        stats.kernel_drops = _DROPS.unpack_from(data)[0]
+                datagrams.append(view[offset:offset + nbytes])
+                offset += nbytes
+        else:
+            recv_into = self.sock.recv_into
+            while offset <= limit and (max_batch is None or len(datagrams) < max_batch):
+                try:
+                    # with MSG_TRUNC, the full length of a datagram is returned even if it was truncated
+                    nbytes = recv_into(view[offset:offset + max_datagram_size], 0, msg_trunc)
+                except (BlockingIOError, InterruptedError):
+                    break
+                if nbytes > max_datagram_size:
+                    stats.truncated += 1
+                    nbytes = max_datagram_size
+                datagrams.append(view[offset:offset + nbytes])
+                offset += nbytes
+        count = len(datagrams)
+        if count:
+            stats.wakeups += 1
+            stats.datagrams += count
+            stats.bytes += offset
+            if count > stats.max_per_wakeup:
+                stats.max_per_wakeup = count
+            bucket = 1 << (count - 1).bit_length()
+            stats.per_wakeup[bucket] = stats.per_wakeup.get(bucket, 0) + 1
+        return datagrams
@@ -0,0 +1,142 @@
+import re
+
+from . import scanner
+from . import timestamps
+from .message import _PRIORITIES, SyslogMessage, decode_msg
+
+
+# Recover what can be recovered from a buffer holding damaged or concatenated messages. The buffer is split at
+# each <PRI>VERSION SP which either starts a well-formed HEADER or follows a line break (or NUL), in one pass of
+# a regex over it, and each piece is scanned field by field with the scanner; the Lark grammar is never used, so
+# the cost stays linear in the size of the buffer however malformed it is.
+
+PARTS = ('header', 'timestamp', 'structured_data', 'msg')
+
+_BOUNDARY = re.compile(r'<([0-9]{1,3})>([1-9][0-9]{0,2}) ')
+_BOUNDARY_BYTES = re.compile(_BOUNDARY.pattern.encode('ascii'))
+_SEPARATORS = '\r\n\0'
+_SEPARATOR_BYTES = b'\r\n\0'
+
+
+class RecoveredMessage(SyslogMessage):
+    """A SyslogMessage recovered from a damaged buffer by recover().
+
+    failed is None for a message which parsed completely, and otherwise the first of PARTS which didn't: with
+    'header', only the severity, facility and version (if the message started with a <PRI>VERSION) are set; with
+    'timestamp', the timestamp couldn't be converted to the requested timestamp_format and is left as a string;
+    with 'structured_data', sd holds the complete SD-ELEMENTs before the damaged one (when they can be told apart)
+    and msg is None; and with 'msg', the structured data wasn't followed by a space. raw is the text of the message
+    (a str, or bytes) and offset its position in the buffer."""
+
+    __slots__ = ['failed', 'raw', 'offset']
+
+    def __repr__(self):
+        return '{0}({1})'.format(
+            self.__class__.__name__,
+            ','.join('{0}={1!r}'.format(k, getattr(self, k)) for k in ('failed', 'offset') + self._fields)
+        )
+
+
+def _boundaries(buffer, is_text):
+    """Return the offsets at which messages start"""
+    boundary = _BOUNDARY if is_text else _BOUNDARY_BYTES
+    header = scanner._HEADER if is_text else scanner._HEADER_BYTES
+    separators = _SEPARATORS if is_text else _SEPARATOR_BYTES
+    offsets = []
+    for match in boundary.finditer(buffer):
+        start = match.start()
+        if start == 0 or buffer[start - 1:start] in separators or header.match(buffer, start) is not None:
+            offsets.append(start)
+    return offsets
+
+
+def _salvage_structured_data(piece, start, error_position, scan_structured_data):
+    # the SD-ELEMENTs before the one which failed, if everything up to the last ']' before the failure scans
+    end = piece.rfind(b']' if isinstance(piece, bytes) else ']', start, error_position) + 1
+    if end > start:
+        try:
+            structured_data, pos = scan_structured_data(piece[:end], start)
+            if pos == end:
+                return structured_data
+        except scanner.ScanError:
+            pass
+    return []
+
+
+def _recover_one(piece, offset, is_text, intern, convert_timestamp):
+    message = RecoveredMessage.__new__(RecoveredMessage)
+    message.raw = piece
+    message.offset = offset
+    message.failed = None
+    message.severity = message.facility = message.version = None
+    message.timestamp = message.hostname = message.appname = '-'
+    message.procid = message.msgid = message.msg = None
+    message.sd = {}
+    try:
+        header, pos = (scanner.scan_header if is_text else scanner.scan_header_bytes)(piece)
+    except scanner.ScanError:
+        match = (_BOUNDARY if is_text else _BOUNDARY_BYTES).match(piece)
+        if match is not None:
+            message.severity, message.facility = _PRIORITIES[int(match.group(1))]
+            message.version = int(match.group(2))
+        message.failed = 'header'
+        return message
+    (message.severity, message.facility, message.version, message.timestamp, message.hostname, message.appname,
+     message.procid, message.msgid) = SyslogMessage._header_values(header, intern)
+    if convert_timestamp is not None:
+        try:
+            message.timestamp = convert_timestamp(message.timestamp)
+        except ValueError:
+            message.failed = 'timestamp'
+    if is_text:
+        scan_structured_data, scan_message = scanner.scan_structured_data, scanner.scan_message
+    else:
+        scan_structured_data, scan_message = scanner.scan_structured_data_bytes, scanner.scan_message_bytes
+    try:
+        structured_data, sd_end = scan_structured_data(piece, pos)
+    except scanner.ScanError as e:
+        message.sd = SyslogMessage._sd_dict(_salvage_structured_data(piece, pos, e.position, scan_structured_data),
+                                            intern)
+        message.failed = message.failed or 'structured_data'
+        return message
+    message.sd = SyslogMessage._sd_dict(structured_data, intern)
+    try:
+        msg = scan_message(piece, sd_end)
+    except scanner.ScanError:
+        message.failed = message.failed or 'msg'
+        return message
+    message.msg = decode_msg(msg) if isinstance(msg, bytes) else msg
+    return message
+
+
+def recover(buffer, intern=None, timestamp_format=None):
+    """Recover the messages in a buffer (a str or a bytes-like object) which may hold several glued-together,
+    truncated or otherwise damaged messages, returning a list of RecoveredMessage in buffer order.
+
+    The buffer is split before every <PRI>VERSION SP which starts a well-formed HEADER, or which is at the start of
+    a line; anything before the first is recovered as a message with a failed header. A line break (or NUL) just
+    before the next message isn't part of the previous one's MSG. See SyslogMessage.parse for the other
+    arguments.
+
+    Only the scanner is used, so the few unusual messages which SyslogMessage.parse leaves to the grammar are
+    recovered with failed set; and a MSG quoting another message's complete header is split there."""
+    is_text = isinstance(buffer, str)
+    if not is_text and not isinstance(buffer, bytes):
+        buffer = bytes(buffer)
+    if intern is not None:
+        intern = intern.setdefault
+    convert_timestamp = timestamps.get_parser(timestamp_format)
+    separators = _SEPARATORS if is_text else _SEPARATOR_BYTES
+    offsets = _boundaries(buffer, is_text)
+    if not offsets or offsets[0] != 0:
+        offsets.insert(0, 0)
+    messages = []
+    for start, end in zip(offsets, offsets[1:] + [len(buffer)]):
+        piece = buffer[start:end]
+        if end != len(buffer):
+            piece = piece.rstrip(separators)
+        if start == 0 and not piece.strip():
+            # nothing but whitespace before the first message
+            continue
+        messages.append(_recover_one(piece, start, is_text, intern, convert_timestamp))
+    return messages
@@ -0,0 +1,144 @@
+import collections
+import operator
+import random
+import time
+
+
+# Rate limiting and sampling of messages by header fields, for shedding load from a noisy source before the rest
+# of the message is parsed: pass them as the limiters of a MessageFilter, which checks them as soon as the HEADER
+# has been scanned.
+
+# the fields a key may be made of, in the order of the values tuple given to get_key
+KEY_FIELDS = ('hostname', 'appname', 'msgid', 'severity')
+
+
+def _key_getter(key):
+    if isinstance(key, str):
+        key = (key,)
+    if not key:
+        return lambda values: None
+    try:
+        return operator.itemgetter(*[KEY_FIELDS.index(field) for field in key])
+    except ValueError:
+        raise ValueError('Key fields must be among {0!r}, not {1!r}'.format(KEY_FIELDS, key))
+
+
+class RateLimiter(object):
+    """A token bucket per key, allowing each key rate messages per second on average and bursts of up to burst.
+
+    key names the fields (from KEY_FIELDS) which messages are grouped by; a key is the value of that field for a
+    single field, or a tuple of the values of several. Values are as MessageFilter passes them to predicates, and
+    get_key returns the key for a tuple of the values of KEY_FIELDS.
+
+    At most maxkeys buckets are kept, the least recently used being evicted beyond that, so that a flood of
+    distinct hostnames can't exhaust memory; an evicted key starts again with a full bucket. allowed and dropped
+    count the messages allow() accepted and refused, and evicted the buckets evicted."""
+
+    def __init__(self, rate, burst=None, key=('appname',), maxkeys=10000, clock=time.monotonic):
+        if rate <= 0:
+            raise ValueError('rate must be positive')
+        self.rate = rate
+        self.burst = max(rate, 1) if burst is None else burst
+        self.key = key
+        self.get_key = _key_getter(key)
+        self.maxkeys = maxkeys
+        self._clock = clock
+        # key -> [tokens, time they were counted at]
+        self._buckets = collections.OrderedDict()
+        self.allowed = 0
+        self.dropped = 0
+        self.evicted = 0
+
+    def allow(self, key):
+        """Take a token from key's bucket, returning whether there was one"""
+        if self.check(key):
+            self.take(key)
+            return True
+        return False
+
+    def check(self, key):
+        """Return whether key's bucket has a token, without taking it (but counting the message in dropped if not)"""
+        now = self._clock()
+        buckets = self._buckets
+        bucket = buckets.get(key)
+        if bucket is None:
+            bucket = buckets[key] = [self.burst, now]
+            if len(buckets) > self.maxkeys:
+                buckets.popitem(last=False)
+                self.evicted += 1
+        else:
+            buckets.move_to_end(key)
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+        if bucket[0] >= 1:
+            return True
+        self.dropped += 1
+        return False
+
+    def take(self, key):
+        """Take a token from key's bucket, which check(key) has just found one in"""
+        self._buckets[key][0] -= 1
+        self.allowed += 1
+
+    def tokens(self, key):
+        """Return the tokens left in key's bucket as of its last use (burst for a key without one)"""
+        bucket = self._buckets.get(key)
+        return self.burst if bucket is None else bucket[0]
+
+    def clear(self):
+        """Forget every bucket and reset the counters"""
+        self._buckets.clear()
+        self.allowed = self.dropped = self.evicted = 0
+
+    def __len__(self):
+        return len(self._buckets)
+
+    def __repr__(self):
+        return '{0}(rate={1!r},burst={2!r},key={3!r},maxkeys={4!r})'.format(
+            self.__class__.__name__, self.rate, self.burst, self.key, self.maxkeys
+        )
+
+
+class Sampler(object):
+    """Keep each message with probability rate (between 0 and 1), or the rate given for its key in rates.
+
+    key names the fields which rates is keyed by, as with RateLimiter; no state is kept per key, so memory doesn't
+    grow with their number. seed seeds the random number generator, for reproducible sampling. allowed and dropped
+    count the messages kept and discarded."""
+
+    def __init__(self, rate, key=('appname',), rates=None, seed=None):
+        self.rate = rate
+        self.rates = dict(rates or {})
+        self.key = key
+        self.get_key = _key_getter(key)
+        self._random = random.Random(seed).random
+        self.allowed = 0
+        self.dropped = 0
+
+    def allow(self, key):
+        """Return whether to keep a message with the given key"""
+        if self.check(key):
+            self.take(key)
+            return True
+        return False
+
+    def check(self, key):
+        """Decide whether to keep a message with the given key, counting it in dropped if not"""
+        rate = self.rates.get(key, self.rate) if self.rates else self.rate
+        if rate >= 1 or (rate > 0 and self._random() < rate):
+            return True
+        self.dropped += 1
+        return False
+
+    def take(self, key):
+        """Count a message which check(key) kept (and every other limiter allowed) in allowed"""
+        self.allowed += 1
+
+    def clear(self):
+        """Reset the counters"""
+        self.allowed = self.dropped = 0
+
+    def __repr__(self):
+        return '{0}(rate={1!r},key={2!r},rates={3!r})'.format(
+            self.__class__.__name__, self.rate, self.key, self.rates
+        )
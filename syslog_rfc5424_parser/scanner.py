@@ -0,0 +1,231 @@
+import re
+
+from .parser import Header, SDElement, ParsedMessage, unescape_param_value, register_engine, get_engine
+
+
+# Hand-written scanner for the common, well-formed case. Anything it is not completely sure about raises
+# ScanError so that the caller can fall back to the (much slower) Lark grammar in parser.py, which remains the
+# reference implementation.
+
+_TIMESTAMP = re.compile(
+    r'[0-9]{4}-[0-9]{2}-[0-9]{2}T[0-9]{2}:[0-9]{2}:[0-9]{2}(?:\.[0-9]{1,6})?(?:Z|[+-][0-9]{2}:[0-9]{2})\Z'
+)
+_SD_NAME = re.compile(r'[^= \]"]{1,32}')
+_NOT_PRINTUSASCII = re.compile(r'[^ -~]')
+_DIGITS = '0123456789'
+# <PRI>VERSION SP TIMESTAMP SP HOSTNAME SP APP-NAME SP PROCID SP MSGID SP, each at its maximum length
+_MAX_HEADER_LENGTH = 5 + 3 + 1 + 32 + 1 + 255 + 1 + 48 + 1 + 128 + 1 + 32 + 1
+
+# The whole HEADER (and the SP which follows it) as one anchored regex, with a group per field
+_HEADER_PATTERN = (
+    r'<([0-9]{1,3})>([1-9][0-9]{0,2}) '
+    r'(-|[0-9]{4}-[0-9]{2}-[0-9]{2}T[0-9]{2}:[0-9]{2}:[0-9]{2}(?:\.[0-9]{1,6})?(?:Z|[+-][0-9]{2}:[0-9]{2})) '
+    r'([!-~]{1,255}) ([!-~]{1,48}) ([!-~]{1,128}) ([!-~]{1,32}) '
+)
+_HEADER = re.compile(_HEADER_PATTERN)
+# The bytes scanner matches directly against the caller's buffer (re accepts any bytes-like object), so only the
+# individual fields are ever copied out of it.
+_HEADER_BYTES = re.compile(_HEADER_PATTERN.encode('ascii'))
+_SD_ELEMENT_BYTES = re.compile(br'\[([^= \]"]{1,32})')
+_SD_PARAM_BYTES = re.compile(br' ([^= \]"]{1,32})="((?:[^"\\]|\\.)*)"', re.S)
+_NILVALUE_BYTE = ord('-')
+_CLOSE_BYTE = ord(']')
+_SP_BYTE = ord(' ')
+
+
+class ScanError(ValueError):
+    def __init__(self, field, position):
+        super(ScanError, self).__init__(field, position)
+        self.field = field
+        self.position = position
+
+
+def _is_number(s):
+    return bool(s) and not s.strip(_DIGITS)
+
+
+def scan_header(s):
+    """Scan the HEADER of a message.
+
+    Returns a tuple of (Header, offset), where offset is the index of the first character of STRUCTURED-DATA."""
+    match = _HEADER.match(s)
+    if match is None:
+        _header_error(s)
+    pri, version, timestamp, hostname, appname, procid, msgid = match.groups()
+    if procid.isdigit():
+        procid = int(procid)
+    header = Header(pri=int(pri), version=int(version), timestamp=timestamp, hostname=hostname,
+                    appname=appname, procid=procid, msgid=msgid)
+    return header, match.end()
+
+
+def _header_error(s):
+    """Raise a ScanError for the field which stops s matching _HEADER"""
+    # only ever look at (and copy) as much of s as could possibly be header
+    head = s[:_MAX_HEADER_LENGTH]
+    parts = head.split(' ', 6)
+    if len(parts) != 7:
+        raise ScanError('header', len(head))
+    pri_version, timestamp, hostname, appname, procid, msgid, rest = parts
+    offset = len(head) - len(rest)
+    if _NOT_PRINTUSASCII.search(s, 0, offset):
+        raise ScanError('header', _NOT_PRINTUSASCII.search(s, 0, offset).start())
+    close = pri_version.find('>', 1, 5)
+    if pri_version[:1] != '<' or close == -1:
+        raise ScanError('pri', 0)
+    pri = pri_version[1:close]
+    version = pri_version[close + 1:]
+    if not _is_number(pri):
+        raise ScanError('pri', 1)
+    if not _is_number(version) or len(version) > 3 or version[0] == '0':
+        raise ScanError('version', close + 1)
+    if timestamp != '-' and not _TIMESTAMP.match(timestamp):
+        raise ScanError('timestamp', len(pri_version) + 1)
+    if not hostname or len(hostname) > 255:
+        raise ScanError('hostname', offset)
+    if not appname or len(appname) > 48:
+        raise ScanError('appname', offset)
+    if not procid or len(procid) > 128:
+        raise ScanError('procid', offset)
+    if not msgid or len(msgid) > 32:
+        raise ScanError('msgid', offset)
+    raise ScanError('header', 0)  # pragma: no cover
+
+
+def scan_structured_data(s, pos):
+    """Scan STRUCTURED-DATA starting at pos.
+
+    Returns a tuple of (list of SDElement, offset), where offset is the index just past the structured data."""
+    if s.startswith('-', pos):
+        return [], pos + 1
+    if not s.startswith('[', pos):
+        raise ScanError('structured_data', pos)
+    output = []
+    while s.startswith('[', pos):
+        match = _SD_NAME.match(s, pos + 1)
+        if match is None:
+            raise ScanError('structured_data', pos + 1)
+        sd_id = match.group()
+        pos = match.end()
+        sd_params = []
+        while s.startswith(' ', pos):
+            match = _SD_NAME.match(s, pos + 1)
+            if match is None or not s.startswith('="', match.end()):
+                raise ScanError('structured_data', pos + 1)
+            start = match.end() + 2
+            end = s.find('"', start)
+            # a quote preceded by an odd number of backslashes is escaped; count them in place rather than slicing,
+            # so that a value full of escaped quotes is still scanned in linear time
+            while end != -1:
+                backslash = end - 1
+                while backslash >= start and s[backslash] == '\\':
+                    backslash -= 1
+                if (end - backslash) % 2 == 1:
+                    break
+                end = s.find('"', end + 1)
+            if end == -1:
+                raise ScanError('structured_data', start)
+            sd_params.append((match.group(), unescape_param_value(s[start:end])))
+            pos = end + 1
+        if not s.startswith(']', pos):
+            raise ScanError('structured_data', pos)
+        pos += 1
+        output.append(SDElement(sd_id=sd_id, sd_params=sd_params))
+    return output, pos
+
+
+def scan_message(s, pos):
+    """Return MSG starting at pos (which must be the offset just past STRUCTURED-DATA), or None if there is none"""
+    if pos == len(s):
+        return None
+    if s[pos] != ' ':
+        raise ScanError('msg', pos)
+    return s[pos + 1:]
+
+
+def scan(s):
+    """Scan a message into a ParsedMessage, raising ScanError if it isn't unambiguously well-formed"""
+    header, pos = scan_header(s)
+    structured_data, pos = scan_structured_data(s, pos)
+    return ParsedMessage(header=header, structured_data=structured_data, message=scan_message(s, pos))
+
+
+def scan_header_bytes(buf):
+    """Scan the HEADER of a message held in a bytes-like object; see scan_header()"""
+    match = _HEADER_BYTES.match(buf)
+    if match is None:
+        raise ScanError('header', 0)
+    pri, version, timestamp, hostname, appname, procid, msgid = [str(g, 'ascii') for g in match.groups()]
+    if procid.isdigit():
+        procid = int(procid)
+    header = Header(pri=int(pri), version=int(version), timestamp=timestamp, hostname=hostname,
+                    appname=appname, procid=procid, msgid=msgid)
+    return header, match.end()
+
+
+def scan_structured_data_bytes(buf, pos):
+    """Scan STRUCTURED-DATA held in a bytes-like object; see scan_structured_data()"""
+    size = len(buf)
+    if pos < size and buf[pos] == _NILVALUE_BYTE:
+        return [], pos + 1
+    match = _SD_ELEMENT_BYTES.match(buf, pos)
+    if match is None:
+        raise ScanError('structured_data', pos)
+    output = []
+    try:
+        while match is not None:
+            sd_id = str(match.group(1), 'utf-8')
+            pos = match.end()
+            sd_params = []
+            match = _SD_PARAM_BYTES.match(buf, pos)
+            while match is not None:
+                name, value = match.groups()
+                sd_params.append((str(name, 'utf-8'), unescape_param_value(str(value, 'utf-8'))))
+                pos = match.end()
+                match = _SD_PARAM_BYTES.match(buf, pos)
+            if pos >= size or buf[pos] != _CLOSE_BYTE:
+                raise ScanError('structured_data', pos)
+            pos += 1
+            output.append(SDElement(sd_id=sd_id, sd_params=sd_params))
+            match = _SD_ELEMENT_BYTES.match(buf, pos)
+    except UnicodeDecodeError:
+        raise ScanError('structured_data', pos)
+    return output, pos
+
+
+def scan_message_bytes(buf, pos):
+    """Return the undecoded MSG held in a bytes-like object as bytes; see scan_message()"""
+    if pos == len(buf):
+        return None
+    if buf[pos] != _SP_BYTE:
+        raise ScanError('msg', pos)
+    return bytes(buf[pos + 1:])
+
+
+def scan_bytes(buf):
+    """Scan a message held in a bytes, bytearray or memoryview without decoding or copying the whole buffer.
+
+    Returns a ParsedMessage like scan(), except that the message is the undecoded MSG as bytes (or None). The
+    header must be ASCII and the structured data UTF-8, as required by the RFC; the MSG may be anything."""
+    header, pos = scan_header_bytes(buf)
+    structured_data, pos = scan_structured_data_bytes(buf, pos)
+    return ParsedMessage(header=header, structured_data=structured_data, message=scan_message_bytes(buf, pos))
+
+
+def scan_or_parse(s):
+    """Scan a message into a ParsedMessage, falling back to the grammar if the scanner can't.
+
+    If the grammar rejects the message too, the scanner's ScanError is raised."""
+    try:
+        return scan(s)
+    except ScanError as e:
+        error = e
+    grammar = get_engine('lark')
+    try:
+        return grammar.parse(s)
+    except grammar.errors:
+        raise error
+
+
+register_engine('regex', scan, (ScanError,), scan_bytes)
+register_engine('auto', scan_or_parse, (ScanError,), scan_bytes)
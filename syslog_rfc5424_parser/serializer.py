@@ -0,0 +1,155 @@
+import datetime
+import time
+
+from .constants import SyslogFacility
+from .framing import NON_TRANSPARENT, OCTET_COUNTING
+
+
+_ESCAPES = str.maketrans({'\\': '\\\\', '"': '\\"', ']': '\\]'})
+_LF = b'\n'
+
+# (second, 'YYYY-MM-DDTHH:MM:SS') for the most recently formatted numeric timestamp; messages are mostly serialized
+# in time order, so consecutive timestamps usually fall in the same second
+_last_second = (None, None)
+
+# 9999-12-31T23:59:59Z, the last second a TIMESTAMP can hold; integers beyond it can only be nanoseconds (as
+# parsed with timestamp_format=EPOCH_NS)
+_MAX_EPOCH_SECOND = 253402300799
+
+
+def escape_param_value(value):
+    """Escape '"', '\\' and ']' in a PARAM-VALUE (RFC5424 section 6.3.3)"""
+    value = str(value)
+    if '\\' in value or '"' in value or ']' in value:
+        return value.translate(_ESCAPES)
+    return value
+
+
+def format_timestamp(timestamp):
+    """Format a TIMESTAMP for the wire.
+
+    Numbers are taken as seconds since the epoch and formatted in UTC, with microseconds if they have a fractional
+    part, except that integers too large to be seconds (beyond 9999-12-31T23:59:59Z) are taken as nanoseconds,
+    as timestamps.EPOCH_NS produces; nanoseconds are truncated to the microseconds a TIMESTAMP can hold.
+    Datetimes keep their offset, or are taken to be in UTC if they have none. None becomes NILVALUE, and strings
+    are passed through as-is."""
+    global _last_second
+    if timestamp is None:
+        return '-'
+    if isinstance(timestamp, datetime.datetime):
+        if timestamp.tzinfo is None:
+            return timestamp.isoformat() + 'Z'
+        return timestamp.isoformat()
+    if not isinstance(timestamp, (int, float)):
+        return timestamp
+    if isinstance(timestamp, float):
+        second, microsecond = divmod(int(round(timestamp * 1000000)), 1000000)
+    elif timestamp > _MAX_EPOCH_SECOND:
+        second, microsecond = divmod(timestamp // 1000, 1000000)
+    else:
+        second, microsecond = timestamp, 0
+    cached_second, prefix = _last_second
+    if cached_second != second:
+        prefix = time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(second))
+        _last_second = (second, prefix)
+    if microsecond:
+        return '{0}.{1:06d}Z'.format(prefix, microsecond)
+    return prefix + 'Z'
+
+
+def format_structured_data(sd):
+    """Format a dict of SD-ID to dicts of PARAM-NAME to PARAM-VALUE as STRUCTURED-DATA"""
+    if not sd:
+        return '-'
+    parts = []
+    append = parts.append
+    for sd_id, sd_params in sd.items():
+        append('[')
+        append(sd_id)
+        for k, v in sd_params.items():
+            # escape_param_value, inlined
+            if v.__class__ is not str:
+                v = str(v)
+            if '\\' in v or '"' in v or ']' in v:
+                v = v.translate(_ESCAPES)
+            append(' {0}="{1}"'.format(k, v))
+        append(']')
+    return ''.join(parts)
+
+
+def format_head(message):
+    """Format everything preceding the MSG of a SyslogMessage: its HEADER, a space and its STRUCTURED-DATA"""
+    facility = message.facility
+    if facility == SyslogFacility.unknown:
+        raise ValueError('Cannot dump a SyslogMessage with unknown facility')
+    hostname = message.hostname
+    appname = message.appname
+    procid = message.procid
+    msgid = message.msgid
+    return '<{0}>{1} {2} {3} {4} {5} {6} {7}'.format(
+        int(facility) * 8 + int(message.severity), message.version, format_timestamp(message.timestamp),
+        '-' if hostname is None else hostname, '-' if appname is None else appname,
+        '-' if procid is None else procid, '-' if msgid is None else msgid,
+        format_structured_data(message.sd)
+    )
+
+
+def format_message(message):
+    """Format a SyslogMessage as a string"""
+    head = format_head(message)
+    msg = message.msg
+    if msg:
+        return '{0} {1}'.format(head, msg)
+    return head
+
+
+def _encode(message):
+    head = format_head(message).encode('utf-8', 'surrogateescape')
+    # a BytesSyslogMessage still holds its MSG as octets, which are written back out untouched
+    raw_msg = getattr(message, 'raw_msg', None)
+    if raw_msg is None:
+        msg = message.msg
+        if not msg:
+            return head
+        raw_msg = str(msg).encode('utf-8', 'surrogateescape')
+    elif not raw_msg:
+        return head
+    return b''.join((head, b' ', raw_msg))
+
+
+def to_bytes(message, framing=None):
+    """Encode a SyslogMessage for the wire.
+
+    The message is encoded as UTF-8 (with lone surrogates from decode_msg mapped back to the original octets). If
+    framing is OCTET_COUNTING or NON_TRANSPARENT, the message is framed per RFC6587 for sending over a stream."""
+    data = _encode(message)
+    if framing is None:
+        return data
+    if framing == OCTET_COUNTING:
+        return b'%d %s' % (len(data), data)
+    if framing == NON_TRANSPARENT:
+        return data + _LF
+    raise ValueError('Unknown framing {0!r}'.format(framing))
+
+
+def serialize_many(messages, framing=NON_TRANSPARENT, out=None):
+    """Encode and frame many SyslogMessages (see to_bytes), appending them to the bytearray out.
+
+    Returns out (a new bytearray if it wasn't given); clearing and passing the same bytearray for each batch avoids
+    reallocating it. With NON_TRANSPARENT framing every message is terminated by LF, so messages whose MSG
+    contains LF should be sent with OCTET_COUNTING instead."""
+    if out is None:
+        out = bytearray()
+    encode = _encode
+    if framing == NON_TRANSPARENT:
+        for message in messages:
+            out += encode(message)
+            out += _LF
+    elif framing == OCTET_COUNTING:
+        for message in messages:
+            data = encode(message)
+            out += b'%d ' % len(data)
+            out += data
+    else:
+        raise ValueError('Unknown framing {0!r}'.format(framing))
+    return out
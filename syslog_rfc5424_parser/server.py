@@ -0,0 +1,293 @@
+import asyncio
+import logging
+import os
+import socket
+
+from .export import dump_jsonl
+from .framing import Framer, DEFAULT_MAX_MESSAGE_SIZE
+from .message import SyslogMessage
+from .receiver import DatagramReceiver
+
+
+log = logging.getLogger(__name__)
+
+
+class ServerStats(object):
+    """Counters maintained by a SyslogServer"""
+
+    __slots__ = ['received', 'parsed', 'parse_errors', 'dropped', 'framing_errors', 'connections', 'pauses']
+
+    def __init__(self):
+        for k in self.__slots__:
+            setattr(self, k, 0)
+
+    def as_dict(self):
+        return dict((k, getattr(self, k)) for k in self.__slots__)
+
+    def __repr__(self):
+        return '{0}({1})'.format(
+            self.__class__.__name__,
+            ','.join('{0}={1!r}'.format(k, getattr(self, k)) for k in self.__slots__)
+        )
+
+
+class _DatagramProtocol(asyncio.DatagramProtocol):
+    def __init__(self, server):
+        self.server = server
+
+    def datagram_received(self, data, addr):
+        self.server.submit_datagram(data)
+
+    def error_received(self, exc):
+        log.warning('error receiving datagram: %s', exc)
+
+
+class _StreamProtocol(asyncio.Protocol):
+    def __init__(self, server):
+        self.server = server
+        self.framer = Framer(server.max_message_size, on_error=self._framing_error)
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self.server._connection_made(self)
+
+    def connection_lost(self, exc):
+        self.server._connection_lost(self)
+
+    def data_received(self, data):
+        messages = self.framer.feed(data)
+        if messages:
+            self.server.submit_stream(self, messages)
+
+    def eof_received(self):
+        messages = self.framer.flush()
+        if messages:
+            self.server.submit_stream(self, messages)
+
+    def _framing_error(self, error, offset):
+        self.server._framing_error(self, error, offset)
+
+
+class SyslogServer(object):
+    """An asyncio syslog receiver for UDP, UNIX datagram and TCP (RFC6587 octet-counting or LF framing) sockets.
+
+    Received messages are queued, parsed in batches of up to batch_size with SyslogMessage.parse_many (or
+    another callable with the same signature, given as parse), and handed to sink, a coroutine function which
+    is awaited with each list of parsed messages.
+
+    At most max_pending raw messages are queued. Beyond that, datagrams are dropped (and counted in
+    stats.dropped) and stream connections stop being read from until the queue has drained to half that size,
+    so a slow sink pushes back on TCP senders rather than growing memory without bound. If given,
+    recv_buffer_size is applied (as SO_RCVBUF) to every socket, which is the main defense against the kernel
+    dropping datagrams during bursts. A malformed frame on a stream connection is counted in stats.framing_errors
+    and skipped up to the next LF, and the connection carries on being read.
+
+    Call one or more of the start_* coroutines, then serve_forever() (or close() and wait_closed())."""
+
+    def __init__(self, sink, batch_size=1000, max_pending=100000, recv_buffer_size=None,
+                 max_message_size=DEFAULT_MAX_MESSAGE_SIZE, parse=SyslogMessage.parse_many, loop=None):
+        self.sink = sink
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        self.recv_buffer_size = recv_buffer_size
+        self.max_message_size = max_message_size
+        self.parse = parse
+        self.stats = ServerStats()
+        self._loop = loop or asyncio.get_event_loop()
+        self.receivers = []
+        self._pending = []
+        self._parsed = []
+        self._ready = asyncio.Event()
+        self._paused = set()
+        self._paused_receivers = []
+        self._connections = set()
+        self._transports = []
+        self._servers = []
+        self._consumer = None
+        self._closed = False
+
+    def _configure_socket(self, sock):
+        if self.recv_buffer_size is not None:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.recv_buffer_size)
+        sock.setblocking(False)
+        return sock
+
+    def _ensure_consumer(self):
+        if self._consumer is None:
+            self._consumer = self._loop.create_task(self._consume())
+
+    async def start_udp(self, host='0.0.0.0', port=514, batched=False, **receiver_options):
+        """Listen for datagrams on a UDP socket; returns the bound address.
+
+        See start_unix_datagram for batched and receiver_options."""
+        family = socket.AF_INET6 if ':' in host else socket.AF_INET
+        sock = self._configure_socket(socket.socket(family, socket.SOCK_DGRAM))
+        sock.bind((host, port))
+        return await self._start_datagram(sock, batched, receiver_options)
+
+    async def start_unix_datagram(self, path, batched=False, **receiver_options):
+        """Listen for datagrams on a UNIX domain socket bound at path (atomically replacing anything there).
+
+        If batched is true, each wakeup drains every available datagram into one preallocated buffer with a
+        DatagramReceiver (constructed with receiver_options, and appended to self.receivers so that its counters can
+        be inspected) and parses them straight out of it as a single batch. When the queue of parsed messages is
+        full, the socket simply isn't read, so that excess load is shed (and counted) by the kernel."""
+        sock = self._configure_socket(socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM))
+        temp_name = path + '.' + str(os.getpid())
+        sock.bind(temp_name)
+        os.rename(temp_name, path)
+        return await self._start_datagram(sock, batched, receiver_options)
+
+    async def _start_datagram(self, sock, batched, receiver_options):
+        if batched:
+            receiver = DatagramReceiver(sock, **receiver_options)
+            self.receivers.append(receiver)
+            self._loop.add_reader(receiver.fileno(), self._drain, receiver)
+        else:
+            transport, _ = await self._loop.create_datagram_endpoint(lambda: _DatagramProtocol(self), sock=sock)
+            self._transports.append(transport)
+        self._ensure_consumer()
+        return sock.getsockname()
+
+    async def start_tcp(self, host='0.0.0.0', port=514, backlog=100):
+        """Accept RFC6587-framed streams on a TCP socket; returns the bound address"""
+        family = socket.AF_INET6 if ':' in host else socket.AF_INET
+        sock = self._configure_socket(socket.socket(family, socket.SOCK_STREAM))
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((host, port))
+        server = await self._loop.create_server(lambda: _StreamProtocol(self), sock=sock, backlog=backlog)
+        self._servers.append(server)
+        self._ensure_consumer()
+        return sock.getsockname()
+
+    def submit_datagram(self, data):
+        """Queue one raw message which cannot be flow-controlled, dropping it if the queue is full"""
+        self.stats.received += 1
+        if len(self._pending) >= self.max_pending:
+            self.stats.dropped += 1
+            return
+        self._pending.append(data)
+        self._ready.set()
+
+    def submit_stream(self, protocol, messages):
+        """Queue raw messages from a stream connection, pausing it if the queue is full"""
+        self.stats.received += len(messages)
+        self._pending.extend(messages)
+        self._ready.set()
+        if len(self._pending) >= self.max_pending and protocol not in self._paused:
+            protocol.transport.pause_reading()
+            self._paused.add(protocol)
+            self.stats.pauses += 1
+
+    def _drain(self, receiver):
+        views = receiver.drain()
+        if not views:
+            return
+        self.stats.received += len(views)
+        # the views point into the receiver's buffer, so they have to be parsed before it is next drained
+        result = self.parse(views)
+        self.stats.parsed += len(result.messages)
+        self.stats.parse_errors += len(result.errors)
+        self._parsed.extend(result.messages)
+        self._ready.set()
+        if len(self._parsed) >= self.max_pending:
+            self._loop.remove_reader(receiver.fileno())
+            self._paused_receivers.append(receiver)
+            self.stats.pauses += 1
+
+    def _connection_made(self, protocol):
+        self.stats.connections += 1
+        self._connections.add(protocol)
+
+    def _connection_lost(self, protocol):
+        self._connections.discard(protocol)
+        self._paused.discard(protocol)
+
+    def _framing_error(self, protocol, error, offset):
+        self.stats.framing_errors += 1
+        log.warning('skipping bad frame at byte %d of a connection: %s', offset, error)
+
+    def _resume_paused(self):
+        for protocol in self._paused:
+            if not protocol.transport.is_closing():
+                protocol.transport.resume_reading()
+        self._paused.clear()
+
+    def _resume_receivers(self):
+        for receiver in self._paused_receivers:
+            if not self._closed:
+                self._loop.add_reader(receiver.fileno(), self._drain, receiver)
+        del self._paused_receivers[:]
+
+    async def _sink(self, messages):
+        try:
+            await self.sink(messages)
+        except Exception:
+            log.exception('sink failed on a batch of %d messages', len(messages))
+
+    async def _consume(self):
+        pending = self._pending
+        parsed = self._parsed
+        while True:
+            await self._ready.wait()
+            self._ready.clear()
+            while parsed:
+                messages = parsed[:self.batch_size]
+                del parsed[:self.batch_size]
+                if self._paused_receivers and len(parsed) <= self.max_pending // 2:
+                    self._resume_receivers()
+                await self._sink(messages)
+            while pending:
+                batch = pending[:self.batch_size]
+                del pending[:self.batch_size]
+                if self._paused and len(pending) <= self.max_pending // 2:
+                    self._resume_paused()
+                result = self.parse(batch)
+                self.stats.parsed += len(result.messages)
+                self.stats.parse_errors += len(result.errors)
+                if result.messages:
+                    await self._sink(result.messages)
+            if self._closed and not parsed:
+                return
+
+    async def serve_forever(self):
+        """Run until cancelled"""
+        self._ensure_consumer()
+        try:
+            await self._consumer
+        finally:
+            self.close()
+
+    def close(self):
+        """Stop listening; messages which have already been received are still parsed and passed to the sink"""
+        if self._closed:
+            return
+        self._closed = True
+        for transport in self._transports:
+            transport.close()
+        for receiver in self.receivers:
+            if receiver not in self._paused_receivers:
+                self._loop.remove_reader(receiver.fileno())
+            receiver.sock.close()
+        for server in self._servers:
+            server.close()
+        for protocol in list(self._connections):
+            protocol.transport.close()
+        self._ready.set()
+
+    async def wait_closed(self):
+        """Wait for the queue to be drained after close()"""
+        for server in self._servers:
+            await server.wait_closed()
+        if self._consumer is not None and not self._consumer.done():
+            await self._consumer
+
+
+def json_lines_sink(fileobj):
+    """Return a sink writing each message to fileobj (opened in text mode) as a line of JSON"""
+    async def sink(messages):
+        dump_jsonl(messages, fileobj)
+        fileobj.flush()
+
+    return sink
@@ -0,0 +1,167 @@
+import collections
+
+
+INDEXED_FIELDS = ('severity', 'hostname', 'appname')
+
+
+def _sd_keys(sd):
+    # (SD-ID,), (SD-ID, PARAM-NAME) and (SD-ID, PARAM-NAME, PARAM-VALUE) for every SD-PARAM
+    keys = []
+    for sd_id, sd_params in sd.items():
+        keys.append((sd_id,))
+        for name, value in sd_params.items():
+            keys.append((sd_id, name))
+            keys.append((sd_id, name, value))
+    return keys
+
+
+def _add(index, key, position):
+    postings = index.get(key)
+    if postings is None:
+        postings = index[key] = collections.deque()
+    postings.append(position)
+
+
+def _remove_oldest(index, key, position):
+    # the message being evicted is the oldest, so its position is at the front of every list it is in
+    postings = index.get(key)
+    if postings and postings[0] == position:
+        postings.popleft()
+        if not postings:
+            del index[key]
+
+
+class MessageStore(object):
+    """A container of parsed messages, indexed for finding them by structured data and header fields.
+
+    Every appended message gets a position, which increases by one per message and never changes. Inverted indexes
+    map each SD-ID, (SD-ID, PARAM-NAME) and (SD-ID, PARAM-NAME, PARAM-VALUE), and each value of the fields in
+    INDEXED_FIELDS, to the positions of the messages which have it, and are updated as messages are appended and
+    evicted; find() only looks at the messages in the shortest of the lists its criteria select.
+
+    If maxlen is given, appending beyond it evicts the oldest message. Messages must not be modified once they have
+    been appended, and PARAM-VALUEs must be hashable (as parsed ones are)."""
+
+    def __init__(self, maxlen=None):
+        self.maxlen = maxlen
+        self._messages = {}
+        # the position of the oldest message, and the one the next message appended will get
+        self._first = 0
+        self._next = 0
+        self._sd_index = {}
+        self._field_indexes = dict((field, {}) for field in INDEXED_FIELDS)
+
+    def append(self, message):
+        """Add a message (evicting the oldest if the store is full), returning its position"""
+        position = self._next
+        self._next += 1
+        self._messages[position] = message
+        sd_index = self._sd_index
+        for key in _sd_keys(message.sd):
+            _add(sd_index, key, position)
+        for field, index in self._field_indexes.items():
+            _add(index, getattr(message, field), position)
+        if self.maxlen is not None and len(self._messages) > self.maxlen:
+            self._evict()
+        return position
+
+    def extend(self, messages):
+        """Append each of messages"""
+        for message in messages:
+            self.append(message)
+
+    def _evict(self):
+        position = self._first
+        message = self._messages.pop(position)
+        self._first += 1
+        sd_index = self._sd_index
+        for key in _sd_keys(message.sd):
+            _remove_oldest(sd_index, key, position)
+        for field, index in self._field_indexes.items():
+            _remove_oldest(index, getattr(message, field), position)
+
+    def __len__(self):
+        return len(self._messages)
+
+    def __iter__(self):
+        """Iterate over the messages, oldest first"""
+        return iter(list(self._messages.values()))
+
+    def __getitem__(self, position):
+        try:
+            return self._messages[position]
+        except KeyError:
+            raise IndexError('no message at position {0} (holding {1} to {2})'.format(
+                position, self._first, self._next - 1))
+
+    def _candidates(self, sd_id, param, value, fields):
+        # the list of positions which each criterion selects
+        if param is not None and sd_id is None:
+            raise ValueError('param needs an sd_id')
+        if value is not None and param is None:
+            raise ValueError('value needs a param')
+        candidates = []
+        if sd_id is not None:
+            key = (sd_id,) if param is None else (sd_id, param) if value is None else (sd_id, param, value)
+            candidates.append(self._sd_index.get(key, ()))
+        for field, field_value in fields.items():
+            try:
+                index = self._field_indexes[field]
+            except KeyError:
+                raise TypeError('{0!r} is not an indexed field'.format(field))
+            candidates.append(index.get(field_value, ()))
+        return candidates
+
+    def positions(self, sd_id=None, param=None, value=None, **fields):
+        """Return the positions of the messages matching all of the given criteria, oldest first.
+
+        sd_id selects messages with that SD-ID; param (which needs sd_id) those whose SD-ELEMENT has that
+        PARAM-NAME; and value (which needs param) those where it has that value. Keyword arguments named after
+        INDEXED_FIELDS select messages with that value for the field. With no criteria, every position is
+        returned."""
+        candidates = self._candidates(sd_id, param, value, fields)
+        if not candidates:
+            return list(self._messages)
+        shortest = min(candidates, key=len)
+        if len(candidates) == 1:
+            return list(shortest)
+        # checking the other criteria against each candidate message is cheaper than intersecting the lists
+        messages = self._messages
+        matches = self._matches
+        return [position for position in shortest if matches(messages[position], sd_id, param, value, fields)]
+
+    @staticmethod
+    def _matches(message, sd_id, param, value, fields):
+        for field, field_value in fields.items():
+            if getattr(message, field) != field_value:
+                return False
+        if sd_id is not None:
+            sd_params = message.sd.get(sd_id)
+            if sd_params is None:
+                return False
+            if param is not None:
+                if param not in sd_params:
+                    return False
+                if value is not None and sd_params[param] != value:
+                    return False
+        return True
+
+    def find(self, sd_id=None, param=None, value=None, **fields):
+        """Return the messages matching all of the given criteria (see positions), oldest first"""
+        messages = self._messages
+        return [messages[position] for position in self.positions(sd_id, param, value, **fields)]
+
+    def count(self, sd_id=None, param=None, value=None, **fields):
+        """Return the number of messages matching all of the given criteria (see positions)"""
+        candidates = self._candidates(sd_id, param, value, fields)
+        if len(candidates) == 1:
+            return len(candidates[0])
+        return len(self.positions(sd_id, param, value, **fields))
+
+    def clear(self):
+        """Remove every message; positions carry on from where they were"""
+        self._messages.clear()
+        self._first = self._next
+        self._sd_index.clear()
+        for index in self._field_indexes.values():
+            index.clear()
@@ -0,0 +1,108 @@
+from . import parser
+from .framing import Framer, FramingError, AUTO, NON_TRANSPARENT, DEFAULT_MAX_MESSAGE_SIZE
+from .message import SyslogMessage
+
+
+DEFAULT_BLOCK_SIZE = 1 << 20
+
+_LF = b'\n'
+_CR = b'\r'
+
+
+def _read_blocks(fileobj, block_size):
+    read = fileobj.read
+    while True:
+        block = read(block_size)
+        if not block:
+            return
+        yield block
+
+
+def _split_lines(blocks, max_message_size, on_error):
+    # Plain newline-delimited input is common enough (and bytes.split() enough faster than framing messages one at
+    # a time) to be worth handling specially
+    remainder = b''
+    # the offset in the stream of the start of remainder, and whether an oversized line is being skipped
+    offset = 0
+    skipping = False
+    for block in blocks:
+        if skipping:
+            end = block.find(_LF)
+            offset += len(block) if end == -1 else end + 1
+            if end == -1:
+                continue
+            block = block[end + 1:]
+            skipping = False
+        chunk = remainder + block if remainder else block
+        lines = chunk.split(_LF)
+        remainder = lines.pop()
+        offset += len(chunk) - len(remainder)
+        if len(remainder) > max_message_size:
+            error = FramingError('Frame too large', len(remainder))
+            if on_error is None:
+                raise error
+            on_error(error, offset)
+            offset += len(remainder)
+            remainder = b''
+            skipping = True
+        if _CR in chunk:
+            lines = [line[:-1] if line.endswith(_CR) else line for line in lines]
+        lines = [line for line in lines if line]
+        if lines:
+            yield lines
+    if remainder.endswith(_CR):
+        remainder = remainder[:-1]
+    if remainder:
+        yield [remainder]
+
+
+def _frame(blocks, max_message_size, framing, on_error):
+    framer = Framer(max_message_size, framing, on_error)
+    for block in blocks:
+        messages = framer.feed(block)
+        if messages:
+            yield messages
+    messages = framer.flush()
+    if messages:
+        yield messages
+
+
+def iter_frames(fileobj, framing=AUTO, block_size=DEFAULT_BLOCK_SIZE, max_message_size=DEFAULT_MAX_MESSAGE_SIZE,
+                on_framing_error=None):
+    """Read a binary stream in blocks of block_size, yielding lists of the raw messages (as bytes) framed within it.
+
+    fileobj may be anything with a read() method returning bytes: a file opened in binary mode, sys.stdin.buffer,
+    an mmap, a socket.makefile('rb'), etc. See framing.Framer for the meaning of framing and max_message_size, and
+    of on_framing_error (Framer's on_error; without it, a bad frame raises FramingError and ends the stream);
+    memory use is bounded by block_size plus max_message_size, however large the stream."""
+    blocks = _read_blocks(fileobj, block_size)
+    if framing == NON_TRANSPARENT:
+        return _split_lines(blocks, max_message_size, on_framing_error)
+    return _frame(blocks, max_message_size, framing, on_framing_error)
+
+
+def iter_batches(fileobj, parse=SyslogMessage.parse_many, **kwargs):
+    """Parse a binary stream (see iter_frames, which takes the same keyword arguments), yielding a BatchResult for
+    each block read. The indexes of errors count messages from the start of the stream."""
+    offset = 0
+    for frames in iter_frames(fileobj, **kwargs):
+        result = parse(frames)
+        if offset and result.errors:
+            result = parser.BatchResult(
+                result.messages,
+                [parser.BatchError(offset + e.index, e.description) for e in result.errors]
+            )
+        offset += len(frames)
+        yield result
+
+
+def iter_messages(fileobj, on_error=None, **kwargs):
+    """Parse a binary stream (see iter_frames, which takes the same keyword arguments), yielding SyslogMessages.
+
+    Messages which can't be parsed are skipped, after passing their BatchError to on_error if it is given."""
+    for result in iter_batches(fileobj, **kwargs):
+        if on_error is not None:
+            for error in result.errors:
+                on_error(error)
+        for message in result.messages:
+            yield message
@@ -0,0 +1,136 @@
+from collections.abc import Mapping
+
+from .cache import InternCache
+
+
+class SDParams(Mapping):
+    """A read-only mapping of the PARAM-NAMEs of one SD-ELEMENT to their values, as a view into StructuredData"""
+
+    __slots__ = ['_names', '_values', '_start']
+
+    def __init__(self, names, values, start=0):
+        self._names = names
+        self._values = values
+        self._start = start
+
+    def __getitem__(self, name):
+        try:
+            return self._values[self._start + self._names.index(name)]
+        except ValueError:
+            raise KeyError(name)
+
+    def __iter__(self):
+        return iter(self._names)
+
+    def __len__(self):
+        return len(self._names)
+
+    def __contains__(self, name):
+        return name in self._names
+
+    def values(self):
+        return self._values[self._start:self._start + len(self._names)]
+
+    def items(self):
+        return list(zip(self._names, self.values()))
+
+    def __repr__(self):
+        return repr(dict(self.items()))
+
+
+class StructuredData(Mapping):
+    """An immutable, compact mapping of SD-IDs to SDParams, for holding many messages in memory.
+
+    Rather than a dict per SD-ELEMENT, a message's STRUCTURED-DATA is one flat tuple of PARAM-VALUEs plus a layout:
+    a tuple of (SD-ID, tuple of PARAM-NAMEs, offset of the first value) per SD-ELEMENT. Messages from the same
+    source almost always share a layout, so layouts are interned and each distinct one is only stored once.
+
+    Compares equal to a dict of dicts with the same contents; use to_dict() for a mutable (or JSON-serializable)
+    copy."""
+
+    __slots__ = ['_layout', '_values']
+
+    def __init__(self, layout=(), values=()):
+        self._layout = layout
+        self._values = values
+
+    @classmethod
+    def from_dict(cls, sd, intern=None):
+        """Construct from a mapping of SD-IDs to mappings of PARAM-NAMEs to values, sharing the layout through
+        intern (a callable with the signature of dict.setdefault; by default, a module-wide InternCache)"""
+        if isinstance(sd, StructuredData):
+            return sd
+        if not sd:
+            return EMPTY
+        layout = []
+        values = []
+        for sd_id, params in sd.items():
+            layout.append((sd_id, tuple(params), len(values)))
+            values.extend(params.values())
+        layout = tuple(layout)
+        return cls((intern or _layouts.setdefault)(layout, layout), tuple(values))
+
+    @classmethod
+    def from_parsed(cls, structured_data, intern=None):
+        """Construct from a list of parsed SDElements (see from_dict). As with a dict, repeated SD-IDs are merged
+        and a repeated PARAM-NAME keeps its last value."""
+        if not structured_data:
+            return EMPTY
+        layout = []
+        values = []
+        sd_ids = set()
+        for sd_id, sd_params in structured_data:
+            names = tuple([param[0] for param in sd_params])
+            if sd_id in sd_ids or len(set(names)) != len(names):
+                return cls.from_dict(_merge(structured_data), intern)
+            sd_ids.add(sd_id)
+            layout.append((sd_id, names, len(values)))
+            values.extend([param[1] for param in sd_params])
+        layout = tuple(layout)
+        return cls((intern or _layouts.setdefault)(layout, layout), tuple(values))
+
+    def __getitem__(self, sd_id):
+        for element_id, names, start in self._layout:
+            if element_id == sd_id:
+                return SDParams(names, self._values, start)
+        raise KeyError(sd_id)
+
+    def __iter__(self):
+        return (element[0] for element in self._layout)
+
+    def __len__(self):
+        return len(self._layout)
+
+    def items(self):
+        values = self._values
+        return [(sd_id, SDParams(names, values, start)) for sd_id, names, start in self._layout]
+
+    def to_dict(self):
+        """Return the contents as a (new) dict of dicts"""
+        values = self._values
+        return dict(
+            (sd_id, dict(zip(names, values[start:start + len(names)]))) for sd_id, names, start in self._layout
+        )
+
+    def __eq__(self, other):
+        if isinstance(other, StructuredData) and self._layout is other._layout:
+            return self._values == other._values
+        return Mapping.__eq__(self, other)
+
+    def __repr__(self):
+        return 'StructuredData({0!r})'.format(self.to_dict())
+
+
+def _merge(structured_data):
+    sd = {}
+    for item in structured_data:
+        params = sd.setdefault(item.sd_id, {})
+        for param_name, param_value in item.sd_params:
+            params[param_name] = param_value
+    return sd
+
+
+EMPTY = StructuredData()
+
+# shared layouts, for messages parsed without an intern of their own
+_layouts = InternCache(maxsize=4096)
@@ -0,0 +1,119 @@
+from .constants import SyslogFacility
+from .framing import NON_TRANSPARENT, OCTET_COUNTING
+from .message import BytesSyslogMessage, SyslogMessage
+from .serializer import _ESCAPES, format_timestamp
+
+
+class MessageTemplate(object):
+    """A precompiled message, for emitting many messages which only differ in a few fields.
+
+    The facility, version, HOSTNAME, APP-NAME, PROCID and MSGID, and the SD-IDs and PARAM-NAMEs of the structured
+    data (sd_layout: a sequence of (SD-ID, sequence of PARAM-NAMEs), or a mapping of SD-IDs to those), are fixed
+    and formatted once, along with the <PRI> for each severity. render() then only formats the timestamp, the
+    PARAM-VALUEs (given in layout order) and the MSG, producing the same bytes as SyslogMessage.to_bytes() would
+    for a message with those fields, framed per framing (None, OCTET_COUNTING or NON_TRANSPARENT)."""
+
+    def __init__(self, facility, hostname='-', appname='-', procid=None, msgid=None, sd_layout=(), version=1,
+                 framing=None):
+        if facility == SyslogFacility.unknown:
+            raise ValueError('Cannot dump a SyslogMessage with unknown facility')
+        if framing not in (None, OCTET_COUNTING, NON_TRANSPARENT):
+            raise ValueError('Unknown framing {0!r}'.format(framing))
+        if hasattr(sd_layout, 'items'):
+            sd_layout = sd_layout.items()
+        self.facility = facility
+        self.version = version
+        self.hostname = '-' if hostname is None else hostname
+        self.appname = '-' if appname is None else appname
+        self.procid = procid
+        self.msgid = msgid
+        self.sd_layout = tuple((sd_id, tuple(names)) for sd_id, names in sd_layout)
+        self.framing = framing
+        # '<PRI>VERSION ' for each severity
+        self._heads = tuple('<{0}>{1} '.format(int(facility) * 8 + severity, version) for severity in range(8))
+        # ' HOSTNAME APP-NAME PROCID MSGID ', then the STRUCTURED-DATA around its values: n + 1 pieces for n values
+        self._middle = ' {0} {1} {2} {3} '.format(self.hostname, self.appname, '-' if procid is None else procid,
+                                                  '-' if msgid is None else msgid)
+        if not self.sd_layout:
+            self._sd_pieces = ('-',)
+        else:
+            pieces = []
+            piece = ''
+            for sd_id, names in self.sd_layout:
+                piece += '[' + sd_id
+                for name in names:
+                    pieces.append(piece + ' {0}="'.format(name))
+                    piece = '"'
+                piece += ']'
+            pieces.append(piece)
+            self._sd_pieces = tuple(pieces)
+
+    @classmethod
+    def from_message(cls, message, framing=None):
+        """Construct a template fixing everything but the timestamp, severity, SD values and MSG of message"""
+        return cls(message.facility, message.hostname, message.appname, message.procid, message.msgid,
+                   [(sd_id, list(sd_params)) for sd_id, sd_params in message.sd.items()], message.version, framing)
+
+    @property
+    def sd_size(self):
+        """The number of PARAM-VALUEs render() takes"""
+        return len(self._sd_pieces) - 1
+
+    def render(self, severity, msg=None, timestamp=None, sd_values=(), out=None):
+        """Return a message with the given severity, MSG (bytes, which are written untouched, or anything else,
+        which is formatted with str()), timestamp (anything format_timestamp accepts; None for NILVALUE) and
+        PARAM-VALUEs (in sd_layout order) as bytes.
+
+        If out (a bytearray) is given, the message is appended to it instead and out is returned; clearing and
+        passing the same bytearray for each batch avoids reallocating it."""
+        pieces = self._sd_pieces
+        if len(sd_values) != len(pieces) - 1:
+            raise ValueError('Expected {0} SD values, got {1}'.format(len(pieces) - 1, len(sd_values)))
+        parts = [self._heads[severity], format_timestamp(timestamp), self._middle, pieces[0]]
+        append = parts.append
+        for piece, value in zip(pieces[1:], sd_values):
+            # serializer.escape_param_value, inlined
+            if value.__class__ is not str:
+                value = str(value)
+            if '\\' in value or '"' in value or ']' in value:
+                value = value.translate(_ESCAPES)
+            append(value)
+            append(piece)
+        raw_msg = None
+        if msg:
+            if isinstance(msg, (bytes, bytearray, memoryview)):
+                raw_msg = bytes(msg)
+            else:
+                append(' ')
+                # anything else is formatted with str(), as to_bytes() does
+                append(msg if msg.__class__ is str else str(msg))
+        data = ''.join(parts).encode('utf-8', 'surrogateescape')
+        if raw_msg is not None:
+            data = b''.join((data, b' ', raw_msg))
+        framing = self.framing
+        if out is None:
+            if framing is None:
+                return data
+            if framing == OCTET_COUNTING:
+                return b'%d %s' % (len(data), data)
+            return data + b'\n'
+        if framing == OCTET_COUNTING:
+            out += b'%d ' % len(data)
+        out += data
+        if framing == NON_TRANSPARENT:
+            out += b'\n'
+        return out
+
+    def message(self, severity, msg=None, timestamp=None, sd_values=()):
+        """Return a SyslogMessage with the fields render() would format"""
+        if len(sd_values) != self.sd_size:
+            raise ValueError('Expected {0} SD values, got {1}'.format(self.sd_size, len(sd_values)))
+        sd = {}
+        values = iter(sd_values)
+        for sd_id, names in self.sd_layout:
+            params = sd.setdefault(sd_id, {})
+            for name in names:
+                params[name] = next(values)
+        cls = BytesSyslogMessage if isinstance(msg, (bytes, bytearray, memoryview)) else SyslogMessage
+        return cls(severity, self.facility, self.version, timestamp, self.hostname, self.appname, self.procid,
+                   self.msgid, sd, msg)
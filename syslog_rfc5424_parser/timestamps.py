@@ -0,0 +1,103 @@
+import calendar
+import datetime
+
+
+RAW = 'raw'
+EPOCH = 'epoch'
+EPOCH_NS = 'epoch_ns'
+DATETIME = 'datetime'
+TIMESTAMP_FORMATS = (RAW, EPOCH, EPOCH_NS, DATETIME)
+
+# 10 ** n, 10 ** (6 - n) and 10 ** (9 - n) for a TIME-SECFRAC of n digits
+_FRACTION_DIVISOR = tuple(10 ** n for n in range(7))
+_MICROSECOND_SCALE = tuple(10 ** (6 - n) for n in range(7))
+_NANOSECOND_SCALE = tuple(10 ** (9 - n) for n in range(7))
+
+
+class TimestampParser(object):
+    """Convert RFC5424 TIMESTAMPs (as accepted by the parser) to another form.
+
+    With EPOCH, timestamps become seconds since the epoch as a float; with EPOCH_NS, nanoseconds since the epoch as
+    an int; and with DATETIME, timezone-aware datetime.datetime objects carrying the message's own offset. NILVALUE
+    becomes None. A timestamp naming a nonexistent date or time (such as a 13th month) raises ValueError.
+
+    Everything up to the seconds, plus the offset, is converted once and cached (up to maxsize distinct seconds;
+    the cache is emptied when it fills), so a burst of messages within the same second costs a dict lookup each
+    plus the handling of any fractional seconds."""
+
+    def __init__(self, timestamp_format=EPOCH, maxsize=4096):
+        for known_format in (EPOCH, EPOCH_NS, DATETIME):
+            if timestamp_format == known_format:
+                # the canonical string, so that __call__ can compare with "is"
+                self.timestamp_format = known_format
+                break
+        else:
+            raise ValueError('Unknown timestamp format {0!r}'.format(timestamp_format))
+        self.maxsize = maxsize
+        self._cache = {}
+
+    def _convert_second(self, key):
+        # key is 'YYYY-MM-DDTHH:MM:SS' followed by 'Z' or '+HH:MM'
+        fields = (int(key[0:4]), int(key[5:7]), int(key[8:10]), int(key[11:13]), int(key[14:16]), int(key[17:19]))
+        if key[19] == 'Z':
+            offset = 0
+        else:
+            offset = (int(key[20:22]) * 60 + int(key[23:25])) * 60
+            if key[19] == '-':
+                offset = -offset
+        tzinfo = datetime.timezone.utc if offset == 0 else datetime.timezone(datetime.timedelta(seconds=offset))
+        # constructing the datetime validates the fields, even when it isn't what's wanted
+        value = datetime.datetime(*fields, tzinfo=tzinfo)
+        if self.timestamp_format != DATETIME:
+            value = calendar.timegm(fields) - offset
+            if self.timestamp_format == EPOCH_NS:
+                value *= 1000000000
+            else:
+                value = float(value)
+        if len(self._cache) >= self.maxsize:
+            self._cache.clear()
+        self._cache[key] = value
+        return value
+
+    def __call__(self, timestamp):
+        if timestamp == '-':
+            return None
+        if timestamp[19] != '.':
+            value = self._cache.get(timestamp)
+            if value is None:
+                value = self._convert_second(timestamp)
+            return value
+        if timestamp[-1] == 'Z':
+            key = timestamp[:19] + 'Z'
+            fraction = timestamp[20:-1]
+        else:
+            key = timestamp[:19] + timestamp[-6:]
+            fraction = timestamp[20:-6]
+        value = self._cache.get(key)
+        if value is None:
+            value = self._convert_second(key)
+        timestamp_format = self.timestamp_format
+        if timestamp_format is EPOCH:
+            return value + int(fraction) / _FRACTION_DIVISOR[len(fraction)]
+        if timestamp_format is EPOCH_NS:
+            return value + int(fraction) * _NANOSECOND_SCALE[len(fraction)]
+        return value.replace(microsecond=int(fraction) * _MICROSECOND_SCALE[len(fraction)])
+
+
+# shared by every parse using one of the named formats
+_PARSERS = dict((f, TimestampParser(f)) for f in (EPOCH, EPOCH_NS, DATETIME))
+
+
+def get_parser(timestamp_format):
+    """Return the callable converting timestamps to timestamp_format, or None for RAW (or None).
+
+    timestamp_format may also be a TimestampParser (or any callable taking and returning a timestamp), which is
+    returned as-is."""
+    if timestamp_format is None or timestamp_format == RAW:
+        return None
+    if callable(timestamp_format):
+        return timestamp_format
+    try:
+        return _PARSERS[timestamp_format]
+    except KeyError:
+        raise ValueError('Unknown timestamp format {0!r}'.format(timestamp_format))
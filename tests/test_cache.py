@@ -0,0 +1,56 @@
+from syslog_rfc5424_parser import SyslogMessage
+from syslog_rfc5424_parser.cache import InternCache, CacheInfo
+from syslog_rfc5424_parser.constants import SyslogFacility, SyslogSeverity
+from syslog_rfc5424_parser.message import LazySyslogMessage
+
+
+LINE = '<78>1 - host{0} CROND - - [meta sequenceId="{0}"] message'
+
+
+def test_counts_and_evicts_least_recently_used():
+    cache = InternCache(maxsize=2)
+    a = ''.join(['host', 'a'])
+    assert cache.setdefault(a, a) is a
+    cache.setdefault('hostb', 'hostb')
+    assert cache.setdefault('hosta', 'hosta') is a
+    cache.setdefault('hostc', 'hostc')
+    # 'hostb' was the least recently used, so it was evicted to make room for 'hostc'
+    cache.setdefault('hostb', 'hostb')
+    assert cache.cache_info() == CacheInfo(hits=1, misses=4, maxsize=2, currsize=2)
+    assert cache.hit_rate == 0.2
+    cache.clear()
+    assert cache.cache_info() == CacheInfo(hits=0, misses=0, maxsize=2, currsize=0)
+    assert cache.hit_rate == 0.0
+
+
+def test_parse_shares_strings():
+    cache = InternCache()
+    first = SyslogMessage.parse(LINE.format(1), intern=cache)
+    second = SyslogMessage.parse(LINE.format(1).encode('utf-8'), intern=cache)
+    third = LazySyslogMessage.parse(LINE.format(1), intern=cache)
+    for m in (second, third):
+        assert m.hostname is first.hostname
+        assert m.appname is first.appname
+        assert list(m.sd)[0] is list(first.sd)[0]
+        assert list(m.sd['meta'])[0] is list(first.sd['meta'])[0]
+    assert cache.hits == 8
+    assert len(cache) == 4
+
+
+def test_parse_many_with_bounded_cache():
+    cache = InternCache(maxsize=10)
+    result = SyslogMessage.parse_many([LINE.format(i % 20) for i in range(100)], intern=cache)
+    assert len(result.messages) == 100
+    assert len(cache) == 10
+    assert result.messages[0].as_dict() == SyslogMessage.parse(LINE.format(0)).as_dict()
+
+
+def test_priorities():
+    for pri, severity, facility in (
+        (0, SyslogSeverity.emerg, SyslogFacility.kern),
+        (78, SyslogSeverity.info, SyslogFacility.cron),
+        (191, SyslogSeverity.debug, SyslogFacility.local7),
+        (409, SyslogSeverity.alert, SyslogFacility.unknown),
+    ):
+        m = SyslogMessage.parse('<{0}>1 - - - - - -'.format(pri))
+        assert (m.severity, m.facility) == (severity, facility)
@@ -0,0 +1,74 @@
+import pytest
+
+from syslog_rfc5424_parser import SyslogMessage
+from syslog_rfc5424_parser.columnar import parse_columns, NULL_TIMESTAMP
+from syslog_rfc5424_parser.timestamps import EPOCH_NS
+
+from .test_message_parser import PARSE_VECTORS
+
+
+LINES = [v[0] for v in PARSE_VECTORS] + [
+    '<1>1 - - - - - [a][b c="d"]',
+    b'<1>1 - h a 99999999999999999999 - - \xef\xbb\xbfcaf\xc3\xa9',
+    b'<1>1 - - - - - - \xff',
+]
+
+
+def test_rows_match_messages():
+    batch = parse_columns(['garbage'] + LINES + ['<1>1 2016-13-01T00:00:00Z - - - - -'])
+    assert len(batch) == len(LINES)
+    assert [tuple(e) for e in batch.errors] == [(0, 'Unable to parse message'), (len(LINES) + 1, 'Invalid timestamp')]
+    for i, line in enumerate(LINES[:-1]):
+        assert batch.row(i) == SyslogMessage.parse(line, timestamp_format=EPOCH_NS).as_dict()
+    assert batch.row(len(LINES) - 1)['msg'] == '�'
+
+
+def test_layout():
+    batch = parse_columns([
+        '<78>1 2016-01-15T00:04:01Z host1 CROND 10391 - [a b="1" c="2"] x',
+        '<78>1 - host1 CROND abc - - y',
+        '<78>1 - host2 - - - [a][d e="3"]',
+    ])
+    assert list(batch.facility) == [9, 9, 9]
+    assert list(batch.timestamp) == [1452816241000000000, NULL_TIMESTAMP, NULL_TIMESTAMP]
+    assert list(batch.hostname.codes) == [0, 0, 1]
+    assert batch.hostname.values == ['host1', 'host2']
+    assert batch.appname.to_list() == ['CROND', 'CROND', None]
+    assert list(batch.procid) == [10391, -1, -1]
+    assert batch.procid_text.to_list() == [None, 'abc', None]
+    assert list(batch.sd_offsets) == [0, 2, 2, 4]
+    assert batch.sd_id.to_list() == ['a', 'a', 'a', 'd']
+    assert batch.sd_name.to_list() == ['b', 'c', None, 'e']
+    assert batch.sd_value.to_list() == ['1', '2', None, '3']
+    assert batch.msg.data == b'xy'
+    assert list(batch.msg.offsets) == [0, 1, 2, 2]
+    assert list(batch.msg.valid) == [1, 1, 0]
+    assert batch.msg.to_list() == ['x', 'y', None]
+
+
+def test_to_pandas():
+    pandas = pytest.importorskip('pandas')
+    batch = parse_columns(LINES)
+    frame = batch.to_pandas()
+    assert len(frame) == len(LINES)
+    assert frame['hostname'][1] == batch.hostname[1]
+    assert pandas.isna(frame['hostname'][0])
+    assert frame['timestamp'][1] == pandas.Timestamp(batch.timestamp[1], tz='UTC')
+    assert pandas.isna(frame['timestamp'][0])
+    sd = batch.sd_to_pandas()
+    assert len(sd) == len(batch.sd_id)
+    assert sd['message'].tolist() == [
+        i for i in range(len(batch)) for _ in range(batch.sd_offsets[i], batch.sd_offsets[i + 1])
+    ]
+
+
+def test_to_arrow():
+    pytest.importorskip('pyarrow')
+    batch = parse_columns(LINES)
+    table = batch.to_arrow()
+    assert table.num_rows == len(LINES)
+    assert table.column('msg').to_pylist() == batch.msg.to_list()
+    assert table.column('hostname').to_pylist() == batch.hostname.to_list()
+    assert table.column('timestamp').to_pylist()[0] is None
+    sd = table.column('sd').to_pylist()
+    assert sd[len(LINES) - 3] == [{'id': 'a', 'name': None, 'value': None}, {'id': 'b', 'name': 'c', 'value': 'd'}]
@@ -0,0 +1,75 @@
+import sys
+import threading
+
+from syslog_rfc5424_parser import SyslogMessage, grammar
+from syslog_rfc5424_parser.cache import InternCache
+from syslog_rfc5424_parser.differential import SEEDS, fuzz
+from syslog_rfc5424_parser.message import CompactSyslogMessage
+from syslog_rfc5424_parser.pipeline import parse_concurrent
+
+
+# mutated messages, many of which the scanner rejects and leaves to the grammar
+LINES = fuzz(SEEDS + ['<1>1 - - - - - [a b="\\"]'], 400, seed=1)
+
+
+def _parse_all(lines):
+    results = []
+    for line in lines:
+        try:
+            results.append(SyslogMessage.parse(line).as_dict())
+        except Exception as e:
+            results.append(type(e))
+    return results
+
+
+def test_thread_parsers():
+    parsers = {}
+
+    def record():
+        parsers[threading.current_thread().name] = grammar.get_thread_parser()
+
+    threads = [threading.Thread(target=record, name=str(i)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(set(map(id, parsers.values()))) == 4
+    assert all(p.parse('<1>1 - - - - - [a b="\\"]').structured_data[0].sd_params == [('b', '\\')]
+               for p in parsers.values())
+
+
+def test_stress():
+    expected = _parse_all(LINES)
+    results = {}
+
+    def run(index):
+        results[index] = [_parse_all(LINES[offset:] + LINES[:offset]) for offset in (index * 7, index * 13)]
+
+    interval = sys.getswitchinterval()
+    # switch threads as often as possible, to interleave parses mid-way
+    sys.setswitchinterval(1e-6)
+    try:
+        threads = [threading.Thread(target=run, args=(i,)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(interval)
+    for index, (first, second) in results.items():
+        assert first == expected[index * 7:] + expected[:index * 7]
+        assert second == expected[index * 13:] + expected[:index * 13]
+
+
+def test_parse_concurrent():
+    lines = LINES + [line.encode('utf-8') for line in LINES[:50]]
+    expected = SyslogMessage.parse_many(lines)
+    result = parse_concurrent(lines, max_workers=4, chunksize=37, intern=InternCache())
+    assert [m.as_dict() for m in result.messages] == [m.as_dict() for m in expected.messages]
+    assert result.errors == expected.errors
+    assert parse_concurrent([], max_workers=2) == ([], [])
+
+
+def test_parse_concurrent_message_class():
+    result = parse_concurrent(LINES[:10], max_workers=2, chunksize=3, message_class=CompactSyslogMessage)
+    assert result.messages and all(isinstance(m, CompactSyslogMessage) for m in result.messages)
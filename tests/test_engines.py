@@ -0,0 +1,59 @@
+import pytest
+
+from syslog_rfc5424_parser import SyslogMessage, ParseError, parser, scanner
+from syslog_rfc5424_parser.differential import SEEDS, compare, fuzz
+
+from .test_message_parser import PARSE_VECTORS
+
+
+def test_engines_agree_on_fuzzed_input():
+    report = compare(fuzz(SEEDS + [v[0] for v in PARSE_VECTORS], 3000, seed=5), 'regex', 'lark')
+    assert report.different == []
+    assert report.only_first == []
+    assert report.agreed > report.inputs // 2
+    assert set(report.timings) == {'regex', 'lark'}
+
+
+def test_select_engine_per_call():
+    line = '<1>1 - - - - - [a b="\\"]'
+    assert SyslogMessage.parse(line, engine='lark').sd == {'a': {'b': '\\'}}
+    assert SyslogMessage.parse(line.encode('utf-8'), engine='lark').sd == {'a': {'b': '\\'}}
+    with pytest.raises(ParseError):
+        SyslogMessage.parse(line, engine='regex')
+    with pytest.raises(ParseError):
+        SyslogMessage.parse(line.encode('utf-8'), engine='regex')
+    result = SyslogMessage.parse_many([line, '<1>1 - - - - - -'], engine='regex')
+    assert len(result.messages) == 1
+    assert result.errors == [parser.BatchError(0, 'Unable to parse message')]
+    with pytest.raises(ValueError):
+        parser.parse(line, engine='nonesuch')
+
+
+def test_set_default_engine():
+    line = '<1>1 - - - - - [a b="\\"]'
+    previous = parser.set_default_engine('regex')
+    try:
+        assert previous == 'auto'
+        with pytest.raises(scanner.ScanError):
+            parser.parse(line)
+        assert parser.parse_batch([line]).errors == [parser.BatchError(0, 'Unable to parse message')]
+    finally:
+        parser.set_default_engine(previous)
+    assert parser.parse(line).structured_data == [parser.SDElement('a', [('b', '\\')])]
+    with pytest.raises(ValueError):
+        parser.set_default_engine('nonesuch')
+
+
+def test_register_engine():
+    calls = []
+
+    def parse(s):
+        calls.append(s)
+        return parser.parse(s, engine='lark')
+
+    try:
+        parser.register_engine('recording', parse, (ParseError,) + parser.get_engine('lark').errors)
+        assert SyslogMessage.parse(b'<1>1 - host - - - -', engine='recording').hostname == 'host'
+        assert calls == ['<1>1 - host - - - -']
+    finally:
+        del parser._engines['recording']
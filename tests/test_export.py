@@ -0,0 +1,86 @@
+import io
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from syslog_rfc5424_parser import SyslogMessage, export
+from syslog_rfc5424_parser.message import CompactSyslogMessage
+from syslog_rfc5424_parser.timestamps import DATETIME, EPOCH
+
+from .test_message_parser import PARSE_VECTORS
+
+
+LINES = [v[0] for v in PARSE_VECTORS]
+MESSAGES = (
+    [SyslogMessage.parse(line) for line in LINES] +
+    [SyslogMessage.parse(line, timestamp_format=EPOCH) for line in LINES] +
+    [CompactSyslogMessage.parse(line) for line in LINES] +
+    [SyslogMessage.parse(b'<1>1 - host - 99999999999999999999999 - [a b="1" c="\xc3\xa9"] \xff\xfe')]
+)
+
+
+@pytest.fixture(params=['builtin', 'library'])
+def encoder(request, monkeypatch):
+    if request.param == 'builtin':
+        monkeypatch.setattr(export, 'orjson', None)
+        monkeypatch.setattr(export, 'msgpack', None)
+    elif export._get_orjson() is None and export._get_msgpack() is None:
+        pytest.skip('neither orjson nor msgpack is installed')
+    return request.param
+
+
+def test_libraries_imported_lazily():
+    code = (
+        'import sys, syslog_rfc5424_parser;'
+        'assert "orjson" not in sys.modules and "msgpack" not in sys.modules'
+    )
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    subprocess.check_call([sys.executable, '-c', code], cwd=root)
+
+
+def test_to_json(encoder):
+    for message in MESSAGES:
+        assert json.loads(message.to_json()) == json.loads(json.dumps(message.as_dict()))
+
+
+def test_datetime_timestamp(encoder):
+    message = SyslogMessage.parse('<1>1 2016-01-15T00:04:01.5+01:00 - - - - -', timestamp_format=DATETIME)
+    assert json.loads(message.to_json())['timestamp'] == '2016-01-15T00:04:01.500000+01:00'
+
+
+def test_dump_jsonl(encoder):
+    text = io.StringIO()
+    assert export.dump_jsonl(MESSAGES, text) == len(MESSAGES)
+    binary = io.BytesIO()
+    export.dump_jsonl(MESSAGES, binary)
+    assert binary.getvalue().decode('utf-8') == text.getvalue()
+    lines = text.getvalue().split('\n')
+    assert lines.pop() == ''
+    assert [json.loads(line) for line in lines] == [json.loads(m.to_json()) for m in MESSAGES]
+    export.dump_jsonl([], text)
+
+
+def test_to_msgpack(encoder):
+    msgpack = pytest.importorskip('msgpack')
+    for message in MESSAGES[:-1]:
+        assert msgpack.unpackb(message.to_msgpack()) == json.loads(json.dumps(message.as_dict()))
+    unpacked = msgpack.unpackb(MESSAGES[-1].to_msgpack())
+    assert unpacked['procid'] == '99999999999999999999999'
+    assert unpacked['msg'] == b'\xff\xfe'
+    assert unpacked['sd'] == {'a': {'b': '1', 'c': '\xe9'}}
+
+
+def test_pack_values(monkeypatch):
+    monkeypatch.setattr(export, 'msgpack', None)
+    packed = [export._packed(value) for value in (None, True, 1, -1, 200, -200, 70000, 2 ** 40, -2 ** 40, 1.5, 'ab')]
+    assert packed == [
+        b'\xc0', b'\xc3', b'\x01', b'\xff', b'\xcc\xc8', b'\xd1\xff\x38', b'\xce\x00\x01\x11\x70',
+        b'\xcf\x00\x00\x01\x00\x00\x00\x00\x00', b'\xd3\xff\xff\xff\x00\x00\x00\x00\x00',
+        b'\xcb\x3f\xf8\x00\x00\x00\x00\x00\x00', b'\xa2ab',
+    ]
+    out = bytearray(b'x')
+    assert export.to_msgpack(MESSAGES[0], out) is out
+    assert bytes(out[1:]) == export.to_msgpack(MESSAGES[0])
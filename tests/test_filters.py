@@ -0,0 +1,76 @@
+import pytest
+
+from syslog_rfc5424_parser import SyslogMessage, ParseError
+from syslog_rfc5424_parser.constants import SyslogFacility, SyslogSeverity
+from syslog_rfc5424_parser.filters import MessageFilter
+from syslog_rfc5424_parser.message import BytesSyslogMessage, CompactSyslogMessage
+
+from .test_message_parser import PARSE_VECTORS
+
+
+LINES = [
+    '<14>1 - host1 sshd - - [a b="1"] accepted',      # user.info
+    '<15>1 - host1 sshd - - - debug',                 # user.debug
+    '<11>1 - host2 cron - ID1 - error',               # user.err
+    '<35>1 - host2 sshd - ID2 [a b="2"] auth notice',  # auth.err
+]
+
+
+@pytest.mark.parametrize('input_line', [v[0] for v in PARSE_VECTORS])
+def test_accepting_filter_matches_parse(input_line):
+    message_filter = MessageFilter(severity=lambda severity: True, appname=lambda appname: True)
+    assert message_filter.parse(input_line).as_dict() == SyslogMessage.parse(input_line).as_dict()
+    assert message_filter.parse(input_line.encode('utf-8')).as_dict() == SyslogMessage.parse(input_line).as_dict()
+
+
+def test_severity():
+    message_filter = MessageFilter(severity=lambda severity: severity <= SyslogSeverity.notice)
+    assert [message_filter.parse(line) is not None for line in LINES] == [False, False, True, True]
+    assert message_filter.rejected == {'severity': 2}
+    assert message_filter.accepted == 2
+
+
+def test_collections_and_counts():
+    message_filter = MessageFilter(facility={SyslogFacility.user}, appname={'sshd'}, msgid=[None])
+    result = message_filter.parse_many(LINES)
+    assert [m.msg for m in result.messages] == ['accepted', 'debug']
+    assert result.errors == []
+    # each message counts against the first predicate to reject it
+    assert message_filter.rejected == {'facility': 1, 'appname': 1, 'msgid': 0}
+    message_filter.reset()
+    assert message_filter.rejected == {'facility': 0, 'appname': 0, 'msgid': 0}
+    assert message_filter.accepted == 0
+
+
+def test_rejected_lines_skip_parsing():
+    message_filter = MessageFilter(severity={SyslogSeverity.err}, hostname={'host2'})
+    # malformed after the PRI, and after the header, respectively
+    assert message_filter.parse('<14>1 garbage') is None
+    assert message_filter.parse('<11>1 - host1 sshd - - [unterminated') is None
+    assert message_filter.rejected == {'severity': 1, 'hostname': 1}
+    with pytest.raises(ParseError):
+        message_filter.parse('<11>1 - host2 sshd - - [unterminated')
+    with pytest.raises(ParseError):
+        message_filter.parse('garbage')
+
+
+def test_parse_many_errors_keep_indexes():
+    message_filter = MessageFilter(appname={'cron'})
+    result = message_filter.parse_many(['garbage'] + LINES + [b'<11>1 - host2 cron - - - \xff'])
+    assert [m.msgid for m in result.messages] == ['ID1', None]
+    assert isinstance(result.messages[1], BytesSyslogMessage)
+    assert [e.index for e in result.errors] == [0]
+
+
+def test_grammar_fallback():
+    # structured data which the scanner leaves to the grammar
+    message_filter = MessageFilter(hostname={'host'})
+    assert message_filter.parse('<1>1 - host app - - [a b="\\"]') is not None
+    assert message_filter.parse('<1>1 - other app - - [a b="\\"]') is None
+
+
+def test_message_class():
+    message_filter = MessageFilter(appname={'sshd'}, message_class=CompactSyslogMessage)
+    messages = message_filter.parse_many(line.encode('utf-8') for line in LINES).messages
+    assert [type(m) for m in messages] == [CompactSyslogMessage] * 3
+    assert messages[2].sd == {'a': {'b': '2'}}
@@ -0,0 +1,234 @@
+import asyncio
+import socket
+import ssl
+import subprocess
+
+import pytest
+
+from syslog_rfc5424_parser import SyslogMessage
+from syslog_rfc5424_parser.constants import SyslogFacility, SyslogSeverity
+from syslog_rfc5424_parser.forwarder import Forwarder, BLOCK, DROP_NEWEST, DROP_OLDEST, UDP
+from syslog_rfc5424_parser.framing import Framer, NON_TRANSPARENT
+from syslog_rfc5424_parser.server import SyslogServer
+from syslog_rfc5424_parser.template import MessageTemplate
+
+from .test_server import CollectingSink, loop  # noqa: F401
+
+
+def _messages(count):
+    return [SyslogMessage(SyslogSeverity.info, SyslogFacility.user, hostname='host', msg='message {0}'.format(i))
+            for i in range(count)]
+
+
+async def _forward(forwarder, messages, sink, server):
+    await forwarder.start()
+    await forwarder.send(messages)
+    await asyncio.wait_for(sink.done.wait(), 5)
+    forwarder.close()
+    await forwarder.wait_closed()
+    server.close()
+    await server.wait_closed()
+
+
+@pytest.mark.parametrize('protocol', ['tcp', UDP])
+def test_loopback(loop, protocol):  # noqa: F811
+    # few enough datagrams to fit in the listener's receive buffer
+    count = 100 if protocol == UDP else 500
+
+    async def go():
+        sink = CollectingSink(count)
+        server = SyslogServer(sink)
+        if protocol == UDP:
+            host, port = await server.start_udp('127.0.0.1', 0)
+        else:
+            host, port = await server.start_tcp('127.0.0.1', 0)
+        forwarder = Forwarder(host, port, protocol=protocol, connections=3, batch_size=64)
+        template = MessageTemplate(SyslogFacility.user, 'host')
+        last = template.render(SyslogSeverity.info, 'message {0}'.format(count - 1))
+        await _forward(forwarder, _messages(count - 1) + [last], sink, server)
+        return forwarder, sink
+
+    forwarder, sink = loop.run_until_complete(go())
+    assert sorted(m.msg for m in sink.messages) == sorted('message {0}'.format(i) for i in range(count))
+    assert forwarder.stats.sent == count
+    if protocol != UDP:
+        assert forwarder.stats.batches < count // 8
+
+
+def test_non_transparent_batches(loop):  # noqa: F811
+    async def go():
+        received = bytearray()
+        done = asyncio.Event()
+
+        async def handle(reader, writer):
+            while not reader.at_eof():
+                received.extend(await reader.read(65536))
+                if received.count(b'\n') >= 100:
+                    done.set()
+            writer.close()
+
+        listener = await asyncio.start_server(handle, '127.0.0.1', 0)
+        port = listener.sockets[0].getsockname()[1]
+        forwarder = Forwarder('127.0.0.1', port, framing=NON_TRANSPARENT, batch_size=1000)
+        await forwarder.send(_messages(100))
+        await forwarder.start()
+        await asyncio.wait_for(done.wait(), 5)
+        forwarder.close()
+        await forwarder.wait_closed()
+        listener.close()
+        return forwarder, received
+
+    forwarder, received = loop.run_until_complete(go())
+    assert forwarder.stats.batches == 1
+    assert received.splitlines()[42] == b'<14>1 - host - - - - message 42'
+
+
+def test_reconnects_with_backoff(loop):  # noqa: F811
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        port = s.getsockname()[1]
+
+    async def go():
+        sink = CollectingSink(10)
+        forwarder = Forwarder('127.0.0.1', port, min_backoff=0.01, max_backoff=0.05)
+        await forwarder.start()
+        await forwarder.send(_messages(10))
+        # nothing is listening yet
+        await asyncio.sleep(0.2)
+        assert forwarder.stats.connect_failures >= 2
+        server = SyslogServer(sink)
+        await server.start_tcp('127.0.0.1', port)
+        await asyncio.wait_for(sink.done.wait(), 5)
+        forwarder.close()
+        await forwarder.wait_closed()
+        server.close()
+        await server.wait_closed()
+        return forwarder, sink
+
+    forwarder, sink = loop.run_until_complete(go())
+    assert len(sink.messages) == 10
+    assert forwarder.stats.connects == 1
+
+
+@pytest.mark.parametrize('policy', [DROP_NEWEST, DROP_OLDEST, BLOCK])
+def test_queue_policies(loop, policy):  # noqa: F811
+    async def go():
+        forwarder = Forwarder('127.0.0.1', 9, max_queue=5, policy=policy)
+        messages = _messages(8)
+        if policy == BLOCK:
+            sending = loop.create_task(forwarder.send(messages))
+            await asyncio.sleep(0.01)
+            assert not sending.done() and len(forwarder) == 5
+            forwarder._take()
+            await asyncio.wait_for(sending, 1)
+        else:
+            await forwarder.send(messages)
+        return forwarder, [m.msg for m in forwarder._queue]
+
+    forwarder, queued = loop.run_until_complete(go())
+    if policy == DROP_NEWEST:
+        assert queued == ['message {0}'.format(i) for i in range(5)]
+        assert forwarder.stats.dropped == 3
+    elif policy == DROP_OLDEST:
+        assert queued == ['message {0}'.format(i) for i in range(3, 8)]
+        assert forwarder.stats.dropped == 3
+    else:
+        assert queued == ['message {0}'.format(i) for i in range(5, 8)]
+        assert forwarder.stats.dropped == 0
+
+
+@pytest.fixture
+def certificate(tmp_path):
+    certfile, keyfile = str(tmp_path / 'cert.pem'), str(tmp_path / 'key.pem')
+    try:
+        subprocess.check_call(['openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '1',
+                               '-subj', '/CN=localhost', '-keyout', keyfile, '-out', certfile],
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    except (OSError, subprocess.CalledProcessError):
+        pytest.skip('openssl is not available')
+    return certfile, keyfile
+
+
+def test_tls(loop, certificate):  # noqa: F811
+    certfile, keyfile = certificate
+
+    async def go():
+        frames = []
+        done = asyncio.Event()
+
+        async def handle(reader, writer):
+            framer = Framer()
+            while not reader.at_eof():
+                frames.extend(framer.feed(await reader.read(65536)))
+                if len(frames) >= 20:
+                    done.set()
+            writer.close()
+
+        server_context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+        server_context.load_cert_chain(certfile, keyfile)
+        listener = await asyncio.start_server(handle, '127.0.0.1', 0, ssl=server_context)
+        port = listener.sockets[0].getsockname()[1]
+        client_context = ssl.create_default_context(cafile=certfile)
+        client_context.check_hostname = False
+        forwarder = Forwarder('127.0.0.1', port, ssl=client_context)
+        await forwarder.start()
+        await forwarder.send(_messages(20))
+        await asyncio.wait_for(done.wait(), 5)
+        forwarder.close()
+        await forwarder.wait_closed()
+        listener.close()
+        return frames
+
+    frames = loop.run_until_complete(go())
+    assert [SyslogMessage.parse(f).msg for f in frames] == ['message {0}'.format(i) for i in range(20)]
+
+
+def test_bad_arguments():
+    with pytest.raises(ValueError):
+        Forwarder('localhost', protocol='sctp')
+    with pytest.raises(ValueError):
+        Forwarder('localhost', policy='maybe')
+    with pytest.raises(ValueError):
+        Forwarder('localhost', protocol=UDP, ssl=True)
+
+
+def test_close_timeout_drops_queue(loop):  # noqa: F811
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        port = s.getsockname()[1]
+
+    async def go():
+        forwarder = Forwarder('127.0.0.1', port, min_backoff=0.01, max_backoff=0.02)
+        await forwarder.start()
+        await forwarder.start()
+        await forwarder.send(_messages(10))
+        forwarder.close()
+        # nothing ever listens, so without the timeout this would wait forever
+        await asyncio.wait_for(forwarder.wait_closed(timeout=0.1), 5)
+        return forwarder
+
+    forwarder = loop.run_until_complete(go())
+    assert len(forwarder._workers) == 1
+    assert forwarder.stats.dropped == 10
+    assert len(forwarder) == 0
+
+
+@pytest.mark.parametrize('bad', [
+    # too far in the future for gmtime, which raises OSError like a connection error would
+    SyslogMessage(SyslogSeverity.info, SyslogFacility.user, timestamp=1e17),
+    object(),
+])
+def test_unencodable_message_is_dropped(loop, bad):  # noqa: F811
+    async def go():
+        sink = CollectingSink(20)
+        server = SyslogServer(sink)
+        host, port = await server.start_tcp('127.0.0.1', 0)
+        forwarder = Forwarder(host, port, batch_size=8)
+        messages = _messages(20)
+        await _forward(forwarder, messages[:10] + [bad] + messages[10:], sink, server)
+        return forwarder, sink
+
+    forwarder, sink = loop.run_until_complete(go())
+    assert [m.msg for m in sink.messages] == ['message {0}'.format(i) for i in range(20)]
+    assert (forwarder.stats.sent, forwarder.stats.dropped, forwarder.stats.encode_errors) == (20, 1, 1)
+    assert forwarder.stats.connects == 1 and forwarder.stats.send_errors == 0
@@ -0,0 +1,73 @@
+import pytest
+
+from syslog_rfc5424_parser.framing import Framer, FramingError, NON_TRANSPARENT, OCTET_COUNTING
+
+
+def test_lf_framing():
+    framer = Framer()
+    assert framer.feed(b'<1>1 - - - - - - a\n\n<1>1 - - - - - - b\n<1>1') == [
+        b'<1>1 - - - - - - a', b'<1>1 - - - - - - b'
+    ]
+    assert framer.feed(b' - - - - - c') == []
+    assert framer.flush() == [b'<1>1 - - - - - c']
+    assert framer.flush() == []
+
+
+def test_octet_counting_split_across_feeds():
+    framer = Framer()
+    message = b'<1>1 - - - - - - with\nnewline'
+    data = str(len(message)).encode('ascii') + b' ' + message
+    data = data * 3
+    received = []
+    for i in range(len(data)):
+        received.extend(framer.feed(data[i:i + 1]))
+    assert received == [message] * 3
+    assert framer.flush() == []
+
+
+def test_mixed_framing():
+    framer = Framer()
+    assert framer.feed(b'16 <1>1 - - - - - -<1>1 - - - - - -\n') == [b'<1>1 - - - - - -'] * 2
+
+
+@pytest.mark.parametrize('data', [b'01 x', b'12345678901 x', b'1x2 abc'])
+def test_invalid_octet_count(data):
+    with pytest.raises(FramingError):
+        Framer().feed(data)
+
+
+def test_too_large():
+    with pytest.raises(FramingError):
+        Framer(max_message_size=10).feed(b'11 ')
+    with pytest.raises(FramingError):
+        Framer(max_message_size=10).feed(b'<1>1 - - - - - -')
+
+
+def test_truncated_frame():
+    framer = Framer()
+    assert framer.feed(b'20 <1>1') == []
+    with pytest.raises(FramingError):
+        framer.flush()
+
+
+def test_explicit_framing():
+    assert Framer(framing=NON_TRANSPARENT).feed(b'16 <1>1 - - - - - -\n') == [b'16 <1>1 - - - - - -']
+    with pytest.raises(FramingError):
+        Framer(framing=OCTET_COUNTING).feed(b'<1>1 - - - - - -\n')
+    with pytest.raises(ValueError):
+        Framer(framing='carrier-pigeon')
+
+
+def test_resynchronizes_after_error():
+    errors = []
+    framer = Framer(max_message_size=20, on_error=lambda error, offset: errors.append((error.args[0], offset)))
+    good = b'5 <1>1 12 <1>1 - - - x'
+    data = b'01 x\n' + good + b'y' * 30 + b'\n<1>1 - - - - - -\r\n'
+    received = []
+    for i in range(len(data)):
+        received.extend(framer.feed(data[i:i + 1]))
+    assert received == [b'<1>1 ', b'<1>1 - - - x', b'<1>1 - - - - - -']
+    assert errors == [('Invalid octet count', 0), ('Frame too large', len(b'01 x\n' + good))]
+    assert framer.feed(b'20 <1>1') == []
+    assert framer.flush() == []
+    assert errors[-1][0] == 'Truncated frame'
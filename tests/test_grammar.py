@@ -0,0 +1,66 @@
+import os
+import pickle
+import subprocess
+import sys
+
+import pytest
+
+from syslog_rfc5424_parser import grammar, parser, scanner
+
+from .test_message_parser import PARSE_VECTORS
+
+
+def test_import_is_lazy():
+    code = (
+        'import sys, syslog_rfc5424_parser;'
+        'syslog_rfc5424_parser.SyslogMessage.parse("<1>1 - host - - - -");'
+        'assert "lark" not in sys.modules, "lark imported";'
+        'syslog_rfc5424_parser.SyslogMessage.parse(\'<1>1 - - - - - [a b="\\\\"]\');'
+        'assert "lark" in sys.modules'
+    )
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    subprocess.check_call([sys.executable, '-c', code], cwd=root)
+
+
+def test_cached_parser(tmpdir):
+    cache_dir = str(tmpdir)
+    built = grammar.build(cache_dir)
+    assert os.listdir(cache_dir) == [os.path.basename(grammar.cache_path(cache_dir))]
+    loaded = grammar.build(cache_dir)
+    assert loaded is not built
+    for line in [v[0] for v in PARSE_VECTORS]:
+        assert loaded.parse(line) == built.parse(line)
+
+
+def test_unusable_cache(tmpdir):
+    cache_dir = tmpdir.join('cache')
+    cache_dir.write('not a directory')
+    assert grammar.build(str(cache_dir)).parse('<1>1 - - - - - -').header.pri == 1
+    tmpdir.join('corrupt').mkdir().join(os.path.basename(grammar.cache_path(str(tmpdir)))).write('junk')
+    assert grammar.build(str(tmpdir.join('corrupt'))).parse('<1>1 - - - - - -').header.pri == 1
+
+
+def test_no_cache_by_default(monkeypatch, tmpdir):
+    monkeypatch.setattr(grammar, 'CACHE_DIR', None)
+    assert grammar.cache_path() is None
+    assert grammar.build().parse('<1>1 - - - - - -').header.pri == 1
+    monkeypatch.setattr(grammar, 'CACHE_DIR', str(tmpdir))
+    assert grammar.cache_path() == grammar.cache_path(str(tmpdir))
+
+
+@pytest.mark.skipif(not hasattr(os, 'getuid'), reason='needs POSIX permissions')
+def test_untrusted_cache_is_ignored(tmpdir):
+    path = grammar.cache_path(str(tmpdir))
+    with open(path, 'wb') as f:
+        f.write(pickle.dumps('not a parser'))
+    os.chmod(path, 0o666)
+    assert grammar.build(str(tmpdir)).parse('<1>1 - - - - - -').header.pri == 1
+    # and replaced by one only the owner can write
+    assert not os.stat(path).st_mode & 0o022
+    assert grammar.build(str(tmpdir)).parse('<1>1 - - - - - -').header.pri == 1
+
+
+def test_auto_raises_scan_error():
+    # when neither the scanner nor the grammar accepts a message, the scanner's error is what's raised
+    with pytest.raises(scanner.ScanError):
+        parser.parse('<1>1 - - - - - [a b="\\" c]', engine='auto')
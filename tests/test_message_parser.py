@@ -4,6 +4,7 @@ import pytest
 
 from syslog_rfc5424_parser import SyslogMessage, ParseError
 from syslog_rfc5424_parser.constants import SyslogFacility, SyslogSeverity
+from syslog_rfc5424_parser.message import BytesSyslogMessage, LazySyslogMessage
 
 
 Expected = collections.namedtuple('Expected', ['severity', 'facility', 'version', 'timestamp', 'hostname',
@@ -134,14 +135,18 @@ def test_emitter_round_trip(input_line):
     assert str(m) == input_line
 
 
+def expected_as_dict(expected):
+    expected_dict = expected._asdict()
+    expected_dict['severity'] = expected_dict['severity'].name
+    expected_dict['facility'] = expected_dict['facility'].name
+    return expected_dict
+
+
 @pytest.mark.parametrize('input_line, expected', PARSE_VECTORS)
 def test_as_dict(input_line, expected):
     m = SyslogMessage.parse(input_line)
     dictified = m.as_dict()
-    expected_dict = expected._asdict()
-    expected_dict['severity'] = expected_dict['severity'].name
-    expected_dict['facility'] = expected_dict['facility'].name
-    assert dictified == expected_dict
+    assert dictified == expected_as_dict(expected)
 
 
 def test_dumping_with_bad_pri_fails():
@@ -158,3 +163,99 @@ def test_unparseable():
 def test_repr_does_not_raise():
     m = SyslogMessage(facility=SyslogFacility.cron, severity=SyslogSeverity.info)
     repr(m)
+
+
+def test_parse_many():
+    lines = [v[0] for v in PARSE_VECTORS]
+    lines.insert(1, 'garbage')
+    lines.append(b'<1>1 - h\xff - - - -')
+    lines.append(PARSE_VECTORS[1][0].encode('utf-8'))
+    result = SyslogMessage.parse_many(lines)
+    assert [(e.index, e.description) for e in result.errors] == [
+        (1, 'Unable to parse message'),
+        (len(lines) - 2, 'Unable to decode message'),
+    ]
+    assert [m.as_dict() for m in result.messages[:-1]] == [SyslogMessage.parse(v[0]).as_dict() for v in PARSE_VECTORS]
+    assert result.messages[-1].as_dict() == result.messages[1].as_dict()
+    # repeated header strings are shared within a batch
+    assert result.messages[-1].hostname is result.messages[1].hostname
+
+
+@pytest.mark.parametrize('input_line, expected', PARSE_VECTORS)
+def test_bytes_vector(input_line, expected):
+    parsed = SyslogMessage.parse(memoryview(input_line.encode('utf-8')))
+    assert isinstance(parsed, BytesSyslogMessage)
+    assert parsed.as_dict() == SyslogMessage.parse(input_line).as_dict()
+
+
+def test_bytes_binary_body_survives():
+    parsed = SyslogMessage.parse(b'<78>1 - host1 CROND - - - \x00\xff\xfe')
+    assert parsed.raw_msg == b'\x00\xff\xfe'
+    assert parsed.msg.encode('utf-8', 'surrogateescape') == b'\x00\xff\xfe'
+
+
+def test_bytes_bom_is_stripped():
+    parsed = SyslogMessage.parse(b'<78>1 - host1 CROND - - - \xef\xbb\xbfcaf\xc3\xa9')
+    assert parsed.msg == 'caf\xe9'
+
+
+def test_bytes_msg_assignment():
+    parsed = SyslogMessage.parse(b'<78>1 - host1 CROND - - - hello')
+    parsed.msg = 'caf\xe9'
+    assert parsed.raw_msg == b'caf\xc3\xa9'
+    parsed.msg = b'\xff'
+    assert parsed.msg == '\udcff'
+    assert str(parsed) == '<78>1 - host1 CROND - - - \udcff'
+
+
+def test_bytes_falls_back_to_grammar():
+    assert SyslogMessage.parse(b'<1>1 - - - - - [a b="\\"]').sd == {'a': {'b': '\\'}}
+
+
+def test_bytes_unparseable():
+    with pytest.raises(ParseError):
+        SyslogMessage.parse(b'garbage')
+    with pytest.raises(ParseError):
+        SyslogMessage.parse(b'\xff garbage')
+
+
+@pytest.mark.parametrize('input_line, expected', PARSE_VECTORS)
+def test_lazy_vector(input_line, expected):
+    for buf in (input_line, input_line.encode('utf-8'), bytearray(input_line.encode('utf-8'))):
+        parsed = LazySyslogMessage.parse(buf)
+        assert parsed.severity == expected.severity
+        assert parsed.appname == expected.appname
+        assert parsed.as_dict() == expected_as_dict(expected)
+
+
+@pytest.mark.parametrize('input_line', ROUND_TRIP_VECTORS)
+def test_lazy_round_trip(input_line):
+    assert str(LazySyslogMessage.parse(input_line)) == input_line
+
+
+def test_lazy_defers_structured_data():
+    parsed = LazySyslogMessage.parse('<78>1 - host1 CROND - - [meta sequenceId="29"] some_message')
+    assert parsed._buffer is not None
+    assert parsed.msg == 'some_message'
+    assert parsed._buffer is None
+    assert parsed.sd == {'meta': {'sequenceId': '29'}}
+
+
+def test_lazy_assignment_before_access():
+    parsed = LazySyslogMessage.parse('<78>1 - host1 CROND - - [meta sequenceId="29"] some_message')
+    parsed.sd = {}
+    assert parsed.msg == 'some_message'
+    assert parsed.sd == {}
+
+
+def test_lazy_malformed_structured_data_raises_on_access():
+    parsed = LazySyslogMessage.parse('<78>1 - host1 CROND - - [meta sequenceId=29] some_message')
+    assert parsed.appname == 'CROND'
+    with pytest.raises(ParseError):
+        parsed.sd
+
+
+def test_lazy_falls_back_to_grammar():
+    assert LazySyslogMessage.parse('<1>1 - - - - - [a b="\\"]').sd == {'a': {'b': '\\'}}
+    with pytest.raises(ParseError):
+        LazySyslogMessage.parse('garbage')
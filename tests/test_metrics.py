@@ -0,0 +1,98 @@
+import pytest
+
+from syslog_rfc5424_parser import SyslogMessage, ParseError, metrics
+from syslog_rfc5424_parser.message import BytesSyslogMessage, CompactSyslogMessage
+from syslog_rfc5424_parser.timestamps import EPOCH
+
+from .test_message_parser import PARSE_VECTORS
+
+
+@pytest.fixture
+def recording():
+    recording = metrics.enable(metrics.ParseMetrics(sample=1))
+    yield recording
+    metrics.disable()
+
+
+@pytest.mark.parametrize('input_line', [v[0] for v in PARSE_VECTORS])
+@pytest.mark.parametrize('cls', [SyslogMessage, CompactSyslogMessage])
+def test_same_results(recording, cls, input_line):
+    expected = metrics.disable().parse(cls, input_line).as_dict()
+    metrics.enable(recording)
+    assert cls.parse(input_line).as_dict() == expected
+    assert cls.parse(input_line.encode('utf-8')).as_dict() == expected
+    assert [m.as_dict() for m in cls.parse_many([input_line]).messages] == [expected]
+    assert recording.messages == 4
+
+
+def test_disabled():
+    assert metrics.get_metrics() is None
+    assert metrics.disable() is None
+
+
+@pytest.mark.parametrize('line,category', [
+    ('<1>1 - - - - - [a b=1] msg', 'sd'),
+    ('<1>1 - - - - - [a b="1"', 'truncated'),
+    ('<1>1 - - - - - [a b="1', 'truncated'),
+    ('<1>1 - host', 'truncated'),
+    ('1>1 - - - - - -', 'pri'),
+    ('<1>1 yesterday - - - - -', 'timestamp'),
+    ('<1>1 2016-02-30T00:00:00Z - - - - -', 'timestamp'),
+    ('<1>01 - - - - - -', 'header'),
+    (b'<1>1 - \xff - - - -', 'decode'),
+])
+def test_failure_categories(recording, line, category):
+    with pytest.raises(ParseError):
+        SyslogMessage.parse(line, timestamp_format=EPOCH)
+    assert recording.failures[category] == 1
+    assert sum(recording.failures.values()) == 1
+    assert recording.seconds['error'] > 0
+
+
+def test_counts_and_stages(recording):
+    lines = ['<1>1 - - - - - [a b="1"] msg', '<1>1 - - - - - [a b="\\"]', 'garbage']
+    result = SyslogMessage.parse_many(lines + [lines[0].encode('utf-8')])
+    assert len(result.messages) == 3
+    assert isinstance(result.messages[2], BytesSyslogMessage)
+    assert [e.index for e in result.errors] == [2]
+    assert recording.messages == 4
+    assert recording.bytes == sum(len(line) for line in lines) + len(lines[0])
+    # the second message needs the grammar
+    assert recording.histograms['grammar'] and recording.seconds['grammar'] > 0
+    assert sum(recording.histograms['scan'].values()) == 4
+    assert sum(recording.histograms['construct'].values()) == 3
+    recording.reset()
+    assert recording.messages == 0 and recording.histograms['scan'] == {}
+
+
+def test_engines(recording):
+    SyslogMessage.parse('<1>1 - - - - - -', engine='lark')
+    SyslogMessage.parse('<1>1 - - - - - -', engine='regex')
+    assert sum(recording.histograms['grammar'].values()) == 1
+    assert sum(recording.histograms['scan'].values()) == 1
+
+
+def test_exporters(recording):
+    pushed = []
+    recording.add_hook(lambda m: pushed.append(m.messages), every=2)
+    for _ in range(5):
+        SyslogMessage.parse('<1>1 - - - - - -')
+    assert pushed == [2, 4]
+    samples = dict(((name, tuple(sorted(labels.items()))), value) for name, labels, value in recording.samples())
+    assert samples[('syslog_parse_messages_total', ())] == 5
+    assert samples[('syslog_parse_failures_total', (('reason', 'sd'),))] == 0
+    assert samples[('syslog_parse_stage_latency_seconds_bucket', (('le', '+Inf'), ('stage', 'scan')))] == 5
+    text = recording.prometheus_text()
+    assert 'syslog_parse_messages_total 5\n' in text
+    assert 'syslog_parse_stage_seconds_total{stage="construct"} ' in text
+    types = [line.split()[2:] for line in text.splitlines() if line.startswith('# TYPE ')]
+    assert types == [
+        ['syslog_parse_messages_total', 'counter'],
+        ['syslog_parse_bytes_total', 'counter'],
+        ['syslog_parse_failures_total', 'counter'],
+        ['syslog_parse_stage_seconds_total', 'counter'],
+        ['syslog_parse_stage_latency_seconds', 'histogram'],
+    ]
+    # each family's HELP and TYPE come just before its first sample
+    assert '# HELP syslog_parse_messages_total Messages parsed.\n# TYPE syslog_parse_messages_total counter\n' \
+        'syslog_parse_messages_total 5\n' in text
@@ -12,3 +12,9 @@ def test_minimal():
     assert parsed.header.procid == '-'
     assert parsed.header.msgid == '-'
     assert parsed.structured_data == []
+
+
+def test_parse_batch():
+    result = parser.parse_batch(['<1>1 - - - - - -', 'garbage', b'<1>1 - host - - - -'])
+    assert [m.header.hostname for m in result.messages] == ['-', 'host']
+    assert result.errors == [parser.BatchError(1, 'Unable to parse message')]
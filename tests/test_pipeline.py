@@ -0,0 +1,37 @@
+from syslog_rfc5424_parser import SyslogMessage
+from syslog_rfc5424_parser.pipeline import ParsePipeline, parse_parallel, message_from_record
+
+from .test_message_parser import PARSE_VECTORS
+
+
+LINES = ([v[0] for v in PARSE_VECTORS] + ['garbage', PARSE_VECTORS[1][0].encode('utf-8')]) * 7
+
+
+def test_ordered_matches_parse_many():
+    expected = SyslogMessage.parse_many(LINES)
+    results = list(parse_parallel(LINES, max_workers=2, chunksize=5))
+    assert [m.as_dict() for r in results for m in r.messages] == [m.as_dict() for m in expected.messages]
+    assert [e for r in results for e in r.errors] == expected.errors
+
+
+def test_unordered_and_compact():
+    expected = SyslogMessage.parse_many(LINES)
+    with ParsePipeline(max_workers=2, chunksize=3, ordered=False, compact=True, max_in_flight=2) as pipeline:
+        results = list(pipeline.parse(iter(LINES)))
+    messages = [message_from_record(r).as_dict() for result in results for r in result.messages]
+    assert sorted(messages, key=repr) == sorted((m.as_dict() for m in expected.messages), key=repr)
+    assert sorted(e for r in results for e in r.errors) == expected.errors
+
+
+def test_unordered_results_map_back_to_input():
+    with ParsePipeline(max_workers=2, chunksize=4, ordered=False) as pipeline:
+        results = list(pipeline.parse(LINES))
+    assert sorted(r.start for r in results) == list(range(0, len(LINES), 4))
+    seen = []
+    for result in results:
+        messages, errors = result
+        assert len(result.indexes) == len(messages)
+        for index, message in zip(result.indexes, messages):
+            assert message.as_dict() == SyslogMessage.parse(LINES[index]).as_dict()
+        seen.extend(result.indexes + [e.index for e in errors])
+    assert sorted(seen) == list(range(len(LINES)))
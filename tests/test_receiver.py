@@ -0,0 +1,54 @@
+import socket
+
+from syslog_rfc5424_parser import SyslogMessage
+from syslog_rfc5424_parser.receiver import DatagramReceiver
+
+
+MESSAGE = b'<78>1 2016-01-15T00:04:01+00:00 host1 CROND 10391 - [meta sequenceId="29"] some_message'
+
+
+def _pair():
+    return socket.socketpair(socket.AF_UNIX, socket.SOCK_DGRAM)
+
+
+def test_drain_batches():
+    receiver_sock, sender = _pair()
+    with receiver_sock, sender:
+        receiver = DatagramReceiver(receiver_sock, buffer_size=4096, max_datagram_size=1024)
+        assert receiver.drain() == []
+        for i in range(10):
+            sender.send(MESSAGE + str(i).encode('ascii'))
+        views = receiver.drain()
+        assert len(views) == 10
+        result = SyslogMessage.parse_many(views)
+        assert [m.msg for m in result.messages] == ['some_message{0}'.format(i) for i in range(10)]
+        assert receiver.stats.wakeups == 1
+        assert receiver.stats.datagrams == 10
+        assert receiver.stats.max_per_wakeup == 10
+        assert receiver.stats.per_wakeup == {16: 1}
+
+
+def test_drain_limits():
+    receiver_sock, sender = _pair()
+    with receiver_sock, sender:
+        receiver = DatagramReceiver(receiver_sock, buffer_size=1024, max_datagram_size=512)
+        for i in range(20):
+            sender.send(MESSAGE)
+        # the buffer only has guaranteed room for another datagram while the offset is at most 512
+        assert len(receiver.drain()) == 512 // len(MESSAGE) + 1
+        receiver.max_batch = 3
+        receiver.max_datagram_size = 16
+        assert [bytes(v) for v in receiver.drain()] == [MESSAGE[:16]] * 3
+        assert receiver.stats.truncated == (3 if hasattr(socket, 'MSG_TRUNC') else 0)
+
+
+def test_recv_into_fallback_counts_truncated():
+    receiver_sock, sender = _pair()
+    with receiver_sock, sender:
+        receiver = DatagramReceiver(receiver_sock, buffer_size=1024, max_datagram_size=16)
+        receiver._use_recvmsg = False
+        sender.send(MESSAGE)
+        sender.send(MESSAGE[:10])
+        assert [bytes(v) for v in receiver.drain()] == [MESSAGE[:16], MESSAGE[:10]]
+        assert receiver.stats.truncated == (1 if hasattr(socket, 'MSG_TRUNC') else 0)
+        assert receiver.stats.bytes == 26
@@ -0,0 +1,70 @@
+import time
+
+import pytest
+
+from syslog_rfc5424_parser import SyslogMessage
+from syslog_rfc5424_parser.constants import SyslogSeverity
+from syslog_rfc5424_parser.recovery import recover
+from syslog_rfc5424_parser.timestamps import EPOCH
+
+from .test_message_parser import PARSE_VECTORS
+
+
+GLUED = (
+    '<14>1 2016-01-15T00:04:01Z host app 1 ID [a b="1"] first'
+    '<11>1 - host2 app2 - - [x y="truncated'
+    '<13>1 - h3 a3 - - [m n="1"][o p="2] tail\n'
+    '<1>1 garbage here\n'
+    '<2>1 - h - - - - last'
+)
+
+
+@pytest.mark.parametrize('input_line', [v[0] for v in PARSE_VECTORS if '\\"]' not in v[0]])
+def test_well_formed(input_line):
+    messages = recover(input_line)
+    assert [m.failed for m in messages] == [None]
+    assert messages[0].as_dict() == SyslogMessage.parse(input_line).as_dict()
+
+
+@pytest.mark.parametrize('encode', [False, True])
+def test_glued_and_damaged(encode):
+    buffer = GLUED.encode('utf-8') if encode else GLUED
+    messages = recover(bytearray(buffer) if encode else buffer)
+    assert [(m.failed, m.hostname, m.msg) for m in messages] == [
+        (None, 'host', 'first'),
+        ('structured_data', 'host2', None),
+        ('structured_data', 'h3', None),
+        ('header', '-', None),
+        (None, 'h', 'last'),
+    ]
+    assert messages[0].sd == {'a': {'b': '1'}}
+    # the complete SD-ELEMENT before the damaged one is kept
+    assert messages[2].sd == {'m': {'n': '1'}}
+    assert messages[3].severity == SyslogSeverity.alert and messages[3].version == 1
+    assert [m.offset for m in messages] == [GLUED.index(m.raw if not encode else m.raw.decode()) for m in messages]
+    assert messages[1].raw == buffer[messages[1].offset:messages[2].offset]
+    assert messages[2].raw.endswith(b'tail' if encode else 'tail')
+
+
+def test_edges():
+    assert recover('') == []
+    messages = recover(' junk <1>1 - - - - - [a b="1"]x')
+    assert [m.failed for m in messages] == ['header', 'msg']
+    assert messages[0].severity is None
+    assert messages[1].sd == {'a': {'b': '1'}}
+    messages = recover('<1>1 2016-02-30T00:00:00Z - - - - - msg', timestamp_format=EPOCH)
+    assert messages[0].failed == 'timestamp'
+    assert messages[0].timestamp == '2016-02-30T00:00:00Z'
+    assert messages[0].msg == 'msg'
+
+
+def test_linear():
+    # a pathological buffer: many candidate boundaries and unterminated values
+    def elapsed(n):
+        buffer = '<1>1 - - - - - [a b="' * n + '<1>1 ' * n
+        start = time.perf_counter()
+        messages = recover(buffer)
+        assert len(messages) == n
+        return time.perf_counter() - start
+    elapsed(100)
+    assert elapsed(8000) < 40 * elapsed(800) + 0.05
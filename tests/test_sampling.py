@@ -0,0 +1,99 @@
+import pytest
+
+from syslog_rfc5424_parser.constants import SyslogSeverity
+from syslog_rfc5424_parser.filters import MessageFilter
+from syslog_rfc5424_parser.sampling import RateLimiter, Sampler
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _line(appname, hostname='host', severity=6, body='msg'):
+    return '<{0}>1 - {1} {2} - - - {3}'.format(8 + severity, hostname, appname, body)
+
+
+def test_token_bucket():
+    clock = FakeClock()
+    limiter = RateLimiter(2, burst=3, clock=clock)
+    assert [limiter.allow('noisy') for _ in range(5)] == [True, True, True, False, False]
+    # other keys have their own buckets
+    assert limiter.allow('quiet')
+    clock.now += 1.0
+    assert [limiter.allow('noisy') for _ in range(3)] == [True, True, False]
+    # the bucket never holds more than burst
+    clock.now += 100.0
+    assert sum(limiter.allow('noisy') for _ in range(10)) == 3
+    assert (limiter.allowed, limiter.dropped) == (9, 10)
+
+
+def test_lru_eviction():
+    limiter = RateLimiter(1, key='hostname', maxkeys=2, clock=FakeClock())
+    limiter.allow('a')
+    limiter.allow('b')
+    limiter.allow('a')
+    limiter.allow('c')
+    assert len(limiter) == 2
+    assert limiter.evicted == 1
+    # b was the least recently used, so it was evicted and starts afresh
+    assert limiter.tokens('b') == 1
+    assert limiter.tokens('a') == 0
+    limiter.clear()
+    assert len(limiter) == 0 and limiter.allowed == 0
+
+
+def test_sampler():
+    sampler = Sampler(0.25, seed=1, rates={'audit': 1, 'debug': 0})
+    kept = sum(sampler.allow('app') for _ in range(4000))
+    assert 800 < kept < 1200
+    assert all(sampler.allow('audit') for _ in range(100))
+    assert not any(sampler.allow('debug') for _ in range(100))
+    assert sampler.allowed + sampler.dropped == 4200
+
+
+def test_key_fields():
+    limiter = RateLimiter(1, key=('hostname', 'severity'))
+    assert limiter.get_key(('h', 'app', None, SyslogSeverity.err)) == ('h', SyslogSeverity.err)
+    assert Sampler(0.5, key=()).get_key(('h', 'app', None, SyslogSeverity.err)) is None
+    with pytest.raises(ValueError):
+        RateLimiter(1, key=('procid',))
+
+
+def test_filter_with_limiters():
+    limiter = RateLimiter(1, burst=2, clock=FakeClock())
+    message_filter = MessageFilter(severity=lambda severity: severity <= SyslogSeverity.info, limiters=[limiter])
+    lines = [_line('noisy', body='x' * i) for i in range(10)] + [_line('quiet'), _line('noisy', severity=7)]
+    # over-limit messages are dropped before their structured data is looked at
+    lines.append(_line('noisy').replace(' - msg', ' [unterminated'))
+    result = message_filter.parse_many(lines)
+    assert [m.appname for m in result.messages] == ['noisy', 'noisy', 'quiet']
+    assert result.errors == []
+    # the debug message is rejected by the predicate, and doesn't use up a token
+    assert message_filter.rejected == {'severity': 1, 'limiters': 9}
+    assert (limiter.allowed, limiter.dropped) == (3, 9)
+
+
+def test_filter_limiters_in_order():
+    sampler = Sampler(0, key='severity', rates={SyslogSeverity.err: 1})
+    limiter = RateLimiter(1, key=('hostname', 'appname'), clock=FakeClock())
+    message_filter = MessageFilter(limiters=[sampler, limiter])
+    assert message_filter.parse(_line('a', severity=3).encode('utf-8')).severity == SyslogSeverity.err
+    assert message_filter.parse(_line('a', severity=3)) is None
+    assert message_filter.parse(_line('a', hostname='other', severity=3)) is not None
+    assert message_filter.parse(_line('b', severity=6)) is None
+    # only messages the sampler kept reached the limiter
+    assert (sampler.dropped, limiter.allowed, limiter.dropped) == (1, 2, 1)
+
+
+def test_filter_takes_tokens_only_when_all_limiters_allow():
+    first = RateLimiter(1, burst=5, clock=FakeClock())
+    second = RateLimiter(1, burst=2, key='hostname', clock=FakeClock())
+    message_filter = MessageFilter(limiters=[first, second])
+    assert [message_filter.parse(_line('a')) is not None for _ in range(4)] == [True, True, False, False]
+    # the messages the second limiter refused didn't use up the first's tokens
+    assert first.tokens('a') == 3
+    assert (first.allowed, first.dropped, second.allowed, second.dropped) == (2, 0, 2, 2)
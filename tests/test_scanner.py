@@ -0,0 +1,92 @@
+import pytest
+
+from syslog_rfc5424_parser import SyslogMessage, parser, scanner
+
+from .test_message_parser import PARSE_VECTORS
+
+
+EXTRA_VECTORS = (
+    '<1>1 - -foo - - - -',
+    '<1>1 - - - - - - ',
+    '<1>1 - h a 00123 - -',
+    '<1>1 - - - - - [a b="x\\"y"]',
+    '<1>1 - - - - - [a b="x]y"]',
+    '<1>1 - - - - - [a][b]',
+    '<1>1 - - - - - [a] [b]',
+    '<1>1 - - - - - [a b="c"][a d="e"]',
+    '<1>1 - - - - - [a b="c" b="d"]',
+    '<1>1 - - - - - [[a b="c"]',
+    '<1>1 - - - - - [a b="c\nd"]',
+    '<1>1 - - - - - [a b="x\\]y \\q \\\\"]',
+)
+
+
+REJECTED_VECTORS = (
+    ('garbage', 'header'),
+    ('<1>1 - - - - -', 'header'),
+    ('<1>1 - h\xe9 - - - -', 'header'),
+    ('<1>01 - - - - - -', 'version'),
+    ('<0001>1 - - - - - -', 'pri'),
+    ('<1>1 2016-01-15t00:04:01Z - - - - -', 'timestamp'),
+    ('<1>1 2016-01-15T00:04:01.1234567Z - - - - -', 'timestamp'),
+    ('<1>1 - - - - - -x', 'msg'),
+    ('<1>1 - - - - - [a  b="c"]', 'structured_data'),
+    ('<1>1 - - - - - [a b=c]', 'structured_data'),
+    ('<1>1 - - - - - [a b="c"d"]', 'structured_data'),
+    ('<1>1 - - - - - [a b="c', 'structured_data'),
+)
+
+
+@pytest.mark.parametrize('input_line', [v[0] for v in PARSE_VECTORS] + list(EXTRA_VECTORS))
+def test_matches_grammar(input_line):
+    assert scanner.scan(input_line) == parser.parse(input_line, engine='lark')
+
+
+@pytest.mark.parametrize('input_line, field', REJECTED_VECTORS)
+def test_rejected(input_line, field):
+    with pytest.raises(scanner.ScanError) as exc_info:
+        scanner.scan(input_line)
+    assert exc_info.value.field == field
+
+
+def test_escaped_backslash_before_quote():
+    parsed = scanner.scan('<1>1 - - - - - [a b="x\\\\" c="d"]')
+    assert parsed.structured_data[0].sd_params == [('b', 'x\\'), ('c', 'd')]
+
+
+@pytest.mark.parametrize('value', ['\\"' * 50000, '\\\\\\"' * 20000 + '\\\\'])
+def test_many_escaped_quotes(value):
+    # a long run of escaped quotes must not be rescanned from the start of the value at every quote
+    line = '<1>1 - - - - - [a b="{0}" c="d"]'.format(value)
+    sd_params = scanner.scan(line).structured_data[0].sd_params
+    assert sd_params == scanner.scan_bytes(line.encode('utf-8')).structured_data[0].sd_params
+    assert sd_params[0][1] == parser.unescape_param_value(value)
+    assert sd_params[1] == ('c', 'd')
+
+
+def test_message_parse_falls_back_to_grammar():
+    # the grammar treats this lone backslash as literal; the scanner considers the value unterminated
+    line = '<1>1 - - - - - [a b="\\"]'
+    with pytest.raises(scanner.ScanError):
+        scanner.scan(line)
+    assert SyslogMessage.parse(line).sd == {'a': {'b': '\\'}}
+
+
+@pytest.mark.parametrize('input_line', [v[0] for v in PARSE_VECTORS] + list(EXTRA_VECTORS))
+def test_bytes_matches_text(input_line):
+    parsed = scanner.scan(input_line)
+    data = input_line.encode('utf-8')
+    for buf in (data, bytearray(data), memoryview(data)):
+        from_bytes = scanner.scan_bytes(buf)
+        assert from_bytes.header == parsed.header
+        assert from_bytes.structured_data == parsed.structured_data
+        if parsed.message is None:
+            assert from_bytes.message is None
+        else:
+            assert from_bytes.message == parsed.message.encode('utf-8')
+
+
+def test_bytes_rejects_non_utf8_structured_data():
+    with pytest.raises(scanner.ScanError) as exc_info:
+        scanner.scan_bytes(b'<1>1 - - - - - [a b="\xff"]')
+    assert exc_info.value.field == 'structured_data'
@@ -0,0 +1,81 @@
+import pytest
+
+from syslog_rfc5424_parser import SyslogMessage, serializer
+from syslog_rfc5424_parser.constants import SyslogFacility, SyslogSeverity
+from syslog_rfc5424_parser.framing import Framer, OCTET_COUNTING, NON_TRANSPARENT
+
+from .test_message_parser import PARSE_VECTORS
+
+
+# messages with an unknown facility can't be dumped
+DUMPABLE_LINES = [v[0] for v in PARSE_VECTORS if v[1].facility != SyslogFacility.unknown]
+
+
+def test_escape_param_value():
+    assert serializer.escape_param_value('plain') == 'plain'
+    assert serializer.escape_param_value('a"b\\c]d') == 'a\\"b\\\\c\\]d'
+    assert serializer.escape_param_value(29) == '29'
+
+
+@pytest.mark.parametrize('timestamp, expected', (
+    (None, '-'),
+    ('-', '-'),
+    ('2016-01-15T00:04:01+00:00', '2016-01-15T00:04:01+00:00'),
+    (0, '1970-01-01T00:00:00Z'),
+    (1452816241, '2016-01-15T00:04:01Z'),
+    (1452816241.0, '2016-01-15T00:04:01Z'),
+    (1452816241.25, '2016-01-15T00:04:01.250000Z'),
+    (1452816241.0000019, '2016-01-15T00:04:01.000002Z'),
+    (1452816241.9999999, '2016-01-15T00:04:02Z'),
+    (253402300799, '9999-12-31T23:59:59Z'),
+    # nanoseconds, as parsed with EPOCH_NS
+    (1452816241000000000, '2016-01-15T00:04:01Z'),
+    (1452816241123456789, '2016-01-15T00:04:01.123456Z'),
+))
+def test_format_timestamp(timestamp, expected):
+    assert serializer.format_timestamp(timestamp) == expected
+
+
+def test_escaped_values_round_trip():
+    sd = {'meta': {'quote': 'say "hi"', 'backslash': 'C:\\temp\\', 'bracket': '[x]'}}
+    m = SyslogMessage(facility=SyslogFacility.cron, severity=SyslogSeverity.info, sd=sd, msg='hello')
+    assert SyslogMessage.parse(str(m)).sd == sd
+    assert SyslogMessage.parse(m.to_bytes()).sd == sd
+
+
+@pytest.mark.parametrize('input_line', DUMPABLE_LINES)
+def test_to_bytes_matches_str(input_line):
+    m = SyslogMessage.parse(input_line)
+    assert m.to_bytes() == str(m).encode('utf-8')
+    assert SyslogMessage.parse(m.to_bytes()).as_dict() == m.as_dict()
+
+
+def test_to_bytes_keeps_raw_msg():
+    line = b'<78>1 - host1 CROND - - - \xef\xbb\xbf\x00\xff'
+    assert SyslogMessage.parse(line).to_bytes() == line
+
+
+def test_to_bytes_framing():
+    m = SyslogMessage(facility=SyslogFacility.kern, severity=SyslogSeverity.emerg, msg='caf\xe9')
+    assert m.to_bytes(OCTET_COUNTING) == b'22 <0>1 - - - - - - caf\xc3\xa9'
+    assert m.to_bytes(NON_TRANSPARENT) == b'<0>1 - - - - - - caf\xc3\xa9\n'
+    with pytest.raises(ValueError):
+        m.to_bytes('bogus')
+
+
+@pytest.mark.parametrize('framing', (OCTET_COUNTING, NON_TRANSPARENT))
+def test_serialize_many(framing):
+    messages = [SyslogMessage.parse(line) for line in DUMPABLE_LINES]
+    if framing == NON_TRANSPARENT:
+        messages = [m for m in messages if '\n' not in (m.msg or '')]
+    out = bytearray(b'stale')
+    del out[:]
+    assert SyslogMessage.serialize_many(messages, framing, out) is out
+    framer = Framer(framing=framing)
+    assert framer.feed(out) == [m.to_bytes() for m in messages]
+    assert framer.flush() == []
+
+
+def test_serialize_many_unknown_framing():
+    with pytest.raises(ValueError):
+        SyslogMessage.serialize_many([], framing=None)
@@ -0,0 +1,163 @@
+import asyncio
+import io
+import json
+import socket
+
+import pytest
+
+from syslog_rfc5424_parser import SyslogMessage
+from syslog_rfc5424_parser.server import SyslogServer, json_lines_sink
+
+
+MESSAGE = b'<78>1 2016-01-15T00:04:01+00:00 host1 CROND 10391 - [meta sequenceId="29"] some_message'
+
+
+@pytest.fixture
+def loop():
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    yield loop
+    loop.close()
+    asyncio.set_event_loop(None)
+
+
+class CollectingSink(object):
+    def __init__(self, expected):
+        self.messages = []
+        self.expected = expected
+        self.done = asyncio.Event()
+        self.gate = None
+
+    async def __call__(self, messages):
+        if self.gate is not None:
+            await self.gate.wait()
+        self.messages.extend(messages)
+        if len(self.messages) >= self.expected:
+            self.done.set()
+
+
+async def _finish(server, sink):
+    await asyncio.wait_for(sink.done.wait(), 5)
+    server.close()
+    await server.wait_closed()
+
+
+def test_udp(loop):
+    async def go():
+        sink = CollectingSink(3)
+        server = SyslogServer(sink, recv_buffer_size=1 << 20)
+        addr = await server.start_udp('127.0.0.1', 0)
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+            for message in (MESSAGE, b'garbage', MESSAGE + b'x' * 8192, MESSAGE):
+                s.sendto(message, addr)
+        await _finish(server, sink)
+        return server, sink
+
+    server, sink = loop.run_until_complete(go())
+    assert [m.hostname for m in sink.messages] == ['host1'] * 3
+    assert sink.messages[1].msg.endswith('x' * 8192)
+    assert server.stats.received == 4
+    assert server.stats.parse_errors == 1
+
+
+def test_unix_datagram(loop, tmp_path):
+    path = str(tmp_path / 'log.sock')
+
+    async def go():
+        sink = CollectingSink(1)
+        server = SyslogServer(sink)
+        await server.start_unix_datagram(path)
+        with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as s:
+            s.sendto(MESSAGE, path)
+        await _finish(server, sink)
+        return sink
+
+    assert loop.run_until_complete(go()).messages[0].sd == {'meta': {'sequenceId': '29'}}
+
+
+def test_tcp_framing_and_backpressure(loop):
+    count = 2000
+
+    async def go():
+        sink = CollectingSink(count * 2)
+        sink.gate = asyncio.Event()
+        server = SyslogServer(sink, batch_size=100, max_pending=200)
+        host, port = await server.start_tcp('127.0.0.1', 0)
+        reader, writer = await asyncio.open_connection(host, port)
+        framed = str(len(MESSAGE)).encode('ascii') + b' ' + MESSAGE
+        writer.write((framed + MESSAGE + b'\n') * count)
+        await asyncio.sleep(0.1)
+        sink.gate.set()
+        await writer.drain()
+        await _finish(server, sink)
+        writer.close()
+        return server, sink
+
+    server, sink = loop.run_until_complete(go())
+    assert len(sink.messages) == count * 2
+    assert server.stats.pauses >= 1
+    assert server.stats.dropped == 0
+
+
+def test_tcp_framing_error_skips_frame(loop):
+    async def go():
+        sink = CollectingSink(3)
+        server = SyslogServer(sink)
+        host, port = await server.start_tcp('127.0.0.1', 0)
+        reader, writer = await asyncio.open_connection(host, port)
+        framed = str(len(MESSAGE)).encode('ascii') + b' ' + MESSAGE
+        writer.write(framed + b'999999 too large\n' + MESSAGE + b'\n' + framed)
+        await writer.drain()
+        await _finish(server, sink)
+        writer.close()
+        return server, sink
+
+    server, sink = loop.run_until_complete(go())
+    assert len(sink.messages) == 3
+    assert server.stats.framing_errors == 1
+    assert server.stats.connections == 1
+
+
+def test_datagrams_dropped_when_full(loop):
+    async def go():
+        server = SyslogServer(CollectingSink(1), max_pending=2)
+        for _ in range(5):
+            server.submit_datagram(MESSAGE)
+        return server
+
+    server = loop.run_until_complete(go())
+    assert server.stats.dropped == 3
+
+
+def test_json_lines_sink(loop):
+    out = io.StringIO()
+    loop.run_until_complete(json_lines_sink(out)([SyslogMessage.parse(MESSAGE)] * 2))
+    lines = out.getvalue().splitlines()
+    assert len(lines) == 2
+    assert json.loads(lines[0])['appname'] == 'CROND'
+
+
+def test_unix_datagram_batched(loop, tmp_path):
+    path = str(tmp_path / 'log.sock')
+    count = 50
+
+    async def go():
+        sink = CollectingSink(count)
+        server = SyslogServer(sink, max_pending=10)
+        await server.start_unix_datagram(path, batched=True, buffer_size=1 << 16, max_datagram_size=1024)
+
+        def send():
+            # UNIX datagram sockets block the sender when the receiver is full, so this can't run on the loop
+            with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as s:
+                for i in range(count):
+                    s.sendto(MESSAGE + str(i).encode('ascii'), path)
+
+        await asyncio.get_event_loop().run_in_executor(None, send)
+        await _finish(server, sink)
+        return server, sink
+
+    server, sink = loop.run_until_complete(go())
+    assert [m.msg for m in sink.messages] == ['some_message{0}'.format(i) for i in range(count)]
+    assert server.receivers[0].stats.datagrams == count
+    assert server.receivers[0].stats.max_per_wakeup > 1
+    assert server.stats.pauses >= 1
@@ -0,0 +1,80 @@
+import pytest
+
+from syslog_rfc5424_parser import SyslogMessage
+from syslog_rfc5424_parser.constants import SyslogSeverity
+from syslog_rfc5424_parser.message import CompactSyslogMessage
+from syslog_rfc5424_parser.store import MessageStore
+
+
+LINES = [
+    '<14>1 - host1 sshd - - [meta sequenceId="1"] one',
+    '<11>1 - host2 sshd - - [meta sequenceId="2"][origin ip="10.0.0.1"] two',
+    '<14>1 - host1 cron - - [origin ip="10.0.0.2"] three',
+    '<11>1 - host1 sshd - - - four',
+]
+
+
+def _linear(messages, sd_id=None, param=None, value=None, **fields):
+    def matches(m):
+        if any(getattr(m, k) != v for k, v in fields.items()):
+            return False
+        if sd_id is not None and (sd_id not in m.sd or param is not None and (
+                param not in m.sd[sd_id] or value is not None and m.sd[sd_id][param] != value)):
+            return False
+        return True
+    return [m for m in messages if matches(m)]
+
+
+@pytest.fixture(params=[SyslogMessage, CompactSyslogMessage])
+def messages(request):
+    return [request.param.parse(line) for line in LINES]
+
+
+@pytest.mark.parametrize('criteria', [
+    {},
+    {'sd_id': 'meta'},
+    {'sd_id': 'meta', 'param': 'sequenceId'},
+    {'sd_id': 'meta', 'param': 'sequenceId', 'value': '2'},
+    {'sd_id': 'origin', 'param': 'ip', 'value': '10.0.0.3'},
+    {'sd_id': 'nope'},
+    {'appname': 'sshd'},
+    {'appname': 'sshd', 'hostname': 'host1'},
+    {'severity': SyslogSeverity.err, 'sd_id': 'origin'},
+    {'severity': SyslogSeverity.info, 'appname': 'cron', 'sd_id': 'origin', 'param': 'ip'},
+])
+def test_find_matches_scan(messages, criteria):
+    store = MessageStore()
+    store.extend(messages)
+    expected = _linear(messages, **criteria)
+    assert store.find(**criteria) == expected
+    assert store.count(**criteria) == len(expected)
+
+
+def test_positions_and_eviction(messages):
+    store = MessageStore(maxlen=2)
+    assert [store.append(m) for m in messages] == [0, 1, 2, 3]
+    assert len(store) == 2
+    assert list(store) == messages[2:]
+    assert store[3] is messages[3]
+    with pytest.raises(IndexError):
+        store[1]
+    assert store.positions(sd_id='meta') == []
+    assert store.positions(sd_id='origin') == [2]
+    assert store.positions(appname='sshd') == [3]
+    # evicted keys don't linger in the indexes
+    assert 'host2' not in store._field_indexes['hostname']
+    assert ('meta',) not in store._sd_index
+    store.clear()
+    assert len(store) == 0
+    assert store.append(messages[0]) == 4
+    assert store.find(hostname='host1') == [messages[0]]
+
+
+def test_bad_criteria():
+    store = MessageStore()
+    with pytest.raises(ValueError):
+        store.find(param='ip')
+    with pytest.raises(ValueError):
+        store.find(sd_id='origin', value='10.0.0.1')
+    with pytest.raises(TypeError):
+        store.find(msgid='ID1')
@@ -0,0 +1,97 @@
+import io
+import json
+import mmap
+
+import pytest
+
+from syslog_rfc5424_parser.__main__ import main
+from syslog_rfc5424_parser.framing import NON_TRANSPARENT, FramingError
+from syslog_rfc5424_parser.stream import iter_batches, iter_frames, iter_messages
+
+from .test_message_parser import PARSE_VECTORS
+
+
+LINES = [v[0].encode('utf-8') for v in PARSE_VECTORS if '\n' not in v[0]]
+
+
+def octet_counted(messages):
+    return b''.join(str(len(m)).encode('ascii') + b' ' + m for m in messages)
+
+
+@pytest.mark.parametrize('framing', ['auto', NON_TRANSPARENT])
+def test_newline_delimited(framing):
+    data = b'\n'.join(LINES) + b'\n'
+    messages = list(iter_messages(io.BytesIO(data), framing=framing, block_size=7))
+    assert [m.hostname for m in messages] == [v[1].hostname for v in PARSE_VECTORS if '\n' not in v[0]]
+
+
+def test_octet_counted_with_embedded_newlines():
+    messages = [v[0].encode('utf-8') for v in PARSE_VECTORS]
+    data = octet_counted(messages)
+    assert [m.msg for m in iter_messages(io.BytesIO(data), block_size=13)] == [v[1].msg for v in PARSE_VECTORS]
+
+
+def test_errors_are_indexed_from_start_of_stream():
+    data = b'\n'.join([LINES[0], b'garbage'] * 3)
+    errors = []
+    results = list(iter_batches(io.BytesIO(data), block_size=len(LINES[0]) + 1))
+    for result in results:
+        errors.extend(e.index for e in result.errors)
+    assert errors == [1, 3, 5]
+    seen = []
+    assert len(list(iter_messages(io.BytesIO(data), on_error=seen.append))) == 3
+    assert [e.index for e in seen] == [1, 3, 5]
+
+
+def test_oversized_line():
+    with pytest.raises(FramingError):
+        list(iter_messages(io.BytesIO(b'x' * 100), framing=NON_TRANSPARENT, block_size=10, max_message_size=50))
+
+
+def test_mmap(tmp_path):
+    path = tmp_path / 'messages.log'
+    path.write_bytes(octet_counted(LINES))
+    with open(str(path), 'rb') as f:
+        m = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        assert len(list(iter_messages(m, block_size=64))) == len(LINES)
+        m.close()
+
+
+def test_main(tmp_path, capsys):
+    path = tmp_path / 'messages.log'
+    path.write_bytes(b'\n'.join(LINES + [b'garbage']))
+    output = tmp_path / 'out.jsonl'
+    assert main([str(path), '-o', str(output)]) == 0
+    rows = [json.loads(line) for line in output.read_text().splitlines()]
+    assert [r['appname'] for r in rows] == [v[1].appname for v in PARSE_VECTORS if '\n' not in v[0]]
+    assert 'message {0}: Unable to parse message'.format(len(LINES)) in capsys.readouterr().err
+
+
+@pytest.mark.parametrize('framing', ['auto', NON_TRANSPARENT])
+@pytest.mark.parametrize('end', [b'\r\n', b'\r', b''])
+def test_crlf(framing, end):
+    data = b'\r\n'.join(LINES) + end
+    frames = [frame for frames in iter_frames(io.BytesIO(data), framing=framing, block_size=7) for frame in frames]
+    assert frames == list(LINES)
+    messages = list(iter_messages(io.BytesIO(data), framing=framing, block_size=7))
+    assert [m.msg for m in messages] == [v[1].msg for v in PARSE_VECTORS if '\n' not in v[0]]
+
+
+def test_oversized_line_skipped():
+    errors = []
+    data = b'x' * 100 + b'\n' + LINES[0] + b'\n'
+    messages = list(iter_messages(io.BytesIO(data), framing=NON_TRANSPARENT, block_size=10, max_message_size=50,
+                                  on_framing_error=lambda error, offset: errors.append((error.args[0], offset))))
+    assert [m.hostname for m in messages] == [PARSE_VECTORS[0][1].hostname]
+    assert errors == [('Frame too large', 0)]
+
+
+def test_main_resynchronizes_after_bad_frame(tmp_path, capsys):
+    path = tmp_path / 'messages.log'
+    bad_frame = b'99999999 not a message\n'
+    path.write_bytes(octet_counted(LINES[:2]) + bad_frame + octet_counted(LINES[2:4]))
+    output = tmp_path / 'out.jsonl'
+    assert main([str(path), '-o', str(output), '--block-size', '16']) == 0
+    rows = [json.loads(line) for line in output.read_text().splitlines()]
+    assert len(rows) == 4
+    assert 'byte {0}: Frame too large'.format(len(octet_counted(LINES[:2]))) in capsys.readouterr().err
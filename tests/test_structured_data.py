@@ -0,0 +1,61 @@
+import json
+
+import pytest
+
+from syslog_rfc5424_parser import SyslogMessage, parser
+from syslog_rfc5424_parser.cache import InternCache
+from syslog_rfc5424_parser.constants import SyslogFacility
+from syslog_rfc5424_parser.message import CompactSyslogMessage
+from syslog_rfc5424_parser.structured_data import StructuredData, EMPTY
+
+from .test_message_parser import PARSE_VECTORS
+
+
+@pytest.mark.parametrize('input_line', [v[0] for v in PARSE_VECTORS])
+def test_matches_syslog_message(input_line):
+    compact = CompactSyslogMessage.parse(input_line)
+    expected = SyslogMessage.parse(input_line)
+    assert compact.sd == expected.sd
+    assert compact.as_dict() == expected.as_dict()
+    json.dumps(compact.as_dict())
+    if expected.facility != SyslogFacility.unknown:
+        assert str(compact) == str(expected)
+    assert CompactSyslogMessage.parse(input_line.encode('utf-8')).as_dict() == expected.as_dict()
+
+
+def test_mapping_facade():
+    message = CompactSyslogMessage.parse('<1>1 - - - - - [a b="1" c="2"][d] msg')
+    assert message.sd['a']['c'] == '2'
+    assert list(message.sd) == ['a', 'd']
+    assert dict(message.sd['a']) == {'b': '1', 'c': '2'}
+    assert 'b' in message.sd['a'] and 'z' not in message.sd['a']
+    assert len(message.sd['d']) == 0
+    with pytest.raises(KeyError):
+        message.sd['z']
+    with pytest.raises(KeyError):
+        message.sd['a']['z']
+    with pytest.raises(TypeError):
+        message.sd['a'] = {}
+    message.sd = {'x': {'y': 'z'}}
+    assert isinstance(message.sd, StructuredData)
+    assert str(message) == '<1>1 - - - - - [x y="z"] msg'
+
+
+def test_shared_layout():
+    intern = InternCache()
+    first, second = [
+        CompactSyslogMessage.parse('<1>1 - - - - - [a b="{0}" c="2"]'.format(i), intern=intern) for i in range(2)
+    ]
+    assert first.sd._layout is second.sd._layout
+    assert first.sd != second.sd
+    assert CompactSyslogMessage.parse('<1>1 - - - - - -').sd is EMPTY
+    result = CompactSyslogMessage.parse_many(['<1>1 - - - - - [a b="1"]', b'<1>1 - - - - - [a b="2"] \xff'])
+    assert [type(m) for m in result.messages] == [CompactSyslogMessage, CompactSyslogMessage]
+    assert result.messages[0].sd._layout is result.messages[1].sd._layout
+    assert result.messages[1].msg == '\udcff'
+
+
+def test_repeated_names_merge():
+    elements = [parser.SDElement('a', [('b', '1'), ('b', '2')]), parser.SDElement('c', []),
+                parser.SDElement('a', [('d', '3')])]
+    assert StructuredData.from_parsed(elements) == {'a': {'b': '2', 'd': '3'}, 'c': {}}
@@ -0,0 +1,68 @@
+import datetime
+
+import pytest
+
+from syslog_rfc5424_parser import SyslogMessage
+from syslog_rfc5424_parser.constants import SyslogFacility, SyslogSeverity
+from syslog_rfc5424_parser.framing import NON_TRANSPARENT, OCTET_COUNTING
+from syslog_rfc5424_parser.template import MessageTemplate
+
+from .test_message_parser import PARSE_VECTORS
+
+
+class Text(str):
+    pass
+
+
+TEMPLATE = MessageTemplate(SyslogFacility.local0, 'web1', 'api', 1234, 'REQ',
+                           [('meta', ['sequenceId', 'requestId']), ('flags', [])])
+
+
+@pytest.mark.parametrize('severity,msg,timestamp,sd_values', [
+    (SyslogSeverity.info, 'request done', 1453000000.25, (1, 'abc')),
+    (SyslogSeverity.err, None, '2016-01-15T00:04:01Z', ('a"b]c\\', 'é')),
+    (0, '', None, ('', '')),
+    (7, b'\xff\xfe binary', datetime.datetime(2016, 1, 15, tzinfo=datetime.timezone.utc), (2, 3)),
+    (3, 5, None, (1, 2)),
+    (SyslogSeverity.info, Text('a str subclass'), None, (1, 2)),
+])
+def test_matches_syslog_message(severity, msg, timestamp, sd_values):
+    message = TEMPLATE.message(severity, msg, timestamp, sd_values)
+    assert TEMPLATE.render(severity, msg, timestamp, sd_values) == message.to_bytes()
+    if not isinstance(msg, bytes):
+        assert TEMPLATE.render(severity, msg, timestamp, sd_values).decode('utf-8') == str(message)
+    parsed = SyslogMessage.parse(TEMPLATE.render(severity, msg, timestamp, sd_values))
+    assert parsed.sd == {'meta': {'sequenceId': str(sd_values[0]), 'requestId': str(sd_values[1])}, 'flags': {}}
+
+
+@pytest.mark.parametrize('input_line', [v[0] for v in PARSE_VECTORS])
+def test_from_message(input_line):
+    message = SyslogMessage.parse(input_line)
+    if message.facility == SyslogFacility.unknown:
+        with pytest.raises(ValueError):
+            MessageTemplate.from_message(message)
+        return
+    template = MessageTemplate.from_message(message)
+    sd_values = [value for sd_params in message.sd.values() for value in sd_params.values()]
+    assert template.sd_size == len(sd_values)
+    assert template.render(message.severity, message.msg, message.timestamp, sd_values) == message.to_bytes()
+
+
+def test_reusable_buffer_and_framing():
+    out = bytearray()
+    for framing in (None, OCTET_COUNTING, NON_TRANSPARENT):
+        template = MessageTemplate(SyslogFacility.user, framing=framing)
+        expected = SyslogMessage(SyslogSeverity.notice, SyslogFacility.user, msg='hi').to_bytes(framing)
+        assert template.render(SyslogSeverity.notice, 'hi') == expected
+        assert template.render(SyslogSeverity.notice, 'hi', out=out) is out
+        assert out.endswith(expected)
+    assert out == b'<13>1 - - - - - - hi' + b'20 <13>1 - - - - - - hi' + b'<13>1 - - - - - - hi\n'
+
+
+def test_errors():
+    with pytest.raises(ValueError):
+        TEMPLATE.render(SyslogSeverity.info, 'msg', sd_values=(1,))
+    with pytest.raises(ValueError):
+        MessageTemplate(SyslogFacility.unknown)
+    with pytest.raises(ValueError):
+        MessageTemplate(SyslogFacility.user, framing='bogus')
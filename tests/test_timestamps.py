@@ -0,0 +1,93 @@
+import datetime
+
+import pytest
+
+from syslog_rfc5424_parser import SyslogMessage, ParseError, timestamps
+from syslog_rfc5424_parser.message import LazySyslogMessage
+
+
+UTC = datetime.timezone.utc
+
+TIMESTAMP_VECTORS = (
+    ('2016-01-15T00:04:01Z', 1452816241000000000, datetime.datetime(2016, 1, 15, 0, 4, 1, tzinfo=UTC)),
+    ('2016-01-15T00:04:01+00:00', 1452816241000000000, datetime.datetime(2016, 1, 15, 0, 4, 1, tzinfo=UTC)),
+    ('2016-01-15T00:04:01.1234Z', 1452816241123400000, datetime.datetime(2016, 1, 15, 0, 4, 1, 123400, tzinfo=UTC)),
+    ('2016-01-15T01:04:01.5+01:00', 1452816241500000000,
+     datetime.datetime(2016, 1, 15, 1, 4, 1, 500000, tzinfo=datetime.timezone(datetime.timedelta(hours=1)))),
+    ('2016-01-14T16:04:01.000003-08:00', 1452816241000003000,
+     datetime.datetime(2016, 1, 14, 16, 4, 1, 3, tzinfo=datetime.timezone(datetime.timedelta(hours=-8)))),
+)
+
+
+@pytest.mark.parametrize('timestamp, epoch_ns, expected_datetime', TIMESTAMP_VECTORS)
+def test_convert(timestamp, epoch_ns, expected_datetime):
+    assert timestamps.TimestampParser(timestamps.EPOCH_NS)(timestamp) == epoch_ns
+    assert timestamps.TimestampParser(timestamps.EPOCH)(timestamp) == pytest.approx(epoch_ns / 1e9, abs=1e-7)
+    parsed = timestamps.TimestampParser(timestamps.DATETIME)(timestamp)
+    assert parsed == expected_datetime
+    assert parsed.utcoffset() == expected_datetime.utcoffset()
+
+
+def test_nilvalue():
+    for timestamp_format in (timestamps.EPOCH, timestamps.EPOCH_NS, timestamps.DATETIME):
+        assert timestamps.TimestampParser(timestamp_format)('-') is None
+
+
+def test_cache_is_per_second_and_bounded():
+    convert = timestamps.TimestampParser(timestamps.EPOCH_NS, maxsize=2)
+    assert convert('2016-01-15T00:04:01.1Z') + 100000000 == convert('2016-01-15T00:04:01.2Z')
+    assert list(convert._cache) == ['2016-01-15T00:04:01Z']
+    convert('2016-01-15T00:04:02+00:00')
+    convert('2016-01-15T00:04:03Z')
+    assert list(convert._cache) == ['2016-01-15T00:04:03Z']
+
+
+def test_get_parser():
+    assert timestamps.get_parser(None) is None
+    assert timestamps.get_parser(timestamps.RAW) is None
+    assert timestamps.get_parser(timestamps.EPOCH) is timestamps.get_parser(timestamps.EPOCH)
+    convert = timestamps.TimestampParser(maxsize=10)
+    assert timestamps.get_parser(convert) is convert
+    with pytest.raises(ValueError):
+        timestamps.get_parser('bogus')
+    with pytest.raises(ValueError):
+        timestamps.TimestampParser(timestamps.RAW)
+
+
+@pytest.mark.parametrize('timestamp, epoch_ns, expected_datetime', TIMESTAMP_VECTORS)
+def test_parse_with_timestamp_format(timestamp, epoch_ns, expected_datetime):
+    line = '<78>1 {0} host1 CROND - - - message'.format(timestamp)
+    assert SyslogMessage.parse(line).timestamp == timestamp
+    for parse in (SyslogMessage.parse, LazySyslogMessage.parse):
+        for buf in (line, line.encode('utf-8')):
+            assert parse(buf, timestamp_format=timestamps.DATETIME).timestamp == expected_datetime
+    parsed = SyslogMessage.parse(line, timestamp_format=timestamps.DATETIME)
+    assert SyslogMessage.parse(str(parsed), timestamp_format=timestamps.DATETIME).timestamp == expected_datetime
+    parsed = SyslogMessage.parse(line, timestamp_format=timestamps.EPOCH_NS)
+    assert parsed.timestamp == epoch_ns
+    parsed = SyslogMessage.parse(line, timestamp_format=timestamps.EPOCH)
+    assert SyslogMessage.parse(str(parsed), timestamp_format=timestamps.DATETIME).timestamp == expected_datetime
+
+
+@pytest.mark.parametrize('timestamp_format', timestamps.TIMESTAMP_FORMATS)
+@pytest.mark.parametrize('timestamp', [v[0] for v in TIMESTAMP_VECTORS] + ['-'])
+def test_serialize_round_trip(timestamp_format, timestamp):
+    line = '<78>1 {0} host1 CROND - - - message'.format(timestamp)
+    parsed = SyslogMessage.parse(line, timestamp_format=timestamp_format)
+    for serialized in (str(parsed), parsed.to_bytes()):
+        assert SyslogMessage.parse(serialized, timestamp_format=timestamp_format).timestamp == parsed.timestamp
+
+
+def test_invalid_timestamp():
+    line = '<78>1 2016-13-15T00:04:01Z host1 CROND - - -'
+    assert SyslogMessage.parse(line).timestamp == '2016-13-15T00:04:01Z'
+    for parse in (SyslogMessage.parse, LazySyslogMessage.parse):
+        for buf in (line, line.encode('utf-8')):
+            with pytest.raises(ParseError):
+                parse(buf, timestamp_format=timestamps.EPOCH)
+    good = '<78>1 2016-01-15T00:04:01Z host1 CROND - - -'
+    result = SyslogMessage.parse_many([good, 'garbage', good, line, good, line], timestamp_format=timestamps.EPOCH)
+    assert [m.timestamp for m in result.messages] == [1452816241] * 3
+    assert [tuple(e) for e in result.errors] == [
+        (1, 'Unable to parse message'), (3, 'Invalid timestamp'), (5, 'Invalid timestamp')
+    ]